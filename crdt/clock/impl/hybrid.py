@@ -0,0 +1,59 @@
+"""The hybrid module defines a hybrid logical clock, that combines a physical
+clock with a logical counter to issue timestamps unique across replicas."""
+from typing import Final
+
+from crdt.clock.interface import Clock, ClockError
+
+DEFAULT_NODE_BITS: Final[int] = 16
+
+
+class HybridLogicalClock:
+    """This clock issues timestamps in the timeframe of a physical clock. The
+    low ``node_bits`` bits of each timestamp hold the id of the issuing node,
+    which makes timestamps issued by distinct nodes distinct. The remaining bits
+    hold the greatest of the physical time and of the last issued or observed
+    time plus one, so that timestamps increase strictly even when the physical
+    clock stalls or lags behind a remote replica."""
+
+    def __init__(
+        self, physical: Clock, node_id: int, node_bits: int = DEFAULT_NODE_BITS
+    ) -> None:
+        """Initialize this clock on top of a physical clock.
+
+        Params
+            physical: clock providing the physical time
+            node_id: unique id of this replica, lower than 2 ** node_bits
+            node_bits: number of low timestamp bits reserved for the node id
+        """
+        if not 0 <= node_id < 1 << node_bits:
+            raise ClockError(f"The node id must fit in {node_bits} bits")
+        self.physical = physical
+        self.node_id = node_id
+        self._tick = 1 << node_bits
+        self._mask = ~(self._tick - 1)
+        self._last = physical.nanoseconds & self._mask
+
+    def _next(self) -> int:
+        """Time (without node id) following the last issued or observed one"""
+        return max(self.physical.nanoseconds & self._mask, self._last + self._tick)
+
+    @property
+    def nanoseconds(self) -> int:
+        """A new timestamp, greater than all issued or observed ones"""
+        self._last = self._next()
+        return self._last | self.node_id
+
+    def update(self, ts: int) -> None:
+        """Make all subsequent timestamps greater than ``ts``."""
+        self._last = max(self._last, ts & self._mask)
+
+    def reserve(self, n: int) -> range:
+        """Reserve ``n`` increasing timestamps, reading the physical clock only
+        once."""
+        if n < 0:
+            raise ClockError("Can't reserve a negative number of timestamps")
+        start = self._next()
+        if n > 0:
+            self._last = start + (n - 1) * self._tick
+        first = start | self.node_id
+        return range(first, first + n * self._tick, self._tick)
@@ -0,0 +1,86 @@
+"""The synced module defines a client clock that tracks the global application
+time from the timesync messages of the server."""
+from typing import Optional
+
+from crdt.clock.interface import Clock
+from crdt.clock.timesync import TimeSync, TimeSyncAck
+
+
+class SyncedClock:
+    """This clock extrapolates the global time from the last timesync received,
+    using a local monotonic clock to measure the time elapsed since. The drift
+    of the local clock relative to the global clock is estimated from
+    successive timesyncs and corrected linearly."""
+
+    def __init__(self, local: Clock, smoothing: float = 0.25) -> None:
+        """Initialize this clock, which follows the local clock until the first
+        timesync is received.
+
+        Params
+            local: the local monotonic clock
+            smoothing: weight of each new sample in the moving average of the
+                drift rate
+        """
+        self.local = local
+        self.smoothing = smoothing
+        self.last_sync: Optional[TimeSync] = None
+        self.drift = 0.0
+        self._received_at = 0
+        self._last: Optional[int] = None
+
+    def receive(self, sync: TimeSync) -> None:
+        """Synchronize with a timesync from the server, ignoring timesyncs
+        older than the last one."""
+        now = self.local.nanoseconds
+        last = self.last_sync
+        if last is not None:
+            if sync.index <= last.index:
+                return
+            elapsed = now - self._received_at
+            if elapsed > 0:
+                drift = (sync.ts - last.ts) / elapsed - 1
+                self.drift += self.smoothing * (drift - self.drift)
+        self.last_sync = sync
+        self._received_at = now
+
+    def _guess(self, now: int) -> int:
+        if self.last_sync is None:
+            return now
+        elapsed = now - self._received_at
+        return (
+            self.last_sync.ts
+            + self.last_sync.rtt // 2
+            + round(elapsed * (1 + self.drift))
+        )
+
+    def _read(self, now: int) -> int:
+        guess = self._guess(now)
+        if self._last is not None:
+            guess = max(guess, self._last + 1)
+        self._last = guess
+        return guess
+
+    @property
+    def nanoseconds(self) -> int:
+        """Best guess of the global time, never going backward"""
+        return self._read(self.local.nanoseconds)
+
+    @property
+    def skew(self) -> int:
+        """Estimated advance of the global clock over the local clock, in
+        nanoseconds, never less than that of the last reading"""
+        now = self.local.nanoseconds
+        guess = self._guess(now)
+        if self._last is not None:
+            guess = max(guess, self._last)
+        return guess - now
+
+    def ack(self) -> Optional[TimeSyncAck]:
+        """Acknowledgement of the last timesync received, to send with the next
+        message to the server"""
+        if self.last_sync is None:
+            return None
+        now = self.local.nanoseconds
+        guess = self._read(now)
+        held = now - self._received_at
+        return TimeSyncAck(index=self.last_sync.index, guess=guess, held=held)
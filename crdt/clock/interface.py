@@ -15,3 +15,16 @@ class Clock(Protocol):
     @abstractmethod
     def nanoseconds(self) -> int:
         pass
+
+
+class HybridClock(Clock, Protocol):
+    """A clock whose timestamps are unique across replicas, and that stays
+    ahead of the timestamps it observes from other replicas"""
+
+    def update(self, ts: int) -> None:
+        """Fold in a timestamp received from another replica"""
+        ...
+
+    def reserve(self, n: int) -> range:
+        """Atomically reserve a block of ``n`` increasing timestamps"""
+        ...
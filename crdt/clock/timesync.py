@@ -0,0 +1,121 @@
+"""Messages and server-side bookkeeping of the application-level clock
+synchronization protocol described in the README. Timesync messages are
+normally piggybacked on the operation batches exchanged by clients and server,
+and only sent on their own as heartbeats over idle links."""
+# pylint: disable=too-few-public-methods
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from pydantic import BaseModel  # pylint: disable=no-name-in-module
+
+from crdt.clock.interface import Clock, ClockError
+
+
+class TimeSync(BaseModel):
+    """Global time sent by the server, indexed sequentially per client"""
+
+    index: int
+    ts: int
+    # The server's estimate of the round-trip delay to the client
+    rtt: int = 0
+
+
+class TimeSyncAck(BaseModel):
+    """Sent by a client with each message: the index of the last timesync
+    received, the client's best guess of the global time, and the time it held
+    the timesync before sending this acknowledgement"""
+
+    index: int
+    guess: int
+    held: int
+
+
+@dataclass
+class _ClientSync:
+    """Synchronization state of one client"""
+
+    next_index: int = 0
+    # Send time of the timesyncs since the last acknowledged one, by index
+    pending: Dict[int, int] = field(default_factory=dict)
+    last_sent: Optional[int] = None
+    rtt: Optional[int] = None
+    skew: Optional[int] = None
+
+
+class TimeSyncTracker:
+    """Issues the timesyncs sent to each client, and estimates the round-trip
+    delay to and the clock skew of each client from their acknowledgements."""
+
+    def __init__(self, clock: Clock, smoothing: float = 0.25) -> None:
+        """Initialize a tracker of the clients of a server.
+
+        Params
+            clock: the global reference clock
+            smoothing: weight of each new sample in the moving averages of the
+                round-trip delays and skews
+        """
+        if not 0 < smoothing <= 1:
+            raise ClockError("The smoothing factor must be in (0, 1]")
+        self.clock = clock
+        self.smoothing = smoothing
+        self._clients: Dict[object, _ClientSync] = {}
+
+    def register(self, client: object) -> None:
+        """Start tracking a new client."""
+        self._clients.setdefault(client, _ClientSync())
+
+    def _sync(self, client: object) -> _ClientSync:
+        try:
+            return self._clients[client]
+        except KeyError as e:
+            raise ClockError(f"Unknown client {client!r}") from e
+
+    def timesync(self, client: object) -> TimeSync:
+        """Make the next timesync to send to ``client``."""
+        sync = self._sync(client)
+        now = self.clock.nanoseconds
+        message = TimeSync(index=sync.next_index, ts=now, rtt=sync.rtt or 0)
+        sync.pending[sync.next_index] = now
+        sync.next_index += 1
+        sync.last_sent = now
+        return message
+
+    def acknowledge(self, client: object, ack: TimeSyncAck) -> None:
+        """Update the estimates of ``client`` with an acknowledgement, and
+        forget the timesyncs it acknowledges."""
+        sync = self._sync(client)
+        sent = sync.pending.get(ack.index)
+        if sent is None:
+            return  # Already acknowledged, or never sent
+        now = self.clock.nanoseconds
+        rtt = max(0, now - sent - ack.held)
+        # The guess was made about half a round trip ago
+        skew = ack.guess - (now - rtt // 2)
+        sync.rtt = self._smooth(sync.rtt, rtt)
+        sync.skew = self._smooth(sync.skew, skew)
+        sync.pending = {i: t for i, t in sync.pending.items() if i > ack.index}
+
+    def _smooth(self, average: Optional[int], sample: int) -> int:
+        if average is None:
+            return sample
+        return round(average + self.smoothing * (sample - average))
+
+    def idle(self, client: object, interval: int) -> bool:
+        """Whether no timesync was sent to ``client`` in the last ``interval``
+        nanoseconds"""
+        last_sent = self._sync(client).last_sent
+        return last_sent is None or self.clock.nanoseconds - last_sent >= interval
+
+    def rtt(self, client: object) -> Optional[int]:
+        """Estimated round-trip delay to ``client``, in nanoseconds"""
+        return self._sync(client).rtt
+
+    def skew(self, client: object) -> Optional[int]:
+        """Estimated advance of the clock of ``client`` over the global
+        clock, in nanoseconds"""
+        return self._sync(client).skew
+
+    def unacknowledged(self, client: object) -> int:
+        """Number of timesyncs sent to ``client`` since its last
+        acknowledgement"""
+        return len(self._sync(client).pending)
@@ -0,0 +1,38 @@
+"""Operation batches are the messages exchanged by clients and server. Besides
+operations, they carry the clock synchronization payloads, so that keeping
+clocks aligned doesn't cost messages of its own on busy links."""
+from dataclasses import dataclass, field
+from typing import Generic, Iterator, List, Optional, TypeVar
+
+from crdt.clock.timesync import TimeSync, TimeSyncAck
+from crdt.lww_graph.operation import LWWGraphOperation
+
+T = TypeVar("T")
+
+
+@dataclass
+class OpBatch(Generic[T]):
+    """Operations sent together, with the timesync sent by the server or the
+    acknowledgement sent by a client. A batch without operations is a
+    heartbeat.
+
+    Clients also report a ``stable`` timestamp, after all the operations they
+    sent so far and before all those they will send. The server broadcasts the
+    stability ``frontier``, the earliest timestamp reported by its clients,
+    once it has forwarded them all operations up to it. It also sends each
+    client back, as ``confirmed``, the last ``stable`` timestamp it received
+    from it: the client's operations up to it were applied by the server."""
+
+    ops: List[LWWGraphOperation[T]] = field(default_factory=list)
+    sender: Optional[object] = None
+    timesync: Optional[TimeSync] = None
+    ack: Optional[TimeSyncAck] = None
+    stable: Optional[int] = None
+    frontier: Optional[int] = None
+    confirmed: Optional[int] = None
+
+    def __iter__(self) -> Iterator[LWWGraphOperation[T]]:
+        return iter(self.ops)
+
+    def __len__(self) -> int:
+        return len(self.ops)
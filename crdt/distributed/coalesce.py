@@ -0,0 +1,39 @@
+"""Coalescing of the local operations of a client before they are uploaded. A
+client dragging a vertex around adds and removes the same edges many times a
+second, but only the last addition and the last removal of each edge reach the
+server once merged, so the operations buffered between two uploads are
+collapsed per element and per kind of operation."""
+from typing import Generic, List, Optional, TypeVar
+
+from crdt.lww_graph.operation import LWWGraphOperation
+from crdt.lww_graph.tables import GraphTables
+
+T = TypeVar("T")
+
+
+class WriteBuffer(Generic[T]):
+    """Local operations awaiting upload, kept as the records of the elements
+    they touch: its size is the number of distinct elements, however many
+    operations were buffered. Draining it yields the smallest operations log
+    resolving like the buffered operations, merged with any other."""
+
+    def __init__(self) -> None:
+        self._tables: GraphTables[T] = GraphTables()
+        # Local time of the first operation buffered since the last drain
+        self.since: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._tables.vertices) + len(self._tables.edges)
+
+    def add(self, op: LWWGraphOperation[T], now: int) -> None:
+        """Buffer an operation made at local time ``now``."""
+        if self.since is None:
+            self.since = now
+        self._tables.apply(op)
+
+    def drain(self) -> List[LWWGraphOperation[T]]:
+        """Empty the buffer and return its operations, in timestamp order."""
+        ops = sorted(self._tables.operations(), key=lambda op: op.ts)
+        self._tables = GraphTables()
+        self.since = None
+        return ops
@@ -0,0 +1,335 @@
+"""In-process client and server, exchanging operation batches by direct method
+calls. They implement the replication and clock synchronization logic, leaving
+the transport to proxies."""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+from crdt.clock.impl.synced import SyncedClock
+from crdt.clock.interface import Clock
+from crdt.clock.timesync import TimeSyncTracker
+from crdt.distributed.batch import OpBatch
+from crdt.distributed.coalesce import WriteBuffer
+from crdt.distributed.interest import Interest, RegionIndex, Subscription
+from crdt.distributed.interface import LWWGraphClient, LWWGraphServer, T
+from crdt.lww_graph.edge import Edge
+from crdt.lww_graph.impl.optimistic_lww_graph import OptimisticLWWGraph
+from crdt.lww_graph.interface import LWWGraph, LWWGraphError, find_shortest_path
+from crdt.lww_graph.operation import LWWGraphOperation
+from crdt.lww_graph.path_cache import PathCache
+
+
+def _observe(graph: LWWGraph[T], ops: List[LWWGraphOperation[T]]) -> None:
+    """Fold the timestamps of the received ``ops`` into the clock of ``graph``
+    if it is a HybridClock, so that its next local operations come after
+    them."""
+    update = getattr(graph.clock, "update", None)
+    if update is not None and ops:
+        update(max(op.ts for op in ops))
+
+
+class LocalLWWGraphClient(LWWGraphClient[T]):
+    """Sends each local operation to the server together with the
+    acknowledgement of the last timesync received. Heartbeats are only sent
+    when no operation was sent for ``heartbeat_interval`` nanoseconds.
+
+    When given a ``flush_interval``, local operations are instead buffered and
+    collapsed per element (see WriteBuffer), and uploaded together once the
+    first of them is ``flush_interval`` old, once ``max_pending`` elements are
+    touched, or on ``flush``. Any batch sent, heartbeats included, empties the
+    buffer. Operations written while disconnected stay buffered, and are
+    uploaded on ``connect``.
+
+    When the graph is an OptimisticLWWGraph, the local operations that the
+    server confirmed applying are folded into its confirmed state. When its
+    clock is a HybridClock, the received timestamps are folded into it."""
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        graph: LWWGraph[T],
+        clock: SyncedClock,
+        heartbeat_interval: int,
+        path_cache: Optional[PathCache[T]] = None,
+        flush_interval: Optional[int] = None,
+        max_pending: int = 256,
+    ) -> None:
+        """Initialize a client replicating a local graph.
+
+        Params
+            graph: the local replica, which must timestamp operations with
+                ``clock``
+            clock: the clock tracking the global time
+            heartbeat_interval: idle time after which a heartbeat is sent, in
+                nanoseconds of the local clock
+            path_cache: cache of ``graph`` answering the path and connectivity
+                queries, if they are repeated from the same vertices
+            flush_interval: longest time local operations are buffered
+                before upload, in nanoseconds of the local clock, or None to
+                upload each operation immediately
+            max_pending: number of distinct elements touched by the buffered
+                operations that triggers their upload
+        """
+        if path_cache is not None and path_cache.graph is not graph:
+            raise LWWGraphError("The path cache must follow the client graph")
+        self.graph = graph
+        self.path_cache = path_cache
+        self.clock = clock
+        self.heartbeat_interval = heartbeat_interval
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.server: Optional[LWWGraphServer[T]] = None
+        self.interest: Optional[Interest[T]] = None
+        self._pending: WriteBuffer[T] = WriteBuffer()
+        self.frontier: Optional[int] = None
+        self._last_sent: Optional[int] = None
+
+    def connect(self, s: LWWGraphServer) -> None:
+        self.server = s
+        s.register_client(self, self.interest)
+        # Upload the operations written while disconnected
+        self.flush()
+
+    def subscribe(self, interest: Optional[Interest[T]]) -> None:
+        """Only replicate the region of ``interest`` from now on, or the whole
+        graph if None. Elements that leave the region stay in the local graph,
+        but are no longer kept up to date."""
+        self.interest = interest
+        if self.server is not None:
+            self.server.set_interest(self, interest)
+
+    def update(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
+        timesync = ops.timesync if isinstance(ops, OpBatch) else None
+        confirmed = ops.confirmed if isinstance(ops, OpBatch) else None
+        frontier = ops.frontier if isinstance(ops, OpBatch) else None
+        if timesync is not None:
+            self.clock.receive(timesync)
+        batch = list(ops)
+        _observe(self.graph, batch)
+        self.graph.apply(batch)
+        if confirmed is not None and isinstance(self.graph, OptimisticLWWGraph):
+            self.graph.confirm(confirmed)
+        if frontier is not None:
+            if self.frontier is None or frontier > self.frontier:
+                self.frontier = frontier
+                self.graph.collect_garbage(frontier)
+
+    def _send(self) -> None:
+        if self.server is None:
+            return  # Disconnected: the operations stay buffered until connect
+        ops = self._pending.drain()
+        self._last_sent = self.clock.local.nanoseconds
+        self.server.update(
+            OpBatch(
+                ops=ops,
+                sender=self,
+                ack=self.clock.ack(),
+                # The graph's clock, which may mask or offset the synced one,
+                # never goes backward, so later operations come after
+                stable=self.graph.clock.nanoseconds,
+            )
+        )
+
+    def _flush_due(self, now: int) -> bool:
+        since = self._pending.since
+        if since is None:
+            return False
+        return (
+            self.flush_interval is None
+            or now - since >= self.flush_interval
+            or len(self._pending) >= self.max_pending
+        )
+
+    def _buffer(self, op: LWWGraphOperation[T]) -> None:
+        now = self.clock.local.nanoseconds
+        self._pending.add(op, now)
+        if self._flush_due(now):
+            self._send()
+
+    def flush(self) -> None:
+        """Upload the buffered local operations now."""
+        if self._pending.since is not None:
+            self._send()
+
+    def tick(self) -> None:
+        """Upload the buffered local operations if they are due, or else send
+        a heartbeat if the link to the server is idle."""
+        now = self.clock.local.nanoseconds
+        if self._flush_due(now):
+            self._send()
+        elif (
+            self._last_sent is None or now - self._last_sent >= self.heartbeat_interval
+        ):
+            self._send()
+
+    def add_vertex(self, item: T) -> None:
+        self._buffer(self.graph.add_vertex(item))
+
+    def add_edge(self, item: Edge[T]) -> None:
+        self._buffer(self.graph.add_edge(item))
+
+    def remove_vertex(self, item: T) -> None:
+        self._buffer(self.graph.remove_vertex(item))
+
+    def remove_edge(self, item: Edge[T]) -> None:
+        self._buffer(self.graph.remove_edge(item))
+
+    def check_connected(self, a: T, b: T) -> bool:
+        if self.path_cache is not None:
+            return self.path_cache.connected(a, b)
+        return any(a in c and b in c for c in self.graph.components)
+
+    def find_path(self, a: T, b: T) -> List[Edge[T]]:
+        if self.path_cache is not None:
+            return self.path_cache.find_path(a, b) or []
+        return find_shortest_path(self.graph, a, b) or []
+
+
+class LocalLWWGraphServer(LWWGraphServer[T]):
+    """Forwards the operations received from each client to all others, with a
+    fresh timesync. Heartbeats are only sent to the clients that received
+    nothing for ``heartbeat_interval`` nanoseconds.
+
+    When given a ``frontier_interval``, the server also tracks the stability
+    frontier: every client has sent all its operations up to it, and the
+    server has forwarded them. Each advance of at least ``frontier_interval``
+    collects the garbage of the server replica, and is sent to the clients
+    with the next batches so that they collect theirs. Late operations, at or
+    before the frontier, are dropped.
+
+    Clients may subscribe to an interest (see crdt.distributed.interest), in
+    which case they are only sent the operations on its region and on the
+    edges crossing its boundary, with the records of the vertices entering
+    their scope. The records of all elements are then indexed by the server.
+
+    When the clock of the server replica is a HybridClock, the received
+    timestamps are folded into it."""
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        graph: LWWGraph[T],
+        clock: Clock,
+        heartbeat_interval: int,
+        frontier_interval: Optional[int] = None,
+    ):
+        """Initialize a server with its replica of the graph.
+
+        Params
+            graph: the server replica
+            clock: the global reference clock
+            heartbeat_interval: idle time after which a heartbeat is sent to a
+                client, in nanoseconds
+            frontier_interval: smallest advance of the stability frontier
+                worth collecting garbage for, in nanoseconds, or None to never
+                collect garbage
+        """
+        self.graph = graph
+        self.clients: List[LWWGraphClient[T]] = []
+        self.tracker = TimeSyncTracker(clock)
+        self.heartbeat_interval = heartbeat_interval
+        self.frontier_interval = frontier_interval
+        self.frontier: Optional[int] = None
+        self._stable: Dict[object, int] = {}
+        self._subscriptions: Dict[object, Subscription[T]] = {}
+        self._index: Optional[RegionIndex[T]] = None
+
+    def register_client(
+        self, c: LWWGraphClient, interest: Optional[Interest[T]] = None
+    ) -> None:
+        self.clients.append(c)
+        self.tracker.register(c)
+        self.set_interest(c, interest)
+
+    def set_interest(self, c: LWWGraphClient, interest: Optional[Interest[T]]) -> None:
+        """Replicate the region of ``interest`` to ``c`` from now on, or the
+        whole graph if None, starting with the operations that it lacks."""
+        if interest is None:
+            self._subscriptions.pop(c, None)
+            c.update(self._batch(c, self._all_ops()))
+            return
+        if self._index is None:
+            self._index = RegionIndex()
+            for op in self._all_ops():
+                self._index.apply(op)
+        subscription: Subscription[T] = Subscription(interest)
+        self._subscriptions[c] = subscription
+        c.update(
+            self._batch(c, self._index.enter(subscription, interest.region(self.graph)))
+        )
+
+    def _replicated(
+        self,
+        client: LWWGraphClient[T],
+        ops: List[LWWGraphOperation[T]],
+        sender: Optional[object],
+    ) -> List[LWWGraphOperation[T]]:
+        """The operations to send ``client`` after ``ops`` are applied: all
+        of them unless it subscribed to an interest, and none it sent."""
+        subscription = self._subscriptions.get(client)
+        if subscription is None or self._index is None:
+            return [] if client is sender else ops
+        replicated = self._index.filter(subscription, ops)
+        if replicated and subscription.interest.hops != 0:
+            region = subscription.interest.region(self.graph)
+            replicated += self._index.enter(subscription, region)
+        if client is sender:
+            sent = {id(op) for op in ops}
+            replicated = [op for op in replicated if id(op) not in sent]
+        return sorted(replicated, key=lambda op: op.ts)
+
+    def _batch(
+        self, client: LWWGraphClient[T], ops: List[LWWGraphOperation[T]]
+    ) -> OpBatch[T]:
+        return OpBatch(
+            ops=ops,
+            timesync=self.tracker.timesync(client),
+            frontier=self.frontier,
+            confirmed=self._stable.get(client),
+        )
+
+    def _advance_frontier(self) -> None:
+        """Move the frontier to the earliest stable timestamp of the clients,
+        if all have reported one and it is far enough ahead."""
+        if self.frontier_interval is None or not self.clients:
+            return
+        if any(client not in self._stable for client in self.clients):
+            return
+        frontier = min(self._stable[client] for client in self.clients)
+        if self.frontier is None or frontier >= self.frontier + self.frontier_interval:
+            self.frontier = frontier
+            self.graph.collect_garbage(frontier)
+            if self._index is not None:
+                self._index.collect_garbage(frontier)
+
+    def _all_ops(self) -> List[LWWGraphOperation[T]]:
+        # Clients of replicas without an operations log only get later updates
+        return list(getattr(self.graph, "operations", ()))
+
+    def update(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
+        sender = ops.sender if isinstance(ops, OpBatch) else None
+        stable = ops.stable if isinstance(ops, OpBatch) else None
+        if isinstance(ops, OpBatch) and ops.ack is not None:
+            self.tracker.acknowledge(sender, ops.ack)
+        frontier = self.frontier
+        ops = [op for op in ops if frontier is None or op.ts > frontier]
+        if ops:
+            _observe(self.graph, ops)
+            self.graph.apply(ops)
+            if self._index is not None:
+                for op in ops:
+                    self._index.apply(op)
+            for client in self.clients:
+                replicated = self._replicated(client, ops, sender)
+                if replicated:
+                    client.update(self._batch(client, replicated))
+        if sender is not None and stable is not None:
+            self._stable[sender] = stable
+            self._advance_frontier()
+
+    def tick(self) -> None:
+        """Send a heartbeat to each idle client."""
+        for client in self.clients:
+            if self.tracker.idle(client, self.heartbeat_interval):
+                client.update(self._batch(client, []))
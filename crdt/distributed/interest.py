@@ -0,0 +1,129 @@
+"""Partial replication: a client may only replicate the region of the graph it
+is interested in, f.e. the part of a huge map that it displays. The server
+then only forwards it the operations on that region and on the edges crossing
+its boundary, so that the bandwidth and memory of the client scale with the
+region rather than with the whole graph."""
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Generic, Iterable, List, Optional, Set, TypeVar
+
+from crdt.lww_graph.edge import SlotEdge
+from crdt.lww_graph.interface import LWWGraph
+from crdt.lww_graph.operation import LWWGraphOperation
+from crdt.lww_graph.tables import GraphTables
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Interest(Generic[T]):
+    """The region of the graph replicated by a client: ``vertices``, and the
+    vertices at most ``hops`` edges away from them, or the whole components of
+    ``vertices`` if ``hops`` is None. The region follows the changes of the
+    graph, except with the default of 0 hops, which makes it static."""
+
+    vertices: FrozenSet[T]
+    hops: Optional[int] = 0
+
+    def region(self, graph: LWWGraph[T]) -> Set[T]:
+        """The vertices of the region in ``graph``, including the interesting
+        vertices that are absent, so that their addition is replicated."""
+        region = set(self.vertices)
+        if self.hops != 0:
+            hops = self.hops if self.hops is not None else sys.maxsize
+            for vertex in self.vertices:
+                region |= graph.k_hop(vertex, hops)
+        return region
+
+
+@dataclass
+class Subscription(Generic[T]):
+    """What the server tracks of a client replicating a region: the vertices
+    of the region, and the scope of vertices whose operations it receives,
+    which also includes the far ends of the edges crossing the boundary of the
+    region, without which the client couldn't tell if they are present."""
+
+    interest: Interest[T]
+    region: Set[T] = field(default_factory=set)
+    scope: Set[T] = field(default_factory=set)
+
+
+@dataclass
+class RegionIndex(Generic[T]):
+    """Records of all the elements of the graph, and the edges incident to
+    each vertex, from which the operations replicating any region are made."""
+
+    tables: GraphTables[T] = field(default_factory=GraphTables)
+    incident: Dict[T, Set[SlotEdge[T]]] = field(default_factory=dict)
+
+    def apply(self, op: LWWGraphOperation[T]) -> None:
+        """Index one operation, in any order."""
+        self.tables.apply(op)
+        if op.op in ("add_e", "del_e"):
+            edge = SlotEdge.from_edge(op.arg)  # type: ignore
+            for vertex in edge.vertices:
+                self.incident.setdefault(vertex, set()).add(edge)
+
+    def collect_garbage(self, frontier: int) -> None:
+        """Collect the garbage of the records, like the graph does."""
+        self.tables.collect_garbage(frontier)
+        self.incident = {}
+        for edge in self.tables.edges:
+            for vertex in edge.vertices:
+                self.incident.setdefault(vertex, set()).add(edge)
+
+    def operations(
+        self, vertices: Iterable[T], edges: Iterable[SlotEdge[T]]
+    ) -> List[LWWGraphOperation[T]]:
+        """The smallest operations log resolving to the records of
+        ``vertices`` and ``edges``."""
+        tables: GraphTables[T] = GraphTables(
+            vertices={
+                v: self.tables.vertices[v]
+                for v in vertices
+                if v in self.tables.vertices
+            },
+            edges={e: self.tables.edges[e] for e in edges if e in self.tables.edges},
+        )
+        return tables.operations()
+
+    def enter(
+        self, subscription: Subscription[T], region: Set[T]
+    ) -> List[LWWGraphOperation[T]]:
+        """Move ``subscription`` to ``region``, and return the operations that
+        the client lacks to replicate it: those on the vertices entering its
+        scope, and on the edges entering the region."""
+        entered = region - subscription.region
+        edges = {
+            edge
+            for vertex in entered
+            for edge in self.incident.get(vertex, ())
+            if not any(v in subscription.region for v in edge.vertices)
+        }
+        scope = region | {v for edge in edges for v in edge.vertices}
+        new_in_scope = scope - subscription.scope
+        subscription.region = region
+        subscription.scope |= scope
+        return self.operations(new_in_scope, edges)
+
+    def filter(
+        self, subscription: Subscription[T], ops: Iterable[LWWGraphOperation[T]]
+    ) -> List[LWWGraphOperation[T]]:
+        """Return the operations of ``ops`` that the client of
+        ``subscription`` replicates, with the records of the vertices that
+        enter its scope through the edges crossing the region boundary."""
+        forwarded = []
+        entering: Set[T] = set()
+        for op in ops:
+            if op.op in ("add_v", "del_v"):
+                if op.arg in subscription.scope:
+                    forwarded.append(op)
+                continue
+            edge = SlotEdge.from_edge(op.arg)  # type: ignore
+            if any(v in subscription.region for v in edge.vertices):
+                forwarded.append(op)
+                entering.update(v for v in edge.vertices if v not in subscription.scope)
+        subscription.scope |= entering
+        return self.operations(entering, ()) + forwarded
@@ -4,8 +4,9 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List, Protocol, TypeVar
+from typing import Iterable, List, Optional, Protocol, TypeVar
 
+from crdt.distributed.interest import Interest
 from crdt.lww_graph.edge import Edge
 from crdt.lww_graph.interface import LWWGraph
 from crdt.lww_graph.operation import LWWGraphOperation
@@ -27,6 +28,11 @@ class LWWGraphClient(Protocol[T]):
         """Called by the server (or its proxy) to communicate remote operations"""
         ...
 
+    def subscribe(self, interest: Optional[Interest[T]]) -> None:
+        """Only replicate the region of the graph in ``interest``, or the whole
+        graph if None"""
+        ...
+
     def add_vertex(self, item: T) -> None:
         """Called locally to register an operation"""
         ...
@@ -40,6 +46,10 @@ class LWWGraphClient(Protocol[T]):
     def remove_edge(self, item: Edge[T]) -> None:
         ...
 
+    def flush(self) -> None:
+        """Send the local operations buffered so far to the server"""
+        ...
+
     def check_connected(self, a: T, b: T) -> bool:
         ...
 
@@ -52,7 +62,12 @@ class LWWGraphServer(Protocol[T]):
     graph: LWWGraph[T]
     clients: List[LWWGraphClient[T]]
 
-    def register_client(self, c: LWWGraphClient) -> None:
+    def register_client(
+        self, c: LWWGraphClient, interest: Optional[Interest[T]] = None
+    ) -> None:
+        ...
+
+    def set_interest(self, c: LWWGraphClient, interest: Optional[Interest[T]]) -> None:
         ...
 
     def update(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
@@ -0,0 +1,404 @@
+"""Simulation of collaborating replicas, to measure how long they take to
+agree and what it costs them. In-process clients and a server exchange their
+batches over simulated links with delays, losses and disconnections, in a
+virtual time that drives all their clocks, so that a run is fast and
+reproducible from its seed.
+
+Links retransmit lost batches after a timeout, and hold the batches sent while
+their client is disconnected until it reconnects, like a reliable transport
+would: losses and outages delay operations instead of losing them. Links are
+FIFO by default, as the stability frontier requires (see OpBatch); reordering
+links must be simulated without a frontier."""
+# pylint: disable=too-few-public-methods
+from __future__ import annotations
+
+import dataclasses
+import functools
+import heapq
+import itertools
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.clock.impl.synced import SyncedClock
+from crdt.clock.interface import Clock
+from crdt.distributed.batch import OpBatch
+from crdt.distributed.impl.local import LocalLWWGraphClient, LocalLWWGraphServer
+from crdt.distributed.interest import Interest
+from crdt.distributed.interface import LWWGraphClient, LWWGraphServer
+from crdt.lww_graph.edge import FrozenEdge
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.interface import LWWGraph
+from crdt.lww_graph.operation import LWWGraphOperation
+from crdt.persistence.records import GRAPH_OPS, RECORD, encode_value
+
+# Estimated size of the fields of a batch besides its operations: sender,
+# timesync or acknowledgement, stable timestamp and frontier
+BATCH_HEADER_SIZE = 64
+
+GraphFactory = Callable[[Clock], LWWGraph[int]]
+
+
+class SimulationError(Exception):
+    """Raised when a simulation is misconfigured, or its replicas diverge"""
+
+
+def batch_size(batch: OpBatch[int]) -> int:
+    """Estimated size of ``batch`` on the wire, in bytes, with operations
+    encoded like in binary logs and their values inline"""
+    return BATCH_HEADER_SIZE + sum(
+        RECORD.size + sum(len(encode_value(v)) for v in GRAPH_OPS.args(op))
+        for op in batch.ops
+    )
+
+
+@dataclass(frozen=True)
+class LinkModel:
+    """Behavior of the links between the server and each client, in both
+    directions. Each transmission of a batch is lost with probability
+    ``loss``, and retransmitted ``retransmit_timeout`` nanoseconds later. A
+    batch then takes ``delay`` nanoseconds to arrive, plus a uniformly random
+    ``jitter``, which reorders batches unless the link is ``fifo``."""
+
+    delay: int
+    jitter: int = 0
+    loss: float = 0.0
+    retransmit_timeout: int = 0
+    fifo: bool = True
+
+
+@dataclass(frozen=True)
+class Outage:
+    """Disconnection of the client of index ``client`` from ``start`` to
+    ``end``, in nanoseconds of virtual time"""
+
+    client: int
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class Workload:
+    """Each client makes ``ops_per_client`` random operations on vertices
+    among ``vertices``, one every ``op_interval`` nanoseconds on average."""
+
+    ops_per_client: int
+    op_interval: int
+    vertices: int
+
+
+@dataclass
+class ReplicaStats:
+    """What a replica exchanged with the server, its side of the links, and
+    the largest number of operations it retained"""
+
+    ops_sent: int = 0
+    ops_received: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    peak_retained_ops: int = 0
+
+
+@dataclass
+class SimulationReport:
+    """Outcome of a simulation: the virtual time between the last local
+    operation and the agreement of all replicas, and the stats of each client
+    and of the server"""
+
+    convergence_time: int
+    clients: List[ReplicaStats]
+    server: ReplicaStats = field(default_factory=ReplicaStats)
+
+
+class _Scheduler:
+    """Events in virtual time, executed in order"""
+
+    def __init__(self) -> None:
+        self.now = 0
+        self._events: List[Tuple[int, int, Callable[[], None]]] = []
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def at(self, time: int, action: Callable[[], None]) -> None:
+        """Schedule ``action`` at ``time``, or now if it is past."""
+        heapq.heappush(
+            self._events, (max(time, self.now), next(self._sequence), action)
+        )
+
+    def step(self) -> None:
+        """Execute the next event."""
+        self.now, _, action = heapq.heappop(self._events)
+        action()
+
+
+class _Link:
+    """One direction of the link to a client"""
+
+    def __init__(
+        self,
+        simulation: Simulation,
+        outages: Sequence[Outage],
+        deliver: Callable[[OpBatch[int]], None],
+        stats: Tuple[ReplicaStats, ReplicaStats],
+    ) -> None:
+        self.simulation = simulation
+        self.outages = sorted(outages, key=lambda outage: outage.start)
+        self.deliver = deliver
+        self.sender_stats, self.receiver_stats = stats
+        self._last_arrival = 0
+
+    def _connected_at(self, time: int) -> int:
+        """The earliest time from ``time`` at which the client is connected"""
+        for outage in self.outages:
+            if outage.start <= time < outage.end:
+                time = outage.end
+        return time
+
+    def send(self, batch: OpBatch[int]) -> None:
+        """Schedule the delivery of ``batch``, after its transmissions."""
+        simulation = self.simulation
+        model, rng = simulation.link, simulation.rng
+        size = batch_size(batch)
+        time = self._connected_at(simulation.scheduler.now)
+        transmissions = 1
+        while rng.random() < model.loss:
+            time = self._connected_at(time + model.retransmit_timeout)
+            transmissions += 1
+        arrival = time + model.delay + rng.randint(0, model.jitter)
+        if model.fifo:
+            arrival = self._last_arrival = max(arrival, self._last_arrival)
+        self.sender_stats.ops_sent += len(batch)
+        self.sender_stats.bytes_sent += transmissions * size
+        self.receiver_stats.ops_received += len(batch)
+        self.receiver_stats.bytes_received += size
+        simulation.scheduler.at(arrival, lambda: self.deliver(batch))
+
+
+class _ClientEnd(LWWGraphClient[int]):
+    """Stands for a client at the server, sending it batches over its link"""
+
+    def __init__(self, link: _Link, client: LWWGraphClient[int]) -> None:
+        self.link = link
+        self.graph = client.graph
+
+    def update(self, ops: Iterable[LWWGraphOperation[int]]) -> None:
+        batch = ops if isinstance(ops, OpBatch) else OpBatch(ops=list(ops))
+        self.link.send(batch)
+
+
+class _ServerEnd(LWWGraphServer[int]):
+    """Stands for the server at a client, sending it batches over the link"""
+
+    def __init__(self, simulation: Simulation, uplink: _Link, downlink: _Link) -> None:
+        self.simulation = simulation
+        self.uplink = uplink
+        self.downlink = downlink
+        self.graph = simulation.server.graph
+        self.clients: List[LWWGraphClient[int]] = []
+        self.client_end: Optional[_ClientEnd] = None
+
+    def register_client(
+        self, c: LWWGraphClient, interest: Optional[Interest[int]] = None
+    ) -> None:
+        self.client_end = _ClientEnd(self.downlink, c)  # type: ignore
+        self.simulation.server.register_client(self.client_end, interest)
+
+    def set_interest(
+        self, c: LWWGraphClient, interest: Optional[Interest[int]]
+    ) -> None:
+        self.simulation.server.set_interest(self.client_end, interest)  # type: ignore
+
+    def update(self, ops: Iterable[LWWGraphOperation[int]]) -> None:
+        batch = ops if isinstance(ops, OpBatch) else OpBatch(ops=list(ops))
+        self.uplink.send(dataclasses.replace(batch, sender=self.client_end))
+
+
+def _log_graph(clock: Clock) -> LWWGraph[int]:
+    return LogLWWGraph(clock=clock)
+
+
+def _retained_ops(graph: LWWGraph[int]) -> int:
+    return len(getattr(graph, "operations", ()))
+
+
+class Simulation:
+    """Clients collaborating on a graph through a server, over simulated
+    links, in virtual time. Clients make their operations at random moments,
+    and all replicas tick (see LocalLWWGraphClient) every
+    ``tick_interval``."""
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        n_clients: int,
+        link: LinkModel,
+        workload: Workload,
+        outages: Iterable[Outage] = (),
+        heartbeat_interval: int = 10**9,
+        tick_interval: int = 10**8,
+        flush_interval: Optional[int] = None,
+        frontier_interval: Optional[int] = None,
+        graph_factory: GraphFactory = _log_graph,
+        seed: int = 0,
+    ) -> None:
+        """Set up a server and connected clients, at virtual time 0.
+
+        Params
+            n_clients: number of clients
+            link: model of the links between the server and the clients
+            workload: the operations made by each client
+            outages: disconnections of the clients
+            heartbeat_interval: see LocalLWWGraphClient and
+                LocalLWWGraphServer, in nanoseconds
+            tick_interval: time between two ticks of each replica
+            flush_interval: see LocalLWWGraphClient
+            frontier_interval: see LocalLWWGraphServer
+            graph_factory: makes the graph of each replica, given its clock
+            seed: seed of all random choices
+        """
+        outages = list(outages)
+        if not link.fifo and frontier_interval is not None:
+            raise SimulationError("The stability frontier requires FIFO links")
+        if link.loss >= 1:
+            raise SimulationError("Links must deliver some transmissions")
+        self.link = link
+        self.workload = workload
+        self.tick_interval = tick_interval
+        self.rng = random.Random(seed)
+        self.scheduler = _Scheduler()
+        self.server_clock = MockMonotonicClock(0)
+        self.server_clock.step_size = 0
+        self.server: LocalLWWGraphServer[int] = LocalLWWGraphServer(
+            graph_factory(self.server_clock),
+            self.server_clock,
+            heartbeat_interval,
+            frontier_interval,
+        )
+        self.server_stats = ReplicaStats()
+        self.clients: List[LocalLWWGraphClient[int]] = []
+        self.client_stats: List[ReplicaStats] = []
+        self._local_clocks: List[Tuple[MockMonotonicClock, int]] = []
+        for _ in range(n_clients):
+            # Client clocks start at random offsets from the global time
+            offset = self.rng.randrange(10**9)
+            local = MockMonotonicClock(offset)
+            local.step_size = 0
+            self._local_clocks.append((local, offset))
+            clock = SyncedClock(local)
+            client = LocalLWWGraphClient(
+                graph_factory(clock),
+                clock,
+                heartbeat_interval,
+                flush_interval=flush_interval,
+            )
+            self._connect(client, outages)
+        self._writes_end = 0
+        self._pending_writes = 0
+
+    def _connect(
+        self, client: LocalLWWGraphClient[int], outages: Sequence[Outage]
+    ) -> None:
+        """Connect ``client`` to the server through simulated links, with the
+        outages of its index."""
+        index = len(self.clients)
+        outages = [outage for outage in outages if outage.client == index]
+        stats = ReplicaStats()
+        uplink = _Link(self, outages, self.server.update, (stats, self.server_stats))
+        downlink = _Link(self, outages, client.update, (self.server_stats, stats))
+        client.connect(_ServerEnd(self, uplink, downlink))
+        self.clients.append(client)
+        self.client_stats.append(stats)
+
+    def _sync_clocks(self) -> None:
+        now = self.scheduler.now
+        self.server_clock.next_tick = max(now, self.server_clock.now)
+        for local, offset in self._local_clocks:
+            local.next_tick = max(now + offset, local.now)
+
+    def _at(self, time: int, action: Callable[[], None]) -> None:
+        """Schedule ``action``, with the clocks of the replicas at its time"""
+
+        def run() -> None:
+            self._sync_clocks()
+            action()
+
+        self.scheduler.at(time, run)
+
+    def _random_op(self, client: LocalLWWGraphClient[int]) -> None:
+        self._pending_writes -= 1
+        vertices = self.workload.vertices
+        a, b = self.rng.randrange(vertices), self.rng.randrange(vertices)
+        action = self.rng.choice(
+            [
+                lambda: client.add_vertex(a),
+                lambda: client.add_vertex(a),
+                lambda: client.add_edge(FrozenEdge(a, b)),
+                lambda: client.add_edge(FrozenEdge(a, b)),
+                lambda: client.remove_edge(FrozenEdge(a, b)),
+                lambda: client.remove_vertex(a),
+            ]
+        )
+        action()
+
+    def _schedule_workload(self) -> None:
+        interval = self.workload.op_interval
+        for client in self.clients:
+            time = 0
+            for _ in range(self.workload.ops_per_client):
+                time += self.rng.randint(interval // 2, interval * 3 // 2)
+                self._at(time, functools.partial(self._random_op, client))
+            self._writes_end = max(self._writes_end, time)
+        self._pending_writes = self.workload.ops_per_client * len(self.clients)
+
+    def _tick(self) -> None:
+        for client, stats in zip(self.clients, self.client_stats):
+            client.tick()
+            stats.peak_retained_ops = max(
+                stats.peak_retained_ops, _retained_ops(client.graph)
+            )
+        self.server.tick()
+        self.server_stats.peak_retained_ops = max(
+            self.server_stats.peak_retained_ops, _retained_ops(self.server.graph)
+        )
+        self._at(self.scheduler.now + self.tick_interval, self._tick)
+
+    def _agreed(self) -> bool:
+        """Whether all replicas hold the same vertices and edges"""
+        reference = self.server.graph
+        vertices, edges = set(reference.vertices), set(reference.edges)
+        return all(
+            set(client.graph.vertices) == vertices and set(client.graph.edges) == edges
+            for client in self.clients
+        )
+
+    def _check_components(self) -> None:
+        def canonical(graph: LWWGraph[int]) -> List[List[int]]:
+            return sorted(sorted(component) for component in graph.components)
+
+        expected = canonical(self.server.graph)
+        for index, client in enumerate(self.clients):
+            if canonical(client.graph) != expected:
+                raise SimulationError(f"Client {index} has different components")
+
+    def run(self, timeout: int) -> SimulationReport:
+        """Run the workload, then the replicas until they agree, and return
+        the report. Raise a SimulationError if they don't agree ``timeout``
+        nanoseconds after the last local operation."""
+        self._schedule_workload()
+        self._at(self.tick_interval, self._tick)
+        deadline = self._writes_end + timeout
+        scheduler = self.scheduler
+        while scheduler.now <= deadline:
+            scheduler.step()
+            if not self._pending_writes and self._agreed():
+                self._check_components()
+                return SimulationReport(
+                    convergence_time=scheduler.now - self._writes_end,
+                    clients=self.client_stats,
+                    server=self.server_stats,
+                )
+        raise SimulationError(f"The replicas did not agree within {timeout} ns")
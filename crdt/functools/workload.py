@@ -0,0 +1,107 @@
+"""Online tracking of the workload of a replica, to choose the representation
+of its state that suits it"""
+import logging
+from dataclasses import dataclass
+from typing import List, Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+# A log resolves operations when the state is read, an index when they are
+# written
+Representation = Literal["log", "indexed"]
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A change of representation, and the window of calls motivating it"""
+
+    source: Representation
+    target: Representation
+    reads: int
+    writes: int
+    # Number of operations held by the state when migrating
+    size: int
+
+
+class WorkloadMonitor:
+    """Counts the reads and the written operations over windows of calls, and
+    decides at the end of each window whether the state should be migrated:
+    to an index when the reads are at least ``read_ratio`` times the writes,
+    to a log when the writes are at least ``write_ratio`` times the reads. The
+    gap between both ratios keeps a mixed workload from migrating back and
+    forth.
+
+    A migration costs time proportional to the size of the state, so it is
+    only decided once as many operations were read or written since the
+    previous one as it moved: a migration then moves at most twice the
+    operations read or written since the previous one."""
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        representation: Representation = "log",
+        window: int = 100,
+        read_ratio: float = 1.0,
+        write_ratio: float = 10.0,
+    ) -> None:
+        """Initialize a monitor of an empty state.
+
+        Params
+            representation: the initial representation of the state
+            window: number of read and written operations per decision
+            read_ratio: reads per write from which a log migrates to an index
+            write_ratio: writes per read from which an index migrates to a log
+        """
+        self.representation: Representation = representation
+        self.window = window
+        self.read_ratio = read_ratio
+        self.write_ratio = write_ratio
+        self.reads = 0
+        self.writes = 0
+        # Upper bound of the number of operations held by the state
+        self.size = 0
+        self._since_migration = 0
+        self._moved = 0
+        self.migrations: List[Migration] = []
+
+    def _target(self) -> Optional[Representation]:
+        if self.representation == "log":
+            if self.reads >= self.read_ratio * self.writes:
+                return "indexed"
+        elif self.writes >= self.write_ratio * self.reads:
+            return "log"
+        return None
+
+    def observe(self, reads: int = 0, writes: int = 0) -> Optional[Migration]:
+        """Count a call, and return the migration to perform before serving
+        it, if any, which the caller must report with ``migrated``."""
+        self.reads += reads
+        self.writes += writes
+        self.size += writes
+        self._since_migration += reads + writes
+        if self.reads + self.writes < self.window:
+            return None
+        target = self._target()
+        migration = None
+        if target is not None and self._since_migration >= self._moved:
+            migration = Migration(
+                self.representation, target, self.reads, self.writes, self.size
+            )
+            logger.info(
+                "Migrating from %s to %s after %d reads and %d writes, "
+                "with up to %d operations",
+                migration.source,
+                migration.target,
+                migration.reads,
+                migration.writes,
+                migration.size,
+            )
+            self.migrations.append(migration)
+            self.representation = target
+            self._since_migration = 0
+        self.reads = self.writes = 0
+        return migration
+
+    def migrated(self, size: int) -> None:
+        """Record that the last migration moved ``size`` operations."""
+        self.size = self._moved = size
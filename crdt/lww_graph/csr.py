@@ -0,0 +1,166 @@
+"""Export of graphs in compressed sparse row (CSR) format, the input of most
+numerical graph libraries (scipy.sparse, networkit, graph neural networks...).
+Vertices are numbered from 0, and the neighbors of vertex ``i`` are the
+vertices ``indices[indptr[i]:indptr[i + 1]]``, in increasing order.
+
+Rebuilding the arrays of a large graph after each write costs time
+proportional to its size in Python code. A ``CSRExporter`` instead follows the
+changes of a graph, and refreshes the arrays by copying the rows that didn't
+change with vectorized numpy operations, only building the others in Python.
+Requires numpy."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import AbstractSet, Callable, Dict, Generic, List, Mapping, Optional, Set
+
+import numpy as np
+
+from crdt.lww_graph.feed import GraphChanges
+from crdt.lww_graph.interface import LWWGraphError, ObservableLWWGraph, T
+
+INDEX_DTYPE = np.int64
+
+
+@dataclass(frozen=True, eq=False)
+class CSR(Generic[T]):
+    """Adjacency of a graph in compressed sparse row format. Each undirected
+    edge appears in the rows of both its vertices."""
+
+    vertices: List[T]
+    ids: Dict[T, int]
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.vertices)
+
+    def degrees(self) -> np.ndarray:
+        """The degree of each vertex, by id"""
+        return np.diff(self.indptr)
+
+    def neighbors(self, vertex: T) -> List[T]:
+        """The neighbors of ``vertex``, which must be in the graph"""
+        i = self.ids[vertex]
+        row = self.indices[self.indptr[i] : self.indptr[i + 1]]
+        return [self.vertices[j] for j in row]
+
+
+def _row(ids: Mapping[T, int], neighbors: AbstractSet[T]) -> List[int]:
+    return sorted(ids[n] for n in neighbors)
+
+
+def build_csr(adjacency: Mapping[T, AbstractSet[T]]) -> CSR[T]:
+    """Build the CSR arrays of the graph of ``adjacency``, which maps each
+    vertex to its neighbors."""
+    vertices = list(adjacency)
+    ids = {v: i for i, v in enumerate(vertices)}
+    indptr = np.zeros(len(vertices) + 1, dtype=INDEX_DTYPE)
+    indices: List[int] = []
+    for i, vertex in enumerate(vertices):
+        indices.extend(_row(ids, adjacency[vertex]))
+        indptr[i + 1] = len(indices)
+    return CSR(vertices, ids, indptr, np.array(indices, dtype=INDEX_DTYPE))
+
+
+def _copy_clean_rows(
+    previous: CSR[T], indptr: np.ndarray, dirty: np.ndarray, indices: np.ndarray
+) -> None:
+    """Copy the rows of ``previous`` that aren't ``dirty`` into ``indices``,
+    shifting each entry by the move of the start of its row."""
+    count = len(previous.vertices)
+    row_of = np.repeat(np.arange(count, dtype=INDEX_DTYPE), np.diff(previous.indptr))
+    kept = ~dirty[row_of]
+    positions = np.arange(len(previous.indices), dtype=INDEX_DTYPE)
+    positions += (indptr[:count] - previous.indptr[:count])[row_of]
+    indices[positions[kept]] = previous.indices[kept]
+
+
+def update_csr(previous: CSR[T], rows: Mapping[T, AbstractSet[T]]) -> CSR[T]:
+    """Return ``previous`` with the rows of ``rows`` replaced by the given
+    neighbors, appending the vertices it lacks. The other rows are copied
+    without any Python-level iteration, and ids don't change. ``previous`` is
+    left unchanged."""
+    vertices = list(previous.vertices)
+    ids = dict(previous.ids)
+    for vertex in rows:
+        if vertex not in ids:
+            ids[vertex] = len(vertices)
+            vertices.append(vertex)
+    for neighbors in rows.values():
+        for neighbor in neighbors:
+            if neighbor not in ids:
+                raise LWWGraphError(f"Neighbor {neighbor!r} has no row")
+    lengths = np.zeros(len(vertices), dtype=INDEX_DTYPE)
+    lengths[: len(previous.vertices)] = np.diff(previous.indptr)
+    dirty = np.zeros(len(vertices), dtype=bool)
+    for vertex, neighbors in rows.items():
+        lengths[ids[vertex]] = len(neighbors)
+        dirty[ids[vertex]] = True
+    indptr = np.zeros(len(vertices) + 1, dtype=INDEX_DTYPE)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = np.empty(indptr[-1], dtype=INDEX_DTYPE)
+    _copy_clean_rows(previous, indptr, dirty, indices)
+    for vertex, neighbors in rows.items():
+        i = ids[vertex]
+        indices[indptr[i] : indptr[i + 1]] = _row(ids, neighbors)
+    return CSR(vertices, ids, indptr, indices)
+
+
+class CSRExporter(Generic[T]):
+    """Keeps the CSR export of an observable graph up to date. Refreshing it
+    after a few changes only rebuilds the rows of the vertices they touched,
+    whereas the removal of a vertex, which would leave a hole in the ids, or
+    the change of more than ``rebuild_fraction`` of the rows, triggers a full
+    rebuild. Like the graph, an exporter is not thread safe."""
+
+    def __init__(
+        self, graph: ObservableLWWGraph[T], rebuild_fraction: float = 0.1
+    ) -> None:
+        """Initialize an exporter, which follows the graph until closed.
+
+        Params
+            graph: the graph to export
+            rebuild_fraction: the fraction of changed rows above which the
+                arrays are rebuilt from scratch
+        """
+        self.graph = graph
+        self.rebuild_fraction = rebuild_fraction
+        self._csr: Optional[CSR[T]] = None
+        self._dirty: Set[T] = set()
+        self._unsubscribe: Callable[[], None] = graph.subscribe(self._track)
+        self.rebuilds = 0
+
+    def _track(self, changes: GraphChanges[T]) -> None:
+        if self._csr is None:
+            return
+        self._dirty.update(changes.vertices_added)
+        self._dirty.update(changes.vertices_removed)
+        for edge in changes.edges_added + changes.edges_removed:
+            self._dirty.update(edge.vertices)
+
+    def refresh(self) -> CSR[T]:
+        """Return the CSR export of the current state of the graph."""
+        # Operations held back from the feed may change rows. Once published,
+        # reading the graph can't publish further changes until the next write.
+        self.graph.catch_up()
+        previous = self._csr
+        dirty, self._dirty = self._dirty, set()
+        if previous is not None and not dirty:
+            return previous
+        graph = self.graph
+        if (
+            previous is None
+            or len(dirty) > self.rebuild_fraction * len(previous)
+            or any(vertex not in graph for vertex in dirty)
+        ):
+            self.rebuilds += 1
+            self._csr = graph.to_csr()
+        else:
+            self._csr = update_csr(previous, {v: graph.neighbors(v) for v in dirty})
+        return self._csr
+
+    def close(self) -> None:
+        """Stop following the changes of the graph."""
+        self._unsubscribe()
+        self._csr = None
+        self._dirty.clear()
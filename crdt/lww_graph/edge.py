@@ -16,10 +16,18 @@ T = TypeVar("T", covariant=True)
 _HASH_BITS: Final[int] = 64
 
 
+def _edge_hash(ha: int, hb: int) -> int:
+    if hb > ha:
+        ha, hb = hb, ha
+    return (ha << (_HASH_BITS // 2) ^ hb) & (2**_HASH_BITS - 1)
+
+
 class Edge(Generic[T]):
     """This abstract class defines equality and a hash function on undirected
     edges"""
 
+    __slots__ = ()
+
     @property
     @abstractmethod
     def vertices(self) -> Tuple[T, T]:
@@ -32,10 +40,7 @@ class Edge(Generic[T]):
 
     def __hash__(self) -> int:
         a, b = self.vertices
-        ha, hb = hash(a), hash(b)
-        if hb > ha:
-            ha, hb = hb, ha
-        return (ha << (_HASH_BITS // 2) ^ hb) & (2 ** _HASH_BITS - 1)
+        return _edge_hash(hash(a), hash(b))
 
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, Edge):
@@ -105,3 +110,57 @@ class FrozenEdge(Edge[T]):
     __eq__ = Edge.__eq__
     __str__ = Edge.__str__
     __repr__ = Edge.__str__
+
+
+class SlotEdge(Edge[T]):
+    """Compact edge implementation, used by the graph implementations as key of
+    their internal sets and mappings. The vertex with the greatest hash comes
+    first, the hash is computed once, and comparing two SlotEdges mostly
+    compares their hashes. It is equal to the other edge types, and shares
+    their hash, so it can be looked up with any edge. It isn't serializable:
+    graphs return and publish their edges as BaseEdges."""
+
+    __slots__ = ("a", "b", "_hash")
+
+    def __init__(self, a: T, b: T) -> None:
+        ha, hb = hash(a), hash(b)
+        if hb > ha:
+            a, b = b, a
+        self.a: Final[T] = a
+        self.b: Final[T] = b
+        self._hash: Final[int] = _edge_hash(ha, hb)
+
+    @property
+    def vertices(self) -> Tuple[T, T]:
+        return self.a, self.b
+
+    def __contains__(self, item: Any) -> bool:
+        """Check whether the argument is one of the vertices that form this
+        edge."""
+        # pylint: disable=consider-using-in
+        return item == self.a or item == self.b
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, SlotEdge):
+            return self._hash == other._hash and (
+                (self.a == other.a and self.b == other.b)
+                or (self.a == other.b and self.b == other.a)
+            )
+        return Edge.__eq__(self, other)
+
+    @classmethod
+    def from_edge(cls, edge: Edge[T]) -> SlotEdge[T]:
+        if isinstance(edge, SlotEdge):
+            return edge
+        return SlotEdge(*edge.vertices)
+
+    def to_base_edge(self) -> BaseEdge[T]:
+        return BaseEdge(a=self.a, b=self.b)
+
+    __str__ = Edge.__str__
+    __repr__ = Edge.__str__
@@ -0,0 +1,142 @@
+"""Change feeds let observers of a graph receive the vertices and edges added
+and removed by each batch of applied operations, instead of diffing the whole
+graph after each update."""
+# pylint: disable=too-few-public-methods
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Tuple,
+    TypeVar,
+)
+
+from crdt.lww_graph.edge import BaseEdge, Edge
+
+T = TypeVar("T")
+K = TypeVar("K")
+
+ChangesCallback = Callable[["GraphChanges[T]"], None]
+
+
+@dataclass
+class GraphChanges(Generic[T]):
+    """Vertices and edges that appeared in or disappeared from a graph"""
+
+    vertices_added: List[T] = field(default_factory=list)
+    vertices_removed: List[T] = field(default_factory=list)
+    edges_added: List[Edge[T]] = field(default_factory=list)
+    edges_removed: List[Edge[T]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.vertices_added
+            or self.vertices_removed
+            or self.edges_added
+            or self.edges_removed
+        )
+
+    @classmethod
+    def diff(
+        cls,
+        vertices_before: Iterable[T],
+        edges_before: Iterable[Edge[T]],
+        vertices_after: Iterable[T],
+        edges_after: Iterable[Edge[T]],
+    ) -> GraphChanges[T]:
+        """Compare two states of a graph"""
+        vb, va = set(vertices_before), set(vertices_after)
+        eb, ea = set(edges_before), set(edges_after)
+        return GraphChanges(
+            vertices_added=list(va - vb),
+            vertices_removed=list(vb - va),
+            edges_added=list(ea - eb),
+            edges_removed=list(eb - ea),
+        )
+
+    @classmethod
+    def net(cls, sequence: Iterable[GraphChanges[T]]) -> GraphChanges[T]:
+        """Summarize a sequence of changes into their net effect, in time
+        proportional to the number of changes."""
+        vertices: Dict[T, Tuple[bool, bool]] = {}
+        edges: Dict[Edge[T], Tuple[bool, bool]] = {}
+        for changes in sequence:
+            _record_toggles(vertices, changes.vertices_added, True)
+            _record_toggles(vertices, changes.vertices_removed, False)
+            _record_toggles(edges, changes.edges_added, True)
+            _record_toggles(edges, changes.edges_removed, False)
+        # Additions and removals of an element alternate, so an element changed
+        # iff its first and last toggles go in the same direction.
+        return GraphChanges(
+            vertices_added=[v for v, t in vertices.items() if t == (True, True)],
+            vertices_removed=[v for v, t in vertices.items() if t == (False, False)],
+            edges_added=[e for e, t in edges.items() if t == (True, True)],
+            edges_removed=[e for e, t in edges.items() if t == (False, False)],
+        )
+
+
+def _record_toggles(
+    toggles: Dict[K, Tuple[bool, bool]], elements: Iterable[K], added: bool
+) -> None:
+    """Track the first and last toggle direction of each element"""
+    for element in elements:
+        first, _ = toggles.get(element, (added, added))
+        toggles[element] = (first, added)
+
+
+class ChangeFeed(Generic[T]):
+    """Dispatches graph changes to the subscribed callbacks and asynchronous
+    iterators. A feed is truthy when it has subscribers, which lets graphs skip
+    computing changes that nobody observes."""
+
+    def __init__(self) -> None:
+        self._callbacks: List[ChangesCallback] = []
+
+    def __bool__(self) -> bool:
+        return bool(self._callbacks)
+
+    def subscribe(self, callback: ChangesCallback) -> Callable[[], None]:
+        """Call ``callback`` with each non-empty batch of changes. Return a
+        function that cancels the subscription."""
+        self._callbacks.append(callback)
+
+        def unsubscribe() -> None:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+        return unsubscribe
+
+    async def changes(self) -> AsyncIterator[GraphChanges[T]]:
+        """Asynchronously iterate over the batches of changes published after
+        the iteration started. Publications may come from any thread."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[GraphChanges[T]] = asyncio.Queue()
+
+        def enqueue(changes: GraphChanges[T]) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, changes)
+
+        unsubscribe = self.subscribe(enqueue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            unsubscribe()
+
+    def publish(self, changes: GraphChanges[T]) -> None:
+        """Dispatch ``changes`` to all subscribers, unless it is empty. Their
+        edges are dispatched as BaseEdges, whichever edges the graph holds."""
+        if changes:
+            changes = GraphChanges(
+                vertices_added=changes.vertices_added,
+                vertices_removed=changes.vertices_removed,
+                edges_added=[BaseEdge.from_edge(e) for e in changes.edges_added],
+                edges_removed=[BaseEdge.from_edge(e) for e in changes.edges_removed],
+            )
+            for callback in list(self._callbacks):
+                callback(changes)
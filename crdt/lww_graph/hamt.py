@@ -0,0 +1,274 @@
+"""Persistent hash array mapped tries (HAMT), the maps and sets of the
+persistent graph engine. A trie is never modified: updating it returns a new
+trie sharing all the nodes of the old one but those on the path to the updated
+key, of which there are O(log32 n). Old versions thus remain valid for free,
+and are reclaimed when the last reference to them is dropped.
+
+Each node of the trie maps 5 bits of the key hash to its children, of which it
+only stores those present, indexed by a bitmap. Keys with the same full hash
+share a collision node at the bottom of the trie."""
+# pylint: disable=too-few-public-methods
+from __future__ import annotations
+
+from typing import (
+    AbstractSet,
+    Any,
+    Generic,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_MASK = (1 << 64) - 1
+_MISSING = object()
+
+
+def _hash(key: object) -> int:
+    return hash(key) & _HASH_MASK
+
+
+def _bit(hash_: int, shift: int) -> int:
+    return 1 << ((hash_ >> shift) & _MASK)
+
+
+def _index(bitmap: int, bit: int) -> int:
+    return bin(bitmap & (bit - 1)).count("1")
+
+
+class _Leaf:
+    __slots__ = ("hash", "key", "value")
+
+    def __init__(self, hash_: int, key: object, value: object) -> None:
+        self.hash = hash_
+        self.key = key
+        self.value = value
+
+
+class _Collision:
+    """Leaves whose keys have the same full hash"""
+
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, hash_: int, leaves: Tuple[_Leaf, ...]) -> None:
+        self.hash = hash_
+        self.leaves = leaves
+
+
+class _Branch:
+    __slots__ = ("bitmap", "children")
+
+    def __init__(self, bitmap: int, children: Tuple[_Node, ...]) -> None:
+        self.bitmap = bitmap
+        self.children = children
+
+
+_Node = Union[_Leaf, _Collision, _Branch]
+
+
+def _join(first: Union[_Leaf, _Collision], second: _Leaf, shift: int) -> _Node:
+    """Return the node holding two leaves or collisions found at the same
+    position of the trie."""
+    if first.hash == second.hash:
+        leaves = first.leaves if isinstance(first, _Collision) else (first,)
+        return _Collision(first.hash, leaves + (second,))
+    first_bit, second_bit = _bit(first.hash, shift), _bit(second.hash, shift)
+    if first_bit == second_bit:
+        return _Branch(first_bit, (_join(first, second, shift + _BITS),))
+    children = (first, second) if first_bit < second_bit else (second, first)
+    return _Branch(first_bit | second_bit, children)
+
+
+def _assoc(node: _Branch, shift: int, leaf: _Leaf) -> Tuple[_Branch, bool]:
+    """Return ``node`` with ``leaf`` set, and whether its key is new."""
+    bit = 1 << ((leaf.hash >> shift) & _MASK)
+    index = bin(node.bitmap & (bit - 1)).count("1")
+    children = node.children
+    if not node.bitmap & bit:
+        new_children = children[:index] + (leaf,) + children[index:]
+        return _Branch(node.bitmap | bit, new_children), True
+    child = children[index]
+    added = True
+    new_child: _Node
+    if isinstance(child, _Branch):
+        new_child, added = _assoc(child, shift + _BITS, leaf)
+    elif isinstance(child, _Leaf) and child.key == leaf.key:
+        new_child, added = leaf, False
+    elif isinstance(child, _Collision) and child.hash == leaf.hash:
+        others = tuple(other for other in child.leaves if other.key != leaf.key)
+        added = len(others) == len(child.leaves)
+        new_child = _Collision(child.hash, others + (leaf,))
+    else:
+        new_child = _join(child, leaf, shift + _BITS)
+    new_children = children[:index] + (new_child,) + children[index + 1 :]
+    return _Branch(node.bitmap, new_children), added
+
+
+def _dissoc(node: _Branch, shift: int, hash_: int, key: object) -> Optional[_Node]:
+    """Return ``node`` without ``key``, which must be in it: None if it becomes
+    empty, or its only child if that is not a branch."""
+    bit = _bit(hash_, shift)
+    index = _index(node.bitmap, bit)
+    child = node.children[index]
+    new_child: Optional[_Node]
+    if isinstance(child, _Branch):
+        new_child = _dissoc(child, shift + _BITS, hash_, key)
+    elif isinstance(child, _Collision):
+        others = tuple(leaf for leaf in child.leaves if leaf.key != key)
+        new_child = others[0] if len(others) == 1 else _Collision(hash_, others)
+    else:
+        new_child = None
+    if new_child is None:
+        children = node.children[:index] + node.children[index + 1 :]
+        if not children:
+            return None
+        if len(children) == 1 and not isinstance(children[0], _Branch):
+            return children[0]
+        return _Branch(node.bitmap & ~bit, children)
+    if len(node.children) == 1 and not isinstance(new_child, _Branch):
+        return new_child
+    children = node.children[:index] + (new_child,) + node.children[index + 1 :]
+    return _Branch(node.bitmap, children)
+
+
+def _leaves(node: _Node) -> Iterator[_Leaf]:
+    if isinstance(node, _Leaf):
+        yield node
+    elif isinstance(node, _Collision):
+        yield from node.leaves
+    else:
+        for child in node.children:
+            yield from _leaves(child)
+
+
+_EMPTY_ROOT = _Branch(0, ())
+
+
+class HAMT(Mapping[K, V]):
+    """Persistent map. ``set`` and ``delete`` return updated copies in
+    O(log n) time and space, leaving the map itself unchanged."""
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, items: Iterable[Tuple[K, V]] = ()) -> None:
+        """Initialize a map, empty by default.
+
+        Params
+            items: the key-value pairs of the map
+        """
+        self._root = _EMPTY_ROOT
+        self._size = 0
+        for key, value in items:
+            self._root, added = _assoc(self._root, 0, _Leaf(_hash(key), key, value))
+            self._size += added
+
+    @classmethod
+    def _make(cls, root: _Branch, size: int) -> HAMT[K, V]:
+        trie: HAMT[K, V] = cls.__new__(cls)
+        trie._root = root  # pylint: disable=protected-access
+        trie._size = size  # pylint: disable=protected-access
+        return trie
+
+    def _find(self, key: object) -> object:
+        hash_ = hash(key) & _HASH_MASK
+        node: _Node = self._root
+        shift = 0
+        while type(node) is _Branch:  # pylint: disable=unidiomatic-typecheck
+            bitmap = node.bitmap
+            bit = 1 << ((hash_ >> shift) & _MASK)
+            if not bitmap & bit:
+                return _MISSING
+            node = node.children[bin(bitmap & (bit - 1)).count("1")]
+            shift += _BITS
+        leaves = node.leaves if isinstance(node, _Collision) else (cast(_Leaf, node),)
+        for leaf in leaves:
+            if leaf.hash == hash_ and leaf.key == key:
+                return leaf.value
+        return _MISSING
+
+    def __getitem__(self, key: K) -> V:
+        value = self._find(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return cast(V, value)
+
+    def get(self, key: K, default: Any = None) -> Any:
+        value = self._find(key)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: object) -> bool:
+        return self._find(key) is not _MISSING
+
+    def __iter__(self) -> Iterator[K]:
+        return (cast(K, leaf.key) for leaf in _leaves(self._root))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def set(self, key: K, value: V) -> HAMT[K, V]:
+        """Return a copy of the map with ``key`` mapped to ``value``."""
+        root, added = _assoc(self._root, 0, _Leaf(_hash(key), key, value))
+        return self._make(root, self._size + added)
+
+    def delete(self, key: K) -> HAMT[K, V]:
+        """Return a copy of the map without ``key``, or the map itself if it
+        doesn't hold it."""
+        if key not in self:
+            return self
+        root = _dissoc(self._root, 0, _hash(key), key)
+        if root is None:
+            root = _EMPTY_ROOT
+        elif not isinstance(root, _Branch):
+            root = _Branch(_bit(root.hash, 0), (root,))
+        return self._make(root, self._size - 1)
+
+
+class PSet(AbstractSet[K], Generic[K]):
+    """Persistent set, a HAMT mapping its elements to None"""
+
+    __slots__ = ("_trie",)
+
+    def __init__(self, elements: Iterable[K] = ()) -> None:
+        """Initialize a set, empty by default.
+
+        Params
+            elements: the elements of the set
+        """
+        self._trie: HAMT[K, None] = HAMT((element, None) for element in elements)
+
+    @classmethod
+    def _wrap(cls, trie: HAMT[K, None]) -> PSet[K]:
+        pset: PSet[K] = cls.__new__(cls)
+        pset._trie = trie  # pylint: disable=protected-access
+        return pset
+
+    def __contains__(self, element: object) -> bool:
+        return element in self._trie
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._trie)
+
+    def __len__(self) -> int:
+        return len(self._trie)
+
+    def __repr__(self) -> str:
+        return f"PSet({list(self)!r})"
+
+    def add(self, element: K) -> PSet[K]:
+        """Return a copy of the set with ``element``."""
+        return self._wrap(self._trie.set(element, None))
+
+    def discard(self, element: K) -> PSet[K]:
+        """Return a copy of the set without ``element``."""
+        if element not in self._trie:
+            return self
+        return self._wrap(self._trie.delete(element))
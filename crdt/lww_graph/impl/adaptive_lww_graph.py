@@ -0,0 +1,165 @@
+"""LWW-element-graph switching at runtime between the engine that resolves a
+log when it is read, and the one that resolves each operation when it is
+written, according to the workload"""
+# pylint: disable=duplicate-code
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Set, Union
+
+from crdt.clock.interface import Clock
+from crdt.functools.workload import Migration, Representation, WorkloadMonitor
+from crdt.lww_graph.edge import Edge
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.impl.persistent_lww_graph import PersistentLWWGraph
+from crdt.lww_graph.interface import LWWGraph, T
+from crdt.lww_graph.operation import LWWGraphOperation
+
+if TYPE_CHECKING:
+    from crdt.lww_graph.csr import CSR
+    from crdt.lww_graph.loader import BulkGraph
+
+
+class AdaptiveLWWGraph(LWWGraph[T]):
+    """Holds its state in a LogLWWGraph while operations are mostly written,
+    as in bulk loads, where appending to the log is cheapest, and in a
+    PersistentLWWGraph while they are mostly read between writes, where the
+    log would resolve its pending operations on each read, and replay all of
+    them after each late one. A WorkloadMonitor decides when to migrate, which
+    applies the operations of one engine to the other one: no operation is
+    lost, and both engines resolve them the same way whatever their order.
+
+    Decisions are logged, and kept in ``migrations``."""
+
+    def __init__(
+        self,
+        clock: Clock,
+        window: int = 100,
+        read_ratio: float = 1.0,
+        write_ratio: float = 10.0,
+    ) -> None:
+        """Initialize an empty graph, held in a log.
+
+        Params
+            clock: clock used to timestamp local operations
+            window: see WorkloadMonitor
+            read_ratio: see WorkloadMonitor
+            write_ratio: see WorkloadMonitor
+        """
+        self.clock = clock
+        self.monitor = WorkloadMonitor("log", window, read_ratio, write_ratio)
+        self.engine: Union[LogLWWGraph[T], PersistentLWWGraph[T]] = LogLWWGraph(clock)
+
+    @property
+    def representation(self) -> Representation:
+        """The representation of the state: "log" or "indexed" """
+        return self.monitor.representation
+
+    @property
+    def migrations(self) -> List[Migration]:
+        """The migrations decided so far, oldest first"""
+        return self.monitor.migrations
+
+    @property
+    def frontier(self) -> Optional[int]:
+        """Operations at or before this timestamp are rejected, see
+        collect_garbage"""
+        return self.engine.frontier
+
+    @property
+    def operations(self) -> Iterable[LWWGraphOperation[T]]:
+        """The operations held by the current engine"""
+        return self.engine.operations
+
+    def _observe(self, reads: int = 0, writes: int = 0) -> None:
+        migration = self.monitor.observe(reads, writes)
+        if migration is None:
+            return
+        engine: Union[LogLWWGraph[T], PersistentLWWGraph[T]]
+        if migration.target == "log":
+            engine = LogLWWGraph(self.clock)
+        else:
+            engine = PersistentLWWGraph(self.clock)
+        ops = list(self.engine.operations)
+        engine.apply(ops)
+        if self.engine.frontier is not None:
+            engine.collect_garbage(self.engine.frontier)
+        self.engine = engine
+        self.monitor.migrated(len(ops))
+
+    @property
+    def vertices(self) -> Iterable[T]:
+        self._observe(reads=1)
+        return self.engine.vertices
+
+    @property
+    def edges(self) -> Iterable[Edge[T]]:
+        self._observe(reads=1)
+        return self.engine.edges
+
+    @property
+    def components(self) -> Iterable[Mapping[T, Set[T]]]:
+        self._observe(reads=1)
+        return self.engine.components
+
+    def __contains__(self, item: Union[T, Edge[T]]) -> bool:
+        self._observe(reads=1)
+        return item in self.engine
+
+    def neighbors(self, vertex: T) -> Set[T]:
+        self._observe(reads=1)
+        return self.engine.neighbors(vertex)
+
+    def degree(self, vertex: T) -> int:
+        self._observe(reads=1)
+        return self.engine.degree(vertex)
+
+    def k_hop(self, vertex: T, k: int) -> Set[T]:
+        self._observe(reads=1)
+        return self.engine.k_hop(vertex, k)
+
+    def induced_subgraph(self, vertices: Iterable[T]) -> Dict[T, Set[T]]:
+        self._observe(reads=1)
+        return self.engine.induced_subgraph(vertices)
+
+    def to_csr(self) -> CSR[T]:
+        self._observe(reads=1)
+        return self.engine.to_csr()
+
+    def apply(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
+        ops = list(ops)
+        self._observe(writes=len(ops))
+        self.engine.apply(ops)
+
+    def load(self, bulk: BulkGraph[T]) -> None:
+        """Load a static graph in the current engine, see
+        crdt.lww_graph.loader."""
+        self._observe(writes=len(bulk.timestamps))
+        self.engine.load(bulk)
+
+    def add_vertex(self, vertex: T, ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        self._observe(writes=1)
+        return self.engine.add_vertex(vertex, ts)
+
+    def add_edge(self, edge: Edge[T], ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        self._observe(writes=1)
+        return self.engine.add_edge(edge, ts)
+
+    def remove_vertex(
+        self, vertex: T, ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        self._observe(writes=1)
+        return self.engine.remove_vertex(vertex, ts)
+
+    def remove_edge(
+        self, edge: Edge[T], ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        self._observe(writes=1)
+        return self.engine.remove_edge(edge, ts)
+
+    def compact(self) -> None:
+        """Compact the operations log of the current engine."""
+        self.engine.compact()
+
+    def collect_garbage(self, frontier: int) -> None:
+        """Collect the garbage of the current engine."""
+        self.engine.collect_garbage(frontier)
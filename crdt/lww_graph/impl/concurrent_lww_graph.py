@@ -0,0 +1,255 @@
+"""Thread-safe LWW-element-graph implementation, with lock striping for writers
+and published immutable snapshots for readers"""
+# pylint: disable=duplicate-code,too-few-public-methods
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    FrozenSet,
+    Generic,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from crdt.clock.interface import Clock
+from crdt.lww_graph import queries
+from crdt.lww_graph.edge import BaseEdge, Edge, SlotEdge
+from crdt.lww_graph.interface import LWWGraph, LWWGraphError, T
+from crdt.lww_graph.operation import LWWGraphOperation, LWWGraphOpName
+from crdt.lww_graph.tables import (
+    GraphTables,
+    VertexRecord,
+    build_adjacency,
+    build_components,
+)
+
+if TYPE_CHECKING:
+    from crdt.lww_graph.csr import CSR
+
+
+class _Stripe(Generic[T]):
+    """The records of the elements whose hash falls in this stripe"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.tables: GraphTables[T] = GraphTables()
+        self.version = 0
+
+
+@dataclass(frozen=True)
+class _Snapshot(Generic[T]):
+    """Resolved graph state, shared by readers without locking"""
+
+    versions: Tuple[int, ...]
+    parts: Tuple[GraphTables[T], ...]
+    vertices: FrozenSet[T]
+    edges: FrozenSet[SlotEdge[T]]
+    adjacency: Dict[T, Set[T]]
+    components: List[Dict[T, Set[T]]]
+
+
+class ConcurrentLWWGraph(LWWGraph[T]):
+    """LWW-element-graph taking writes from many threads. The per-element
+    records are split in stripes by element hash, each guarded by its own lock,
+    so that writers only contend when they write to the same stripe. Writing is
+    constant-time: records can be merged in any order, and are only resolved
+    into vertices and edges when read.
+
+    Readers share an immutable snapshot, resolved again by the first reader
+    that finds it out of date. Resolution copies the stripes written since the
+    last snapshot, each under its lock, which only blocks the writers of that
+    stripe for the duration of the copy. Since each operation touches a single
+    stripe, a snapshot reflects a set of whole operations, and is a valid state
+    of the graph. The live vertices and edges, the adjacency and the components
+    are then rebuilt from all the records: the first read after any write costs
+    time linear in the size of the graph (see PersistentLWWGraph for reads
+    that don't)."""
+
+    def __init__(self, clock: Clock, stripes: int = 64) -> None:
+        """Initialize an empty graph.
+
+        Params
+            clock: clock used to timestamp local operations
+            stripes: number of independently locked partitions of the records
+        """
+        self.clock = clock
+        self._clock_lock = threading.Lock()
+        self._stripes: List[_Stripe[T]] = [_Stripe() for _ in range(stripes)]
+        self._resolve_lock = threading.Lock()
+        self._snapshot: _Snapshot[T] = _Snapshot(
+            (0,) * stripes,
+            tuple(GraphTables() for _ in range(stripes)),
+            frozenset(),
+            frozenset(),
+            {},
+            [],
+        )
+        self._collect_lock = threading.Lock()
+        # Operations at or before this timestamp are rejected, see
+        # collect_garbage
+        self.frontier: Optional[int] = None
+
+    def _stripe(self, item: Union[T, BaseEdge[T]]) -> _Stripe[T]:
+        return self._stripes[hash(item) % len(self._stripes)]
+
+    def _versions(self) -> Tuple[int, ...]:
+        return tuple(stripe.version for stripe in self._stripes)
+
+    @property
+    def _current_snapshot(self) -> _Snapshot[T]:
+        """Publish a new snapshot if any stripe was written since the last."""
+        snapshot = self._snapshot
+        if snapshot.versions == self._versions():
+            return snapshot
+        with self._resolve_lock:
+            if self._snapshot.versions != self._versions():
+                self._snapshot = self._resolve()
+            return self._snapshot
+
+    def _resolve(self) -> _Snapshot[T]:
+        previous = self._snapshot
+        versions = []
+        parts = []
+        for stripe, version, part in zip(
+            self._stripes, previous.versions, previous.parts
+        ):
+            if stripe.version != version:
+                with stripe.lock:
+                    part = stripe.tables.copy()
+                    version = stripe.version
+            versions.append(version)
+            parts.append(part)
+        tables: GraphTables[T] = GraphTables()
+        for part in parts:
+            tables.update(part)
+        vertices = tables.live_vertices()
+        edges = tables.live_edges()
+        adjacency = build_adjacency(vertices, edges)
+        return _Snapshot(
+            versions=tuple(versions),
+            parts=tuple(parts),
+            vertices=frozenset(vertices),
+            edges=frozenset(edges),
+            adjacency=adjacency,
+            components=build_components(adjacency),
+        )
+
+    def __contains__(self, item: Union[T, Edge[T]]) -> bool:
+        snapshot = self._current_snapshot
+        if isinstance(item, Edge):
+            return item in snapshot.edges
+        return item in snapshot.vertices
+
+    @property
+    def vertices(self) -> Iterable[T]:
+        return self._current_snapshot.vertices
+
+    @property
+    def edges(self) -> Iterable[Edge[T]]:
+        return frozenset(e.to_base_edge() for e in self._current_snapshot.edges)
+
+    @property
+    def components(self) -> Iterable[Mapping[T, Set[T]]]:
+        return [
+            {v: set(incident) for v, incident in component.items()}
+            for component in self._current_snapshot.components
+        ]
+
+    def neighbors(self, vertex: T) -> Set[T]:
+        return set(self._current_snapshot.adjacency.get(vertex, ()))
+
+    def degree(self, vertex: T) -> int:
+        return len(self._current_snapshot.adjacency.get(vertex, ()))
+
+    def k_hop(self, vertex: T, k: int) -> Set[T]:
+        return queries.k_hop(self._current_snapshot.adjacency, vertex, k)
+
+    def induced_subgraph(self, vertices: Iterable[T]) -> Dict[T, Set[T]]:
+        return queries.induced_subgraph(self._current_snapshot.adjacency, vertices)
+
+    def to_csr(self) -> CSR[T]:
+        # pylint: disable=import-outside-toplevel
+        from crdt.lww_graph.csr import build_csr
+
+        return build_csr(self._current_snapshot.adjacency)
+
+    @property
+    def operations(self) -> Sequence[LWWGraphOperation[T]]:
+        """The smallest operations log equivalent to all operations so far"""
+        tables: GraphTables[T] = GraphTables()
+        for stripe in self._stripes:
+            with stripe.lock:
+                tables.update(stripe.tables)
+        return tables.operations()
+
+    def compact(self) -> None:
+        """Nothing to do: superseded operations are never kept."""
+
+    def collect_garbage(self, frontier: int) -> None:
+        """Forget the records that operations later than ``frontier`` can't
+        need, and reject earlier operations from now on. Each stripe is
+        collected under its lock, deciding the presence of edges with a copy of
+        all vertex records: they can only be changed by later operations,
+        which don't revive the edges collected."""
+        with self._collect_lock:
+            if self.frontier is not None and frontier <= self.frontier:
+                return
+            self.frontier = frontier
+            vertices: Dict[T, VertexRecord] = {}
+            for stripe in self._stripes:
+                with stripe.lock:
+                    vertices.update(stripe.tables.vertices)
+            for stripe in self._stripes:
+                with stripe.lock:
+                    stripe.tables.collect_garbage(frontier, vertices)
+                    stripe.version += 1  # Let the next snapshot drop the records
+
+    def _write(self, op: LWWGraphOperation[T]) -> None:
+        stripe = self._stripe(op.arg)
+        with stripe.lock:
+            stripe.tables.apply(op)
+            stripe.version += 1
+
+    def apply(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
+        """Merge already timestamped operations, except those at or before the
+        stability frontier."""
+        for op in ops:
+            if self.frontier is None or op.ts > self.frontier:
+                self._write(op)
+
+    def _record_op(
+        self, op: LWWGraphOpName, arg: Union[T, Edge[T]], ts: Optional[int]
+    ) -> LWWGraphOperation[T]:
+        if ts is None:
+            with self._clock_lock:
+                ts = self.clock.nanoseconds
+        if self.frontier is not None and ts <= self.frontier:
+            raise LWWGraphError(f"Timestamp {ts} is not after the stable frontier")
+        operation = LWWGraphOperation[T](op=op, arg=arg, ts=ts)  # type: ignore
+        self._write(operation)
+        return operation
+
+    def add_vertex(self, vertex: T, ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        return self._record_op("add_v", vertex, ts)
+
+    def add_edge(self, edge: Edge[T], ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        return self._record_op("add_e", edge, ts)
+
+    def remove_vertex(
+        self, vertex: T, ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        return self._record_op("del_v", vertex, ts)
+
+    def remove_edge(
+        self, edge: Edge[T], ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        return self._record_op("del_e", edge, ts)
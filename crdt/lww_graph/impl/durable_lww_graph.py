@@ -0,0 +1,164 @@
+"""LWW-element-graph implementation that survives process restarts by
+persisting its operations to a snapshot and a write-ahead log"""
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
+
+from crdt.clock.interface import Clock
+from crdt.lww_graph.edge import Edge
+from crdt.lww_graph.feed import ChangesCallback, GraphChanges
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.interface import ObservableLWWGraph, T
+from crdt.lww_graph.operation import LWWGraphOperation
+from crdt.persistence.records import GRAPH_OPS
+from crdt.persistence.store import ReplicaStore
+
+if TYPE_CHECKING:
+    from crdt.lww_graph.csr import CSR
+
+
+class DurableLWWGraph(ObservableLWWGraph[T]):
+    """Wraps a LogLWWGraph, logging each operation to a write-ahead log before
+    acknowledging it, and periodically checkpointing the compacted log as a
+    snapshot."""
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-public-methods
+    def __init__(
+        self,
+        directory: str,
+        clock: Clock,
+        checkpoint_every: int = 100_000,
+        sync_every: int = 1,
+        sync_interval: Optional[float] = None,
+    ) -> None:
+        """Open or create the replica persisted in ``directory``.
+
+        Params
+            directory: where the snapshot and write-ahead log are kept
+            clock: clock used to timestamp local operations
+            checkpoint_every: number of operations between two snapshots
+            sync_every: number of operations between two fsyncs of the log
+            sync_interval: number of seconds after an fsync past which the
+                next append fsyncs: an idle log is only synced by that append
+        """
+        self.clock = clock
+        self._graph: LogLWWGraph[T] = LogLWWGraph(clock=clock)
+        self._store: ReplicaStore[LWWGraphOperation] = ReplicaStore(
+            directory,
+            family=GRAPH_OPS,
+            checkpoint_every=checkpoint_every,
+            sync_every=sync_every,
+            sync_interval=sync_interval,
+        )
+        self._store.restore(self._graph)
+
+    def __contains__(self, item: Union[T, Edge[T]]) -> bool:
+        return item in self._graph
+
+    @property
+    def vertices(self) -> Iterable[T]:
+        return self._graph.vertices
+
+    @property
+    def edges(self) -> Iterable[Edge[T]]:
+        return self._graph.edges
+
+    @property
+    def components(self) -> Iterable[Mapping[T, Set[T]]]:
+        return self._graph.components
+
+    def neighbors(self, vertex: T) -> Set[T]:
+        return self._graph.neighbors(vertex)
+
+    def degree(self, vertex: T) -> int:
+        return self._graph.degree(vertex)
+
+    def k_hop(self, vertex: T, k: int) -> Set[T]:
+        return self._graph.k_hop(vertex, k)
+
+    def induced_subgraph(self, vertices: Iterable[T]) -> Dict[T, Set[T]]:
+        return self._graph.induced_subgraph(vertices)
+
+    def to_csr(self) -> "CSR[T]":
+        return self._graph.to_csr()
+
+    def subscribe(self, callback: ChangesCallback) -> Callable[[], None]:
+        return self._graph.subscribe(callback)
+
+    def changes(self) -> AsyncIterator[GraphChanges[T]]:
+        return self._graph.changes()
+
+    def catch_up(self) -> None:
+        self._graph.catch_up()
+
+    def checkpoint(self) -> None:
+        """Compact the log and write it as the new snapshot."""
+        self._store.checkpoint(self._graph)
+
+    def close(self) -> None:
+        """Make all operations durable and release the log file."""
+        self._store.close()
+
+    def _logged(self, op: LWWGraphOperation[T], dropped: int) -> LWWGraphOperation[T]:
+        """Log ``op`` unless the replica dropped it: if it dropped more than
+        the ``dropped`` operations counted before ``op``."""
+        if self._graph.dropped_ops == dropped:
+            self._store.log(op, self._graph)
+        return op
+
+    @property
+    def frontier(self) -> Optional[int]:
+        """Operations at or before this timestamp are rejected, see
+        collect_garbage"""
+        return self._graph.frontier
+
+    @property
+    def operations(self) -> Sequence[LWWGraphOperation[T]]:
+        """The operations log of the replica, see LogLWWGraph"""
+        return self._graph.operations
+
+    def collect_garbage(self, frontier: int) -> None:
+        """Collect the garbage of the replica, and write it as the new
+        snapshot, with the frontier, which is restored on open."""
+        self._graph.collect_garbage(frontier)
+        self.checkpoint()
+
+    @property
+    def dropped_ops(self) -> int:
+        """Number of operations dropped on ingestion, see LogLWWGraph"""
+        return self._graph.dropped_ops
+
+    def apply(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
+        for op in ops:
+            dropped = self._graph.dropped_ops
+            self._graph.apply([op])
+            self._logged(op, dropped)
+
+    def add_vertex(self, vertex: T, ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        dropped = self._graph.dropped_ops
+        return self._logged(self._graph.add_vertex(vertex, ts), dropped)
+
+    def add_edge(self, edge: Edge[T], ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        dropped = self._graph.dropped_ops
+        return self._logged(self._graph.add_edge(edge, ts), dropped)
+
+    def remove_vertex(
+        self, vertex: T, ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        dropped = self._graph.dropped_ops
+        return self._logged(self._graph.remove_vertex(vertex, ts), dropped)
+
+    def remove_edge(
+        self, edge: Edge[T], ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        dropped = self._graph.dropped_ops
+        return self._logged(self._graph.remove_edge(edge, ts), dropped)
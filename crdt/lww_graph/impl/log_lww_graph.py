@@ -1,8 +1,13 @@
 """Simple LWW-element-graph implementation based on append-only LWW-element-log
 """
+import heapq
+import itertools
 from collections import defaultdict
 from dataclasses import dataclass, field
 from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Callable,
     DefaultDict,
     Dict,
     Final,
@@ -10,17 +15,29 @@ from typing import (
     Iterable,
     List,
     Mapping,
+    MutableSequence,
     Optional,
+    Sequence,
     Set,
     Tuple,
     Union,
+    cast,
 )
 
 from crdt.clock.interface import Clock
 from crdt.functools.typing import assert_never
-from crdt.lww_graph.edge import BaseEdge, Edge
-from crdt.lww_graph.interface import LWWGraph, T
+from crdt.lww_graph import queries
+from crdt.lww_graph.edge import BaseEdge, Edge, SlotEdge
+from crdt.lww_graph.feed import ChangeFeed, ChangesCallback, GraphChanges
+from crdt.lww_graph.interface import LWWGraphError, ObservableLWWGraph, T
 from crdt.lww_graph.operation import LWWGraphOperation, LWWGraphOpName
+from crdt.lww_graph.tables import (
+    NO_EDGE,
+    NO_VERTEX,
+    GraphTables,
+    edge_is_live,
+    vertex_is_live,
+)
 
 # When sorting the operations log, we use the following ordering between
 # operations to break down timestamp ties.
@@ -31,67 +48,73 @@ OP_ORDER: Final[Dict[LWWGraphOpName, int]] = {
     "add_e": 4,
 }
 
+if TYPE_CHECKING:
+    from crdt.lww_graph.csr import CSR
+    from crdt.lww_graph.loader import BulkGraph
 
-@dataclass
-class _Changes(Generic[T]):
-    vertices_added: List[T] = field(default_factory=list)
-    vertices_removed: List[T] = field(default_factory=list)
-    edges_added: List[BaseEdge[T]] = field(default_factory=list)
-    edges_removed: List[BaseEdge[T]] = field(default_factory=list)
+
+def _op_key(op: LWWGraphOperation) -> Tuple[int, int]:
+    """Sorting key of the operations log"""
+    return op.ts, OP_ORDER[op.op]
 
 
 def _process_add_edge_operation(
-    op: LWWGraphOperation,
-    last_operations: Dict[LWWGraphOpName, Dict[Union[T, BaseEdge[T]], int]],
-    edges: Set[BaseEdge[T]],
-) -> Optional[_Changes[T]]:
+    edge: SlotEdge[T],
+    ts: int,
+    last_operations: Dict[LWWGraphOpName, Dict[Union[T, SlotEdge[T]], int]],
+    edges: Set[SlotEdge[T]],
+) -> Optional[GraphChanges[T]]:
     try:
-        add_a_ts = last_operations["add_v"][op.arg.a]
-        add_b_ts = last_operations["add_v"][op.arg.b]
+        add_a_ts = last_operations["add_v"][edge.a]
+        add_b_ts = last_operations["add_v"][edge.b]
     except KeyError:
         # The edge can't be added because one of the vertices was never created
         return None
     else:
-        a_is_deleted = add_a_ts <= last_operations["del_v"].get(op.arg.a, add_a_ts - 1)
-        b_is_deleted = add_b_ts <= last_operations["del_v"].get(op.arg.b, add_b_ts - 1)
+        a_is_deleted = add_a_ts <= last_operations["del_v"].get(edge.a, add_a_ts - 1)
+        b_is_deleted = add_b_ts <= last_operations["del_v"].get(edge.b, add_b_ts - 1)
         if (
             not (a_is_deleted or b_is_deleted)
-            and last_operations["del_e"].get(op.arg, op.ts - 1) < op.ts
+            and edge not in edges
+            and last_operations["del_e"].get(edge, ts - 1) < ts
         ):
             # Any vertex deletion precedes its last addition, so the edge can exist
-            edges.add(op.arg)
-            return _Changes(edges_added=[op.arg])
+            edges.add(edge)
+            return GraphChanges(edges_added=[edge])
     return None
 
 
 def _process_delete_edge_operation(
-    op: LWWGraphOperation, edges: Set[BaseEdge[T]]
-) -> Optional[_Changes[T]]:
+    edge: SlotEdge[T], edges: Set[SlotEdge[T]]
+) -> Optional[GraphChanges[T]]:
     try:
-        edges.remove(op.arg)
-        return _Changes(edges_removed=[op.arg])
+        edges.remove(edge)
+        return GraphChanges(edges_removed=[edge])
     except KeyError:
         return None
 
 
 def _process_add_vertex_operation(
     op: LWWGraphOperation[T],
-    last_operations: Dict[LWWGraphOpName, Dict[Union[T, BaseEdge[T]], int]],
+    last_operations: Dict[LWWGraphOpName, Dict[Union[T, SlotEdge[T]], int]],
     vertices: Set[T],
-) -> Optional[_Changes[T]]:
+) -> Optional[GraphChanges[T]]:
     vertex: T = op.arg  # type: ignore
-    if last_operations["del_v"].get(vertex, op.ts - 1) < op.ts:
+    if (
+        vertex not in vertices
+        and last_operations["del_v"].get(vertex, op.ts - 1) < op.ts
+    ):
         vertices.add(vertex)
-        return _Changes(vertices_added=[vertex])
+        return GraphChanges(vertices_added=[vertex])
     return None
 
 
 def _process_delete_vertex_operation(
     op: LWWGraphOperation[T],
-    last_operations: Dict[LWWGraphOpName, Dict[Union[T, BaseEdge[T]], int]],
     vertices: Set[T],
-    edges: Set[BaseEdge[T]],
-) -> Optional[_Changes[T]]:
+    edges: Set[SlotEdge[T]],
+    adjacency: Mapping[T, Set[T]],
+) -> Optional[GraphChanges[T]]:
     vertex: T = op.arg  # type: ignore
     try:
         vertices.remove(vertex)
@@ -99,18 +122,15 @@ def _process_delete_vertex_operation(
         # The vertex is not here at the currently processed timestamp, nothing to do
         return None
     else:
-        # The vertex existed at the deletion time; we must search for edges that contained it.
-        edges_for_deletion: Set[BaseEdge[T]] = set()
-        edge: BaseEdge[T]
-        for edge in edges:
-            if op.arg in edge:
-                # `edge` contained our deleted vertex, we nee to delete it too.
-                edges_for_deletion.add(edge)
-                last_operations["del_e"][edge] = op.ts
+        # The vertex existed at the deletion time, so do its incident edges.
+        # No tombstone is recorded for them: the timestamp of the deletion,
+        # in the last operations table, is enough to reject the additions
+        # that precede it, see _process_add_edge_operation.
+        edges_for_deletion: List[Edge[T]] = [
+            SlotEdge(vertex, n) for n in adjacency[vertex]
+        ]
         edges.difference_update(edges_for_deletion)
-        return _Changes(
-            vertices_removed=[vertex], edges_removed=list(edges_for_deletion)
-        )
+        return GraphChanges(vertices_removed=[vertex], edges_removed=edges_for_deletion)
 
 
 def _find_index_of_component_with_vertex(
@@ -149,20 +169,21 @@ def _find_connected_vertices(component_dict: Dict[T, Set[T]], start: T) -> Set[T
 
 
 def _update_components_map(
-    components: List[Dict[T, Set[T]]], changes: _Changes[T]
+    components: List[Dict[T, Set[T]]], changes: GraphChanges[T]
 ) -> None:
     # pylint: disable=too-many-locals
     for vertex_added in changes.vertices_added:
         components.append({vertex_added: set()})
     for edge_added in changes.edges_added:
+        a, b = edge_added.vertices
         component_with_a = _find_index_of_component_with_vertex(
-            components=components, vertex=edge_added.a
+            components=components, vertex=a
         )
         component_with_b = _find_index_of_component_with_vertex(
-            components=components, vertex=edge_added.b
+            components=components, vertex=b
         )
-        components[component_with_a][edge_added.a].add(edge_added.b)
-        components[component_with_b][edge_added.b].add(edge_added.a)
+        components[component_with_a][a].add(b)
+        components[component_with_b][b].add(a)
         if component_with_a != component_with_b:
             _merge_components(
                 components=components,
@@ -170,12 +191,14 @@ def _update_components_map(
             )
     components_with_edge_removed: List[int] = []
     for edge_removed in changes.edges_removed:
+        a, b = edge_removed.vertices
         component = _find_index_of_component_with_vertex(
-            components=components, vertex=edge_removed.a
+            components=components, vertex=a
         )
         components_with_edge_removed.append(component)
-        components[component][edge_removed.a].remove(edge_removed.b)
-        components[component][edge_removed.b].remove(edge_removed.a)
+        components[component][a].remove(b)
+        # discard, because both removals are the same for a self-loop
+        components[component][b].discard(a)
     for vertex_removed in changes.vertices_removed:
         component = _find_index_of_component_with_vertex(
             components=components, vertex=vertex_removed
@@ -188,7 +211,8 @@ def _update_components_map(
             if vertex_removed in target:
                 target.remove(vertex_removed)
     component_splits: Dict[int, List[Dict[T, Set[T]]]] = {}
-    for component in components_with_edge_removed:
+    # Removing the edges of a vertex touches its component once per edge
+    for component in dict.fromkeys(components_with_edge_removed):
         orig_vertices = set(iter(components[component]))
         component_splits[component] = []
         while orig_vertices:
@@ -210,82 +234,470 @@ def _update_components_map(
     for original_index, new_components in component_splits.items():
         components[original_index] = new_components[0]
         components.extend(new_components[1:])
+    # Removing an isolated vertex leaves its component empty
+    components[:] = [component for component in components if component]
 
 
-class LogLWWGraph(LWWGraph[T]):
-    """Simplistic LWW-element-graph local process that records operations as
-    they come to an in-memory log. There is no garbage collection, no log
-    compression, no persistence to disk, etc."""
-
-    def __init__(self, clock: Clock) -> None:
-        self.clock = clock
-        self._oplog: List[LWWGraphOperation] = []
+def _update_adjacency(adjacency: Dict[T, Set[T]], changes: GraphChanges[T]) -> None:
+    for vertex_added in changes.vertices_added:
+        adjacency[vertex_added] = set()
+    for edge_added in changes.edges_added:
+        a, b = edge_added.vertices
+        adjacency[a].add(b)
+        adjacency[b].add(a)
+    for edge_removed in changes.edges_removed:
+        a, b = edge_removed.vertices
+        adjacency[a].discard(b)
+        adjacency[b].discard(a)
+    for vertex_removed in changes.vertices_removed:
+        # Its edges are among the removed edges
+        del adjacency[vertex_removed]
+
+
+def _compact_operations(
+    oplog: Iterable[LWWGraphOperation[T]],
+) -> List[LWWGraphOperation[T]]:
+    """Return the smallest sub-log of ``oplog`` that resolves to the same graph,
+    now and after any further (possibly late) operation.
+
+    For edges, only the last removal matters, and the last addition if it is
+    more recent. For vertices, the last removal matters, but so do *all* the
+    additions that follow it: an edge added at ``t`` is only valid if its
+    vertices were added before ``t``, and a late vertex removal may fall
+    between two additions."""
+    last: Dict[Tuple[LWWGraphOpName, Union[T, BaseEdge[T]]], LWWGraphOperation[T]]
+    last = {}
+    vertex_adds: DefaultDict[T, Dict[int, LWWGraphOperation[T]]] = defaultdict(dict)
+    for op in oplog:
+        if op.op == "add_v":
+            vertex_adds[op.arg].setdefault(op.ts, op)  # type: ignore
+            continue
+        prev = last.get((op.op, op.arg))
+        if prev is None or prev.ts < op.ts:
+            last[(op.op, op.arg)] = op
+    compacted = []
+    for (name, arg), op in last.items():
+        del_op = last.get(("del_e", arg))
+        if name != "add_e" or del_op is None or op.ts > del_op.ts:
+            compacted.append(op)
+    for vertex, adds in vertex_adds.items():
+        del_op = last.get(("del_v", vertex))
+        compacted.extend(
+            add for ts, add in adds.items() if del_op is None or ts > del_op.ts
+        )
+    compacted.sort(key=_op_key)
+    return compacted
 
-    def __contains__(self, item: Union[T, Edge[T]]) -> bool:
-        if isinstance(item, Edge):
-            return item in self._current_state[1]
-        return item in self._current_state[0]
 
-    @property
-    def _current_state(self) -> Tuple[Set[T], Set[BaseEdge[T]], List[Dict[T, Set[T]]]]:
-        """Iterate over the operations log to determine which vertices and
-        edges are currently present."""
-        # Mapping: operation (add/del edge/vertex) -> edge/vertex -> last timestamp
-        last_op: DefaultDict[
-            LWWGraphOpName, Dict[Union[T, BaseEdge[T]], int]
-        ] = defaultdict(dict)
-        # Known vertices and edges at current processing point
-        vertices: Set[T] = set()
-        edges: Set[BaseEdge[T]] = set()
-        components: List[Dict[T, Set[T]]] = []
-        # Go through the sorted log
-        for op in sorted(self._oplog, key=lambda o: (o.ts, OP_ORDER[o.op])):
-            last_op[op.op][op.arg] = op.ts
-            changes: Optional[_Changes[T]] = None  # used for components update
+@dataclass
+class _ReplayState(Generic[T]):
+    """The result of replaying the sorted operations log up to some point"""
+
+    # Mapping: operation (add/del edge/vertex) -> edge/vertex -> last timestamp
+    last_op: DefaultDict[LWWGraphOpName, Dict[Union[T, SlotEdge[T]], int]] = field(
+        default_factory=lambda: defaultdict(dict)
+    )
+    # Known vertices and edges at current processing point
+    vertices: Set[T] = field(default_factory=set)
+    edges: Set[SlotEdge[T]] = field(default_factory=set)
+    components: List[Dict[T, Set[T]]] = field(default_factory=list)
+    # Mapping: vertex -> neighbors, for the neighborhood queries
+    adjacency: Dict[T, Set[T]] = field(default_factory=dict)
+    # Number of log entries replayed, and sorting key of the last one
+    replayed: int = 0
+    last_key: Tuple[int, int] = (-(2**63), 0)
+
+    def can_continue_with(self, ops: Iterable[LWWGraphOperation[T]]) -> bool:
+        """Whether replaying ``ops`` from this state is equivalent to
+        replaying the whole log again, i.e. no operation is late."""
+        return all(_op_key(op) >= self.last_key for op in ops)
+
+    def replay(self, ops: Iterable[LWWGraphOperation[T]]) -> List[GraphChanges[T]]:
+        """Process operations, which must be sorted and not late, and return
+        the resulting changes."""
+        all_changes = []
+        for op in ops:
+            self.replayed += 1
+            self.last_key = _op_key(op)
+            arg: Union[T, SlotEdge[T]] = op.arg  # type: ignore
+            if isinstance(arg, Edge):
+                arg = SlotEdge.from_edge(arg)
+            self.last_op[op.op][arg] = op.ts
+            changes: Optional[GraphChanges[T]] = None
             if op.op == "add_e":
                 changes = _process_add_edge_operation(
-                    op=op, last_operations=last_op, edges=edges
+                    edge=arg,  # type: ignore
+                    ts=op.ts,
+                    last_operations=self.last_op,
+                    edges=self.edges,
                 )
             elif op.op == "del_e":
-                changes = _process_delete_edge_operation(op=op, edges=edges)
+                changes = _process_delete_edge_operation(
+                    edge=arg, edges=self.edges  # type: ignore
+                )
             elif op.op == "add_v":
                 changes = _process_add_vertex_operation(
-                    op=op, last_operations=last_op, vertices=vertices
+                    op=op, last_operations=self.last_op, vertices=self.vertices
                 )
             elif op.op == "del_v":
                 changes = _process_delete_vertex_operation(
-                    op=op, last_operations=last_op, vertices=vertices, edges=edges
+                    op=op,
+                    vertices=self.vertices,
+                    edges=self.edges,
+                    adjacency=self.adjacency,
                 )
             else:
                 assert_never(op.op)
             # Update the components map
             if changes:
-                _update_components_map(components=components, changes=changes)
-        return vertices, edges, components
+                _update_components_map(components=self.components, changes=changes)
+                _update_adjacency(adjacency=self.adjacency, changes=changes)
+                all_changes.append(changes)
+        return all_changes
+
+    def repair(
+        self,
+        ops: Iterable[LWWGraphOperation[T]],
+        records: GraphTables[T],
+        incident: Mapping[T, Set[SlotEdge[T]]],
+    ) -> GraphChanges[T]:
+        """Process late operations, which precede the last replayed one, and
+        return the resulting changes. Instead of replaying the log again, the
+        presence of the vertices and edges they touch, and of the edges
+        incident to these vertices, is resolved from ``records``, the tables of
+        all the operations replayed and of ``ops``. Only the components of the
+        elements that appear or disappear are then updated."""
+        vertices: Set[T] = set()
+        edges: Set[SlotEdge[T]] = set()
+        for op in ops:
+            arg: Union[T, SlotEdge[T]] = op.arg  # type: ignore
+            if isinstance(arg, Edge):
+                arg = SlotEdge.from_edge(arg)
+                edges.add(arg)
+            else:
+                vertices.add(arg)
+                edges.update(incident.get(arg, ()))
+            # Keep the last timestamps of the replayed log, for the operations
+            # replayed next
+            last = self.last_op[op.op]
+            last[arg] = max(last.get(arg, op.ts), op.ts)
+        changes: GraphChanges[T] = GraphChanges()
+        for vertex in vertices:
+            live = vertex_is_live(records.vertices.get(vertex, NO_VERTEX))
+            if live and vertex not in self.vertices:
+                self.vertices.add(vertex)
+                changes.vertices_added.append(vertex)
+            elif not live and vertex in self.vertices:
+                self.vertices.remove(vertex)
+                changes.vertices_removed.append(vertex)
+        for edge in edges:
+            record = records.edges.get(edge, NO_EDGE)
+            live = edge_is_live(edge, record, records.vertices)
+            if live and edge not in self.edges:
+                self.edges.add(edge)
+                changes.edges_added.append(edge)
+            elif not live and edge in self.edges:
+                self.edges.remove(edge)
+                changes.edges_removed.append(edge)
+        if changes:
+            _update_components_map(components=self.components, changes=changes)
+            _update_adjacency(adjacency=self.adjacency, changes=changes)
+        return changes
+
+
+class LogLWWGraph(ObservableLWWGraph[T]):
+    """Simplistic LWW-element-graph local process that records operations as
+    they come to an in-memory log. There is no garbage collection and no
+    persistence to disk, but the log can be compacted on demand.
+
+    The result of replaying the log is kept, and operations appended since are
+    replayed from there, unless one of them is late (its timestamp precedes
+    that of the last replayed operation), in which case the whole log is
+    replayed again.
+
+    With a reorder window, late operations are repaired instead: only the
+    elements they touch are resolved again, from per-element records of the
+    replayed operations, which costs memory proportional to the log. To avoid
+    repairs for operations that are only slightly out of order, the change
+    feed is fed operations in timestamp order, up to a watermark trailing the
+    latest timestamp by the window: later ones are held until it passes them
+    or until the graph is read.
+
+    Operations that can't change the graph, such as the duplicates of an
+    at-least-once delivery, are dropped before they reach the log, by checking
+    them against per-element records of the timestamps already applied."""
+
+    # pylint: disable=too-many-instance-attributes,too-many-public-methods
+    def __init__(
+        self,
+        clock: Clock,
+        oplog: Optional[MutableSequence[LWWGraphOperation[T]]] = None,
+        reorder_window: Optional[int] = None,
+    ) -> None:
+        """Initialize a graph, with an empty in-memory log by default.
+
+        Params
+            clock: clock used to timestamp local operations
+            oplog: log to read and append operations to, f.e. a BinaryOpLog
+            reorder_window: if given, repair late operations in place rather
+                than replaying the whole log, and hold the operations within
+                this many nanoseconds of the latest one, see watermark
+        """
+        self.clock = clock
+        self._oplog: MutableSequence[LWWGraphOperation[T]] = (
+            oplog if oplog is not None else []
+        )
+        self._state: _ReplayState[T] = _ReplayState()
+        self._feed: ChangeFeed[T] = ChangeFeed()
+        # Operations at or before this timestamp are rejected, see
+        # collect_garbage
+        self.frontier: Optional[int] = None
+        # Records of the log, built on the first ingested operation
+        self._index: Optional[GraphTables[T]] = None
+        # Number of operations dropped on ingestion
+        self.dropped_ops = 0
+        self.reorder_window = reorder_window
+        # Latest timestamp of the log
+        self._latest: Optional[int] = None
+        # Operations taken from the log but not replayed yet, by sorting key
+        # and arrival, records of those replayed and their incident edges, in
+        # watermark mode
+        self._held: List[Tuple[Tuple[int, int], int, LWWGraphOperation[T]]] = []
+        self._arrivals = itertools.count()
+        self._replayed_records: GraphTables[T] = GraphTables()
+        self._incident: Dict[T, Set[SlotEdge[T]]] = {}
+        # Number of late operations repaired in place
+        self.repaired_ops = 0
+
+    def __contains__(self, item: Union[T, Edge[T]]) -> bool:
+        if isinstance(item, Edge):
+            return item in self._current_state.edges
+        return item in self._current_state.vertices
+
+    @property
+    def watermark(self) -> Optional[int]:
+        """In watermark mode, the timestamp up to which operations are
+        replayed by writes, so that they reach the change feed"""
+        if self.reorder_window is None or self._latest is None:
+            return None
+        return self._latest - self.reorder_window
+
+    def _release(self, watermark: Optional[int]) -> GraphChanges[T]:
+        """Replay the held operations up to ``watermark``, or all of them if
+        None, in timestamp order, repair the late ones, and return the net
+        changes."""
+        state = self._state
+        for op in self._oplog[state.replayed :]:
+            heapq.heappush(self._held, (_op_key(op), next(self._arrivals), op))
+        taken = len(self._oplog)
+        released = []
+        while self._held and (watermark is None or self._held[0][2].ts <= watermark):
+            released.append(heapq.heappop(self._held)[2])
+        for op in released:
+            self._replayed_records.apply(op)
+            if op.op in ("add_e", "del_e"):
+                edge = SlotEdge.from_edge(cast(Edge[T], op.arg))
+                for vertex in edge.vertices:
+                    self._incident.setdefault(vertex, set()).add(edge)
+        # Released operations are sorted, so the late ones come first
+        late = [op for op in released if _op_key(op) < state.last_key]
+        all_changes = state.replay(released[len(late) :])
+        if late:
+            self.repaired_ops += len(late)
+            all_changes.append(
+                state.repair(late, self._replayed_records, self._incident)
+            )
+        state.replayed = taken
+        return GraphChanges.net(all_changes)
+
+    def _catch_up(self, watermark: Optional[int] = None) -> GraphChanges[T]:
+        """Bring the replay state up to date with the log, or up to
+        ``watermark`` in watermark mode, and return the net changes."""
+        if self.reorder_window is not None:
+            return self._release(watermark)
+        if self._state.replayed == len(self._oplog):
+            return GraphChanges()
+        pending = sorted(self._oplog[self._state.replayed :], key=_op_key)
+        if self._state.can_continue_with(pending):
+            return GraphChanges.net(self._state.replay(pending))
+        before = self._state
+        self._state = _ReplayState()
+        self._state.replay(sorted(self._oplog, key=_op_key))
+        return GraphChanges.diff(
+            before.vertices, before.edges, self._state.vertices, self._state.edges
+        )
+
+    @property
+    def _current_state(self) -> _ReplayState[T]:
+        """Replay the operations log as needed to determine which vertices and
+        edges are currently present."""
+        self.catch_up()
+        return self._state
 
     @property
     def vertices(self) -> Iterable[T]:
         """Return the set of vertices that defines this graph"""
-        return self._current_state[0]
+        return frozenset(self._current_state.vertices)
 
     @property
-    def edges(self) -> Iterable[BaseEdge[T]]:
+    def edges(self) -> Iterable[Edge[T]]:
         """Return the set of edges that defines this graph, without the edges
         with an invalid vertex."""
-        return self._current_state[1]
+        return frozenset(e.to_base_edge() for e in self._current_state.edges)
 
     @property
     def components(self) -> Iterable[Mapping[T, Set[T]]]:
         """Return an iterable of all graph components. Each component is
         represented by a mapping from each vertex to its incident edges."""
-        return self._current_state[2]
+        return [
+            {v: set(incident) for v, incident in component.items()}
+            for component in self._current_state.components
+        ]
+
+    def neighbors(self, vertex: T) -> Set[T]:
+        return set(self._current_state.adjacency.get(vertex, ()))
+
+    def degree(self, vertex: T) -> int:
+        return len(self._current_state.adjacency.get(vertex, ()))
+
+    def k_hop(self, vertex: T, k: int) -> Set[T]:
+        return queries.k_hop(self._current_state.adjacency, vertex, k)
+
+    def induced_subgraph(self, vertices: Iterable[T]) -> Dict[T, Set[T]]:
+        return queries.induced_subgraph(self._current_state.adjacency, vertices)
+
+    def to_csr(self) -> "CSR[T]":
+        # pylint: disable=import-outside-toplevel
+        from crdt.lww_graph.csr import build_csr
+
+        return build_csr(self._current_state.adjacency)
+
+    @property
+    def operations(self) -> Sequence[LWWGraphOperation[T]]:
+        """The operations log, in insertion order"""
+        return self._oplog
+
+    def subscribe(self, callback: ChangesCallback) -> Callable[[], None]:
+        """Call ``callback`` with the net changes caused by each subsequent
+        write or batch of operations, including the retroactive changes of late
+        operations. Return a function that cancels the subscription."""
+        self.catch_up()
+        return self._feed.subscribe(callback)
+
+    def changes(self) -> AsyncIterator[GraphChanges[T]]:
+        """Asynchronously iterate over the net changes caused by the writes and
+        batches of operations applied after the iteration started."""
+        self.catch_up()
+        return self._feed.changes()
+
+    def catch_up(self) -> None:
+        """Replay the operations log, as any read does. In watermark mode, the
+        changes of the held operations that it releases are published."""
+        changes = self._catch_up()
+        if changes and self._feed:
+            self._feed.publish(changes)
+
+    def _notify(self) -> None:
+        if self._feed:
+            self._feed.publish(self._catch_up(self.watermark))
+
+    def _admit(self, op: LWWGraphOperation[T]) -> bool:
+        """Whether ``op`` must be appended to the log: it is after the
+        stability frontier and it matters according to the log's records,
+        which are updated with it. Count it as dropped otherwise."""
+        if self._index is None:
+            self._index = GraphTables()
+            for logged in self._oplog:
+                self._index.apply(logged)
+                if self._latest is None or logged.ts > self._latest:
+                    self._latest = logged.ts
+        late = self.frontier is not None and op.ts <= self.frontier
+        if late or not self._index.apply(op):
+            self.dropped_ops += 1
+            return False
+        if self._latest is None or op.ts > self._latest:
+            self._latest = op.ts
+        return True
+
+    def apply(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
+        """Append already timestamped operations (f.e. remote ones) to the
+        log, except those at or before the stability frontier and those that
+        can't change the graph (see ``dropped_ops``)."""
+        self._oplog.extend(op for op in ops if self._admit(op))
+        self._notify()
+
+    def load(self, bulk: "BulkGraph[T]") -> None:
+        """Append the operations adding a static graph, see
+        crdt.lww_graph.loader. If the graph is empty, without a reorder window
+        or a stability frontier, the replay state is installed from the
+        adjacency and the components of ``bulk`` rather than replayed."""
+        ops = bulk.operations()
+        if self._oplog or self.reorder_window is not None or self.frontier is not None:
+            self.apply(ops)
+            return
+        self._oplog.extend(ops)
+        state: _ReplayState[T] = _ReplayState()
+        state.last_op["add_v"] = dict(zip(bulk.vertices, bulk.vertex_timestamps))
+        state.last_op["add_e"] = dict(zip(bulk.edges, bulk.edge_timestamps))
+        state.vertices = set(bulk.vertices)
+        state.edges = set(bulk.edges)
+        # The adjacency and the components hold their own neighbor sets
+        state.adjacency = {v: set(ns) for v, ns in bulk.adjacency.items()}
+        state.components = [
+            {v: set(bulk.adjacency[v]) for v in component}
+            for component in bulk.components
+        ]
+        state.replayed = len(ops)
+        if ops:
+            state.last_key = _op_key(ops[-1])
+        self._state = state
+        if self._feed:
+            self._feed.publish(
+                GraphChanges(
+                    vertices_added=list(bulk.vertices), edges_added=list(bulk.edges)
+                )
+            )
+
+    def compact(self) -> None:
+        """Replace the operations log by the smallest equivalent log."""
+        self._catch_up()
+        self._oplog[:] = _compact_operations(self._oplog)
+        self._state.replayed = len(self._oplog)
+
+    def collect_garbage(self, frontier: int) -> None:
+        """Replace the operations log by the smallest log equivalent to it for
+        all operations later than ``frontier``, and reject earlier ones from
+        now on."""
+        self._catch_up()
+        if self.frontier is not None and frontier <= self.frontier:
+            return
+        self.frontier = frontier
+        tables: GraphTables[T] = GraphTables()
+        for op in self._oplog:
+            tables.apply(op)
+        tables.collect_garbage(frontier)
+        self._oplog[:] = sorted(tables.operations(), key=_op_key)
+        self._index = tables
+        # Replay again, to also drop the tombstones of the replay state
+        self._state = _ReplayState()
+        self._state.replay(self._oplog)
+        if self.reorder_window is not None:
+            self._replayed_records = tables.copy()
+            self._incident = {}
+            for edge in tables.edges:
+                for vertex in edge.vertices:
+                    self._incident.setdefault(vertex, set()).add(edge)
 
     def _record_op(
         self, op: LWWGraphOpName, arg: Union[T, Edge[T]], ts: Optional[int]
     ) -> LWWGraphOperation[T]:
         ts = ts if ts is not None else self.clock.nanoseconds
+        if self.frontier is not None and ts <= self.frontier:
+            raise LWWGraphError(f"Timestamp {ts} is not after the stable frontier")
         operation = LWWGraphOperation[T](op=op, arg=arg, ts=ts)
-        self._oplog.append(operation)
+        if self._admit(operation):
+            self._oplog.append(operation)
+            self._notify()
         return operation
 
     def add_vertex(self, vertex: T, ts: Optional[int] = None) -> LWWGraphOperation[T]:
@@ -0,0 +1,208 @@
+"""LWW-element-graph shown to a client as its confirmed state with its own
+pending operations on top. Applying a local operation to the engine holding
+the whole document, and applying remote operations behind it, is costly for
+the engines that resolve a log in timestamp order: remote operations preceding
+a local one are late. Here, local operations only go to a small overlay, and
+reach the engine once the server confirms them."""
+# pylint: disable=duplicate-code
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Union
+
+from crdt.clock.interface import Clock
+from crdt.lww_graph.edge import Edge, SlotEdge
+from crdt.lww_graph.interface import LWWGraph, T
+from crdt.lww_graph.operation import LWWGraphOperation, LWWGraphOpName
+from crdt.lww_graph.tables import (
+    NO_EDGE,
+    NO_VERTEX,
+    GraphTables,
+    VertexRecord,
+    build_components,
+    edge_is_live,
+    merge_edge_records,
+    merge_vertex_records,
+    vertex_is_live,
+)
+
+
+class OptimisticLWWGraph(LWWGraph[T]):
+    """Client replica made of a confirmed engine, which integrates the remote
+    operations and the confirmed local ones, and of an overlay of the pending
+    local operations. Reads of the elements that pending operations touch
+    merge their records with those of the confirmed operations, which are
+    kept next to the engine, and other reads go to the engine. Local writes,
+    and the rebase of the overlay on remote operations, cost time
+    proportional to the operations, not to the graph.
+
+    ``confirm`` folds the pending operations up to a timestamp into the
+    confirmed engine, once the server acknowledged them."""
+
+    def __init__(self, confirmed: LWWGraph[T], clock: Clock) -> None:
+        """Initialize a graph without pending operations.
+
+        Params
+            confirmed: the engine holding the confirmed state, which must
+                only receive operations through this graph from now on
+            clock: clock used to timestamp local operations
+        """
+        self.confirmed = confirmed
+        self.clock = clock
+        # Records of the confirmed operations, and their edges by vertex
+        self._records: GraphTables[T] = GraphTables()
+        self._incident: Dict[T, Set[SlotEdge[T]]] = {}
+        self._record(getattr(confirmed, "operations", ()))
+        self._pending: GraphTables[T] = GraphTables()
+        # Number of local operations folded into the confirmed engine
+        self.confirmed_ops = 0
+
+    @property
+    def pending(self) -> int:
+        """The number of elements touched by pending operations"""
+        return len(self._pending.vertices) + len(self._pending.edges)
+
+    def _record(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
+        for op in ops:
+            self._records.apply(op)
+            if op.op in ("add_e", "del_e"):
+                edge = SlotEdge.from_edge(op.arg)  # type: ignore
+                for vertex in edge.vertices:
+                    self._incident.setdefault(vertex, set()).add(edge)
+
+    def _vertex_record(self, vertex: T) -> VertexRecord:
+        return merge_vertex_records(
+            self._records.vertices.get(vertex, NO_VERTEX),
+            self._pending.vertices.get(vertex, NO_VERTEX),
+        )
+
+    def _vertex_is_live(self, vertex: T) -> bool:
+        if vertex not in self._pending.vertices:
+            return vertex in self.confirmed
+        return vertex_is_live(self._vertex_record(vertex))
+
+    def _touches(self, edge: SlotEdge[T]) -> bool:
+        return edge in self._pending.edges or any(
+            v in self._pending.vertices for v in edge.vertices
+        )
+
+    def _edge_is_live(self, edge: SlotEdge[T]) -> bool:
+        if not self._touches(edge):
+            return edge in self.confirmed
+        record = merge_edge_records(
+            self._records.edges.get(edge, NO_EDGE),
+            self._pending.edges.get(edge, NO_EDGE),
+        )
+        vertices = {v: self._vertex_record(v) for v in edge.vertices}
+        return edge_is_live(edge, record, vertices)
+
+    def _incident_edges(self, vertex: T) -> Set[SlotEdge[T]]:
+        """The edges of ``vertex`` ever operated on"""
+        edges = set(self._incident.get(vertex, ()))
+        edges.update(e for e in self._pending.edges if vertex in e.vertices)
+        return edges
+
+    @property
+    def vertices(self) -> Iterable[T]:
+        vertices = [
+            v
+            for v in self.confirmed.vertices
+            if v not in self._pending.vertices or self._vertex_is_live(v)
+        ]
+        vertices.extend(
+            v
+            for v in self._pending.vertices
+            if v not in self.confirmed and self._vertex_is_live(v)
+        )
+        return vertices
+
+    @property
+    def edges(self) -> Iterable[Edge[T]]:
+        edges: List[Edge[T]] = [
+            e for e in self.confirmed.edges if not self._touches(SlotEdge.from_edge(e))
+        ]
+        touched = set(self._pending.edges)
+        for vertex in self._pending.vertices:
+            touched.update(self._incident.get(vertex, ()))
+        edges.extend(e.to_base_edge() for e in touched if self._edge_is_live(e))
+        return edges
+
+    @property
+    def components(self) -> Iterable[Mapping[T, Set[T]]]:
+        if not self.pending:
+            return self.confirmed.components
+        return build_components({v: self.neighbors(v) for v in self.vertices})
+
+    def __contains__(self, item: Union[T, Edge[T]]) -> bool:
+        if isinstance(item, Edge):
+            return self._edge_is_live(SlotEdge.from_edge(item))
+        return self._vertex_is_live(item)
+
+    def neighbors(self, vertex: T) -> Set[T]:
+        if not self.pending:
+            return self.confirmed.neighbors(vertex)
+        if not self._vertex_is_live(vertex):
+            return set()
+        candidates = set(self.confirmed.neighbors(vertex))
+        for edge in self._incident_edges(vertex):
+            a, b = edge.vertices
+            candidates.add(b if a == vertex else a)
+        return {n for n in candidates if self._edge_is_live(SlotEdge(vertex, n))}
+
+    def degree(self, vertex: T) -> int:
+        return len(self.neighbors(vertex))
+
+    def apply(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
+        """Integrate remote operations, which rebases the pending ones on
+        them."""
+        ops = list(ops)
+        self.confirmed.apply(ops)
+        self._record(ops)
+
+    def _record_op(
+        self, op: LWWGraphOpName, arg: Union[T, Edge[T]], ts: Optional[int]
+    ) -> LWWGraphOperation[T]:
+        ts = ts if ts is not None else self.clock.nanoseconds
+        operation = LWWGraphOperation[T](op=op, arg=arg, ts=ts)  # type: ignore
+        self._pending.apply(operation)
+        return operation
+
+    def add_vertex(self, vertex: T, ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        return self._record_op("add_v", vertex, ts)
+
+    def add_edge(self, edge: Edge[T], ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        return self._record_op("add_e", edge, ts)
+
+    def remove_vertex(
+        self, vertex: T, ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        return self._record_op("del_v", vertex, ts)
+
+    def remove_edge(
+        self, edge: Edge[T], ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        return self._record_op("del_e", edge, ts)
+
+    def confirm(self, upto: int) -> None:
+        """Fold the pending operations up to timestamp ``upto``, which the
+        server acknowledged, into the confirmed engine."""
+        ops = self._pending.operations()
+        folded = sorted((op for op in ops if op.ts <= upto), key=lambda op: op.ts)
+        if not folded:
+            return
+        self.apply(folded)
+        self.confirmed_ops += len(folded)
+        self._pending = GraphTables()
+        for op in ops:
+            if op.ts > upto:
+                self._pending.apply(op)
+
+    def collect_garbage(self, frontier: int) -> None:
+        """Fold the pending operations up to the stability frontier, which all
+        replicas received, and collect the garbage of the confirmed engine."""
+        self.confirm(frontier)
+        self.confirmed.collect_garbage(frontier)
+        self._records.collect_garbage(frontier)
+        self._incident = {}
+        for edge in self._records.edges:
+            for vertex in edge.vertices:
+                self._incident.setdefault(vertex, set()).add(edge)
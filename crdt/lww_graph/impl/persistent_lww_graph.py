@@ -0,0 +1,394 @@
+"""LWW-element-graph implementation whose whole state lives in persistent
+hash array mapped tries, so that immutable snapshots cost nothing"""
+# pylint: disable=duplicate-code
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from typing import (
+    TYPE_CHECKING,
+    AbstractSet,
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
+
+from crdt.clock.interface import Clock
+from crdt.lww_graph import queries
+from crdt.lww_graph.edge import Edge, SlotEdge
+from crdt.lww_graph.hamt import HAMT, PSet
+from crdt.lww_graph.interface import LWWGraph, LWWGraphError, T
+from crdt.lww_graph.operation import LWWGraphOperation, LWWGraphOpName
+from crdt.lww_graph.tables import (
+    NO_EDGE,
+    NO_VERTEX,
+    EdgeRecord,
+    GraphTables,
+    VertexRecord,
+    build_adjacency,
+    build_components,
+    edge_is_live,
+    merge_edge_op,
+    merge_vertex_op,
+    vertex_is_live,
+)
+
+if TYPE_CHECKING:
+    from crdt.lww_graph.csr import CSR
+    from crdt.lww_graph.loader import BulkGraph
+
+
+class _VertexState(NamedTuple):
+    """Everything known of a vertex, in a single trie entry so that a write
+    updates one entry per vertex it affects"""
+
+    record: VertexRecord
+    # Recorded edges incident to the vertex, whose presence may change with it
+    incident: PSet[SlotEdge[Any]]
+    # Vertices sharing a present edge with it
+    neighbors: PSet[Any]
+
+
+_NO_STATE = _VertexState(NO_VERTEX, PSet(), PSet())
+
+
+class _VertexRecords(Mapping[T, VertexRecord]):
+    """View of the vertex records of a snapshot, to decide edge presence"""
+
+    def __init__(self, states: HAMT[T, _VertexState]) -> None:
+        self._states = states
+
+    def __getitem__(self, vertex: T) -> VertexRecord:
+        return self._states[vertex].record
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._states)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+class _Adjacency(Mapping[T, PSet[T]]):
+    """View of the neighbors of each present vertex of a snapshot"""
+
+    def __init__(self, states: HAMT[T, _VertexState], vertices: PSet[T]) -> None:
+        self._states = states
+        self._vertices = vertices
+
+    def __getitem__(self, vertex: T) -> PSet[T]:
+        if vertex not in self._vertices:
+            raise KeyError(vertex)
+        return self._states[vertex].neighbors
+
+    def __contains__(self, vertex: object) -> bool:
+        return vertex in self._vertices
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._vertices)
+
+    def __len__(self) -> int:
+        return len(self._vertices)
+
+
+@dataclass(frozen=True)
+class GraphSnapshot(Generic[T]):
+    """An immutable version of a PersistentLWWGraph, which can be queried from
+    any thread for as long as it is referenced. Applying an operation returns
+    a new version, sharing all but O(log n) nodes of each trie per element
+    whose presence changes."""
+
+    vertex_states: HAMT[T, _VertexState]
+    edge_records: HAMT[SlotEdge[T], EdgeRecord]
+    vertices: PSet[T]
+    edges: PSet[SlotEdge[T]]
+
+    @classmethod
+    def empty(cls) -> GraphSnapshot[T]:
+        """The version of an empty graph"""
+        return cls(HAMT(), HAMT(), PSet(), PSet())
+
+    @classmethod
+    def from_tables(cls, tables: GraphTables[T]) -> GraphSnapshot[T]:
+        """The version resolving the records of ``tables``"""
+        vertices = tables.live_vertices()
+        edges = tables.live_edges()
+        incident: Dict[T, Set[SlotEdge[T]]] = {}
+        for edge in tables.edges:
+            for vertex in edge.vertices:
+                incident.setdefault(vertex, set()).add(edge)
+        adjacency = build_adjacency(vertices, edges)
+        return cls(
+            vertex_states=HAMT(
+                (
+                    vertex,
+                    _VertexState(
+                        record,
+                        PSet(incident.get(vertex, ())),
+                        PSet(adjacency.get(vertex, ())),
+                    ),
+                )
+                for vertex, record in tables.vertices.items()
+            ),
+            edge_records=HAMT(tables.edges.items()),
+            vertices=PSet(vertices),
+            edges=PSet(edges),
+        )
+
+    def tables(self) -> GraphTables[T]:
+        """Copy the records of this version in mutable tables."""
+        return GraphTables(
+            vertices=dict(_VertexRecords(self.vertex_states).items()),
+            edges=dict(self.edge_records.items()),
+        )
+
+    @property
+    def adjacency(self) -> Mapping[T, AbstractSet[T]]:
+        """Mapping from each vertex to its neighbors"""
+        return _Adjacency(self.vertex_states, self.vertices)
+
+    def __contains__(self, item: Union[T, Edge[T]]) -> bool:
+        if isinstance(item, Edge):
+            return item in self.edges
+        return item in self.vertices
+
+    @cached_property
+    def components(self) -> List[Dict[T, Set[T]]]:
+        """The connected components, resolved on first access"""
+        return build_components({v: set(ns) for v, ns in self.adjacency.items()})
+
+    def neighbors(self, vertex: T) -> Set[T]:
+        """The vertices sharing an edge with ``vertex``"""
+        return set(self.adjacency.get(vertex, ()))
+
+    def degree(self, vertex: T) -> int:
+        """The number of vertices sharing an edge with ``vertex``"""
+        return len(self.adjacency.get(vertex, ()))
+
+    def k_hop(self, vertex: T, k: int) -> Set[T]:
+        """The vertices at most ``k`` edges away from ``vertex``"""
+        return queries.k_hop(self.adjacency, vertex, k)
+
+    def induced_subgraph(self, vertices: Iterable[T]) -> Dict[T, Set[T]]:
+        """The adjacency mapping of the subgraph made of ``vertices``"""
+        adjacency = self.adjacency
+        selected = {v for v in vertices if v in adjacency}
+        return {v: {n for n in adjacency[v] if n in selected} for v in selected}
+
+    def apply(self, op: LWWGraphOperation[T]) -> GraphSnapshot[T]:
+        """Return the version with ``op`` merged, or this one if it changes
+        nothing."""
+        if op.op in ("add_v", "del_v"):
+            vertex: T = op.arg  # type: ignore
+            return self._apply_vertex_op(vertex, op.op, op.ts)
+        edge = SlotEdge.from_edge(op.arg)  # type: ignore
+        return self._apply_edge_op(edge, op.op, op.ts)
+
+    def _apply_vertex_op(
+        self, vertex: T, op: LWWGraphOpName, ts: int
+    ) -> GraphSnapshot[T]:
+        state = self.vertex_states.get(vertex, _NO_STATE)
+        record = merge_vertex_op(state.record, op, ts)
+        if record == state.record:
+            return self
+        states = self.vertex_states.set(vertex, state._replace(record=record))
+        vertices, edges = self.vertices, self.edges
+        live = vertex_is_live(record)
+        if live != (vertex in vertices):
+            vertices = vertices.add(vertex) if live else vertices.discard(vertex)
+        # The presence of the incident edges depends on the vertex additions
+        for edge in state.incident:
+            edge_live = edge_is_live(
+                edge, self.edge_records[edge], _VertexRecords(states)
+            )
+            if edge_live != (edge in edges):
+                edges = edges.add(edge) if edge_live else edges.discard(edge)
+                states = _link(states, edge, edge_live)
+        return GraphSnapshot(states, self.edge_records, vertices, edges)
+
+    def _apply_edge_op(
+        self, edge: SlotEdge[T], op: LWWGraphOpName, ts: int
+    ) -> GraphSnapshot[T]:
+        record = self.edge_records.get(edge, NO_EDGE)
+        new_record = merge_edge_op(record, op, ts)
+        if new_record == record:
+            return self
+        states = self.vertex_states
+        if record is NO_EDGE:
+            for vertex in set(edge.vertices):
+                state = states.get(vertex, _NO_STATE)
+                states = states.set(
+                    vertex, state._replace(incident=state.incident.add(edge))
+                )
+        edges = self.edges
+        live = edge_is_live(edge, new_record, _VertexRecords(states))
+        if live != (edge in edges):
+            edges = edges.add(edge) if live else edges.discard(edge)
+            states = _link(states, edge, live)
+        edge_records = self.edge_records.set(edge, new_record)
+        return GraphSnapshot(states, edge_records, self.vertices, edges)
+
+
+def _link(
+    states: HAMT[T, _VertexState], edge: SlotEdge[T], live: bool
+) -> HAMT[T, _VertexState]:
+    """Make the vertices of ``edge`` neighbors if ``live``, or else not."""
+    ends = (
+        [(edge.a, edge.b)] if edge.a == edge.b else [(edge.a, edge.b), (edge.b, edge.a)]
+    )
+    for vertex, neighbor in ends:
+        state = states[vertex]
+        neighbors = state.neighbors
+        neighbors = neighbors.add(neighbor) if live else neighbors.discard(neighbor)
+        states = states.set(vertex, state._replace(neighbors=neighbors))
+    return states
+
+
+class PersistentLWWGraph(LWWGraph[T]):
+    """LWW-element-graph keeping its records and their resolution (vertices,
+    edges and adjacency) in persistent tries. Each write resolves the elements
+    it affects, and publishes a new version of the graph: ``snapshot`` returns
+    it in constant time, and the version stays queryable, unchanged by later
+    writes, for as long as it is referenced. Readers such as render frames,
+    exports or worker threads thus get stable views without copies or locks."""
+
+    def __init__(self, clock: Clock) -> None:
+        """Initialize an empty graph.
+
+        Params
+            clock: clock used to timestamp local operations
+        """
+        self.clock = clock
+        self._write_lock = threading.Lock()
+        self._snapshot: GraphSnapshot[T] = GraphSnapshot.empty()
+        # Operations at or before this timestamp are rejected, see
+        # collect_garbage
+        self.frontier: Optional[int] = None
+
+    def snapshot(self) -> GraphSnapshot[T]:
+        """The current version of the graph, which later writes don't
+        change"""
+        return self._snapshot
+
+    def __contains__(self, item: Union[T, Edge[T]]) -> bool:
+        return item in self._snapshot
+
+    @property
+    def vertices(self) -> Iterable[T]:
+        return self._snapshot.vertices
+
+    @property
+    def edges(self) -> Iterable[Edge[T]]:
+        return frozenset(e.to_base_edge() for e in self._snapshot.edges)
+
+    @property
+    def components(self) -> Iterable[Mapping[T, Set[T]]]:
+        return [
+            {v: set(incident) for v, incident in component.items()}
+            for component in self._snapshot.components
+        ]
+
+    def neighbors(self, vertex: T) -> Set[T]:
+        return self._snapshot.neighbors(vertex)
+
+    def degree(self, vertex: T) -> int:
+        return self._snapshot.degree(vertex)
+
+    def k_hop(self, vertex: T, k: int) -> Set[T]:
+        return self._snapshot.k_hop(vertex, k)
+
+    def induced_subgraph(self, vertices: Iterable[T]) -> Dict[T, Set[T]]:
+        return self._snapshot.induced_subgraph(vertices)
+
+    def to_csr(self) -> CSR[T]:
+        # pylint: disable=import-outside-toplevel
+        from crdt.lww_graph.csr import build_csr
+
+        return build_csr(self._snapshot.adjacency)
+
+    @property
+    def operations(self) -> Sequence[LWWGraphOperation[T]]:
+        """The smallest operations log equivalent to all operations so far"""
+        return self._snapshot.tables().operations()
+
+    def compact(self) -> None:
+        """Nothing to do: superseded operations are never kept."""
+
+    def collect_garbage(self, frontier: int) -> None:
+        """Forget the records that operations later than ``frontier`` can't
+        need, and reject earlier operations from now on. The earlier versions
+        keep their records."""
+        with self._write_lock:
+            if self.frontier is not None and frontier <= self.frontier:
+                return
+            self.frontier = frontier
+            tables = self._snapshot.tables()
+            tables.collect_garbage(frontier)
+            self._snapshot = GraphSnapshot.from_tables(tables)
+
+    def load(self, bulk: BulkGraph[T]) -> None:
+        """Merge the operations adding a static graph, see
+        crdt.lww_graph.loader. If the graph is empty, without a stability
+        frontier, its version is built at once from the records and the
+        components of ``bulk``."""
+        with self._write_lock:
+            empty = self.frontier is None and not (
+                self._snapshot.vertex_states or self._snapshot.edge_records
+            )
+            if empty:
+                snapshot = GraphSnapshot.from_tables(bulk.tables())
+                # Seed the cached components, which would be resolved on first
+                # access otherwise
+                vars(snapshot)["components"] = [
+                    {v: set(bulk.adjacency[v]) for v in component}
+                    for component in bulk.components
+                ]
+                self._snapshot = snapshot
+        if not empty:
+            self.apply(bulk.operations())
+
+    def apply(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
+        """Merge already timestamped operations, except those at or before the
+        stability frontier, and publish the resulting version."""
+        with self._write_lock:
+            snapshot = self._snapshot
+            for op in ops:
+                if self.frontier is None or op.ts > self.frontier:
+                    snapshot = snapshot.apply(op)
+            self._snapshot = snapshot
+
+    def _record_op(
+        self, op: LWWGraphOpName, arg: Union[T, Edge[T]], ts: Optional[int]
+    ) -> LWWGraphOperation[T]:
+        with self._write_lock:
+            ts = ts if ts is not None else self.clock.nanoseconds
+            if self.frontier is not None and ts <= self.frontier:
+                raise LWWGraphError(f"Timestamp {ts} is not after the stable frontier")
+            operation = LWWGraphOperation[T](op=op, arg=arg, ts=ts)  # type: ignore
+            self._snapshot = self._snapshot.apply(operation)
+        return operation
+
+    def add_vertex(self, vertex: T, ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        return self._record_op("add_v", vertex, ts)
+
+    def add_edge(self, edge: Edge[T], ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        return self._record_op("add_e", edge, ts)
+
+    def remove_vertex(
+        self, vertex: T, ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        return self._record_op("del_v", vertex, ts)
+
+    def remove_edge(
+        self, edge: Edge[T], ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        return self._record_op("del_e", edge, ts)
@@ -0,0 +1,457 @@
+"""LWW-element-graph implementation stored in Redis, that several processes can
+share"""
+# pylint: disable=duplicate-code
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+    cast,
+)
+
+from redis import Redis
+
+from crdt.clock.interface import Clock
+from crdt.lww_graph.edge import Edge, SlotEdge
+from crdt.lww_graph.interface import LWWGraph, LWWGraphError, T
+from crdt.lww_graph.operation import LWWGraphOperation, LWWGraphOpName
+from crdt.lww_graph.tables import (
+    EdgeRecord,
+    GraphTables,
+    VertexRecord,
+    build_adjacency,
+    build_components,
+)
+from crdt.persistence.records import decode_value
+from crdt.persistence.redis_backend import (
+    DEFAULT_BATCH_SIZE,
+    LATER_LUA,
+    encode_atom,
+    encode_timestamp,
+    key,
+    run_batched,
+    scan_atoms,
+)
+
+# Functions shared by the scripts, which are given the key prefix of the graph
+# as KEYS[1]. The records follow the rules of crdt.lww_graph.tables. A vertex
+# record is the timestamp of its last removal, or "-", followed by the sorted
+# timestamps of its additions since. Edges are their two encoded vertices,
+# sorted and joined by a newline, and each vertex has the set of the edges ever
+# recorded on it, and the set of its current neighbors.
+_GRAPH_LUA = (
+    LATER_LUA
+    + """
+local p = KEYS[1]
+local VREC, EADD, EDEL = p .. ':vrec', p .. ':eadd', p .. ':edel'
+local VERTICES, EDGES, FRONTIER = p .. ':vertices', p .. ':edges', p .. ':frontier'
+
+local function vertex_record(v)
+  local raw = redis.call('HGET', VREC, v)
+  local removed, adds = false, {}
+  if raw then
+    for word in string.gmatch(raw, '%S+') do adds[#adds + 1] = word end
+    removed = table.remove(adds, 1)
+    if removed == '-' then removed = false end
+  end
+  return removed, adds
+end
+
+local function endpoints(edge)
+  local i = string.find(edge, '\\n', 1, true)
+  return string.sub(edge, 1, i - 1), string.sub(edge, i + 1)
+end
+
+local function edge_is_live(edge)
+  local added = redis.call('HGET', EADD, edge)
+  if not added or not later(added, redis.call('HGET', EDEL, edge)) then
+    return false
+  end
+  local a, b = endpoints(edge)
+  for _, v in ipairs({a, b}) do
+    local _, adds = vertex_record(v)
+    if #adds == 0 or later(adds[1], added) then return false end
+  end
+  return true
+end
+
+local function refresh_edge(edge)
+  local a, b = endpoints(edge)
+  local command = edge_is_live(edge) and 'SADD' or 'SREM'
+  redis.call(command, EDGES, edge)
+  redis.call(command, p .. ':adj:' .. a, b)
+  redis.call(command, p .. ':adj:' .. b, a)
+end
+
+local function refresh_vertex(v)
+  local _, adds = vertex_record(v)
+  redis.call(#adds > 0 and 'SADD' or 'SREM', VERTICES, v)
+  for _, edge in ipairs(redis.call('SMEMBERS', p .. ':inc:' .. v)) do
+    refresh_edge(edge)
+  end
+end
+"""
+)
+
+# ARGV: operation name, encoded argument and timestamp of each operation.
+# Return the number of late operations, which are ignored.
+_MERGE_LUA = (
+    _GRAPH_LUA
+    + """
+local function merge_vertex(op, v, ts)
+  local removed, adds = vertex_record(v)
+  if removed and not later(ts, removed) then return end
+  if op == 'del_v' then
+    local kept = {}
+    for _, t in ipairs(adds) do
+      if later(t, ts) then kept[#kept + 1] = t end
+    end
+    removed, adds = ts, kept
+  else
+    local position = #adds + 1
+    for i, t in ipairs(adds) do
+      if t == ts then return end
+      if later(t, ts) then
+        position = i
+        break
+      end
+    end
+    table.insert(adds, position, ts)
+  end
+  table.insert(adds, 1, removed or '-')
+  redis.call('HSET', VREC, v, table.concat(adds, ' '))
+  refresh_vertex(v)
+end
+
+local function merge_edge(op, edge, ts)
+  local records = op == 'add_e' and EADD or EDEL
+  if not later(ts, redis.call('HGET', records, edge)) then return end
+  redis.call('HSET', records, edge, ts)
+  local a, b = endpoints(edge)
+  redis.call('SADD', p .. ':inc:' .. a, edge)
+  redis.call('SADD', p .. ':inc:' .. b, edge)
+  refresh_edge(edge)
+end
+
+local frontier = redis.call('GET', FRONTIER)
+local late = 0
+for i = 1, #ARGV, 3 do
+  local op, arg, ts = ARGV[i], ARGV[i + 1], ARGV[i + 2]
+  if frontier and not later(ts, frontier) then
+    late = late + 1
+  elseif op == 'add_v' or op == 'del_v' then
+    merge_vertex(op, arg, ts)
+  else
+    merge_edge(op, arg, ts)
+  end
+end
+return late
+"""
+)
+
+# ARGV: the frontier, then the kind ("v" or "e"), encoded element, previous
+# record and collected record ("" to forget it) of each record to replace. A
+# record changed since it was read is left as is. Edge records are their
+# last addition and last removal, "-" when missing.
+_COLLECT_LUA = (
+    _GRAPH_LUA
+    + """
+if later(ARGV[1], redis.call('GET', FRONTIER)) then
+  redis.call('SET', FRONTIER, ARGV[1])
+end
+
+local function set_field(hash, field, value)
+  if value == '-' then
+    redis.call('HDEL', hash, field)
+  else
+    redis.call('HSET', hash, field, value)
+  end
+end
+
+for i = 2, #ARGV, 4 do
+  local kind, element, previous, collected = ARGV[i], ARGV[i + 1], ARGV[i + 2], ARGV[i + 3]
+  if kind == 'v' then
+    if (redis.call('HGET', VREC, element) or '') == previous then
+      if collected == '' then
+        redis.call('HDEL', VREC, element)
+      else
+        redis.call('HSET', VREC, element, collected)
+      end
+    end
+  else
+    local current = (redis.call('HGET', EADD, element) or '-') .. ' ' ..
+      (redis.call('HGET', EDEL, element) or '-')
+    if current == previous then
+      local added, removed = string.match(collected, '(%S+) (%S+)')
+      if collected == '' then
+        added, removed = '-', '-'
+        local a, b = endpoints(element)
+        redis.call('SREM', p .. ':inc:' .. a, element)
+        redis.call('SREM', p .. ':inc:' .. b, element)
+      end
+      set_field(EADD, element, added)
+      set_field(EDEL, element, removed)
+    end
+  end
+end
+return 0
+"""
+)
+
+
+def _encode_vertex_record(record: Optional[VertexRecord]) -> str:
+    if record is None:
+        return ""
+    removed, added = record
+    return " ".join(["-" if removed is None else str(removed), *map(str, added)])
+
+
+def _decode_vertex_record(raw: bytes) -> VertexRecord:
+    removed, *added = raw.decode().split()
+    return None if removed == "-" else int(removed), tuple(map(int, added))
+
+
+def _encode_edge_record(record: Optional[EdgeRecord]) -> str:
+    if record is None:
+        return ""
+    return " ".join("-" if ts is None else str(ts) for ts in record)
+
+
+class RedisLWWGraph(LWWGraph[T]):
+    """LWW-element-graph keeping the records of its vertices and edges in Redis
+    hashes, and its live vertices, edges and adjacency in Redis sets.
+    Operations are merged by a Lua script that compares timestamps and updates
+    the live sets atomically, so any number of processes can write to and read
+    from the same graph, without replaying its history. Reads are streamed,
+    and neighborhood queries only read the neighborhood explored."""
+
+    def __init__(
+        self,
+        client: Redis,
+        name: str,
+        clock: Clock,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        """Open the graph ``name``, which is empty if it doesn't exist yet.
+
+        Params
+            client: connection to the Redis server
+            name: name of the graph, shared by all its replicas
+            clock: clock used to timestamp local operations
+            batch_size: number of operations merged per script call, and of
+                elements read per scan
+        """
+        self.client = client
+        self.name = name
+        self.clock = clock
+        self.batch_size = batch_size
+        self._prefix = key(name, "graph")
+        self._merge = client.register_script(_MERGE_LUA)
+        self._collect = client.register_script(_COLLECT_LUA)
+
+    def _key(self, suffix: str) -> str:
+        return f"{self._prefix}:{suffix}"
+
+    @staticmethod
+    def _encode_edge(edge: Edge[T]) -> str:
+        return "\n".join(sorted(encode_atom(v) for v in edge.vertices))
+
+    @staticmethod
+    def _decode_edge(data: bytes) -> SlotEdge[T]:
+        a, b = data.split(b"\n")
+        return SlotEdge(decode_value(a), decode_value(b))
+
+    @property
+    def frontier(self) -> Optional[int]:
+        """Operations at or before this timestamp are rejected, see
+        collect_garbage"""
+        frontier = cast(Optional[bytes], self.client.get(self._key("frontier")))
+        return None if frontier is None else int(frontier)
+
+    @property
+    def vertices(self) -> Iterable[T]:
+        """Stream the vertices of the graph."""
+        return scan_atoms(self.client, self._key("vertices"), self.batch_size)
+
+    def _scan_edges(self) -> Iterator[SlotEdge[T]]:
+        for data in self.client.sscan_iter(self._key("edges"), count=self.batch_size):
+            yield self._decode_edge(data)
+
+    @property
+    def edges(self) -> Iterable[Edge[T]]:
+        """Stream the edges of the graph."""
+        return (e.to_base_edge() for e in self._scan_edges())
+
+    @property
+    def components(self) -> Iterable[Mapping[T, Set[T]]]:
+        adjacency = build_adjacency(set(self.vertices), set(self._scan_edges()))
+        return build_components(adjacency)
+
+    def __contains__(self, item: Union[T, Edge[T]]) -> bool:
+        if isinstance(item, Edge):
+            return bool(
+                self.client.sismember(self._key("edges"), self._encode_edge(item))
+            )
+        return bool(self.client.sismember(self._key("vertices"), encode_atom(item)))
+
+    def _neighbors_of(self, vertices: Sequence[T]) -> List[Optional[Set[T]]]:
+        """Neighbors of each vertex, or None for those not in the graph"""
+        pipeline = self.client.pipeline(transaction=False)
+        for v in vertices:
+            pipeline.sismember(self._key("vertices"), encode_atom(v))
+            pipeline.smembers(self._key(f"adj:{encode_atom(v)}"))
+        results = pipeline.execute()
+        return [
+            {decode_value(n) for n in neighbors} if present else None
+            for present, neighbors in zip(results[::2], results[1::2])
+        ]
+
+    def neighbors(self, vertex: T) -> Set[T]:
+        return self._neighbors_of([vertex])[0] or set()
+
+    def degree(self, vertex: T) -> int:
+        return len(self.neighbors(vertex))
+
+    def k_hop(self, vertex: T, k: int) -> Set[T]:
+        """Explore the neighborhood breadth-first, reading each level with one
+        pipeline."""
+        if vertex not in self:
+            return set()
+        reached = {vertex}
+        frontier = [vertex]
+        for _ in range(k):
+            next_frontier = []
+            for neighbors in self._neighbors_of(frontier):
+                for neighbor in neighbors or ():
+                    if neighbor not in reached:
+                        reached.add(neighbor)
+                        next_frontier.append(neighbor)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return reached
+
+    def induced_subgraph(self, vertices: Iterable[T]) -> Dict[T, Set[T]]:
+        selected = list(set(vertices))
+        adjacency = {
+            v: neighbors
+            for v, neighbors in zip(selected, self._neighbors_of(selected))
+            if neighbors is not None
+        }
+        return {v: neighbors & adjacency.keys() for v, neighbors in adjacency.items()}
+
+    def _tables(self) -> GraphTables[T]:
+        tables: GraphTables[T] = GraphTables()
+        count = self.batch_size
+        for data, raw in self.client.hscan_iter(self._key("vrec"), count=count):
+            tables.vertices[decode_value(data)] = _decode_vertex_record(raw)
+        added, removed = (
+            {
+                self._decode_edge(data): int(ts)
+                for data, ts in self.client.hscan_iter(self._key(suffix), count=count)
+            }
+            for suffix in ("eadd", "edel")
+        )
+        for edge in added.keys() | removed.keys():
+            tables.edges[edge] = added.get(edge), removed.get(edge)
+        return tables
+
+    @property
+    def operations(self) -> Sequence[LWWGraphOperation[T]]:
+        """The smallest operations log equivalent to all operations so far"""
+        return self._tables().operations()
+
+    def compact(self) -> None:
+        """Nothing to do: superseded operations are never kept."""
+
+    def collect_garbage(self, frontier: int) -> None:
+        """Set the frontier, so that earlier operations are rejected, then
+        replace the records that can be collected. Records written to since
+        they were read are skipped, and collected by a later call."""
+        keys = [self._prefix]
+        self._collect(keys=keys, args=[encode_timestamp(frontier)])
+        tables = self._tables()
+        collected = tables.copy()
+        collected.collect_garbage(frontier)
+        changes: List[Any] = []
+        for vertex, v_record in tables.vertices.items():
+            new_v_record = collected.vertices.get(vertex)
+            if new_v_record != v_record:
+                changes += [
+                    "v",
+                    encode_atom(vertex),
+                    _encode_vertex_record(v_record),
+                    _encode_vertex_record(new_v_record),
+                ]
+        for edge, e_record in tables.edges.items():
+            new_e_record = collected.edges.get(edge)
+            if new_e_record != e_record:
+                changes += [
+                    "e",
+                    self._encode_edge(edge),
+                    _encode_edge_record(e_record),
+                    _encode_edge_record(new_e_record),
+                ]
+        for start in range(0, len(changes), 4 * self.batch_size):
+            self._collect(
+                keys=keys,
+                args=[encode_timestamp(frontier)]
+                + changes[start : start + 4 * self.batch_size],
+            )
+
+    def apply(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
+        """Merge already timestamped operations, except those at or before the
+        stability frontier."""
+        self._apply(ops)
+
+    def _apply(self, ops: Iterable[LWWGraphOperation[T]]) -> int:
+        """Merge operations, and return the number of late ones."""
+        return sum(
+            run_batched(
+                self.client,
+                self._merge,
+                [self._prefix],
+                (
+                    (
+                        op.op,
+                        self._encode_edge(op.arg)  # type: ignore
+                        if isinstance(op.arg, Edge)
+                        else encode_atom(op.arg),
+                        encode_timestamp(op.ts),
+                    )
+                    for op in ops
+                ),
+                self.batch_size,
+            )
+        )
+
+    def _record_op(
+        self, op: LWWGraphOpName, arg: Union[T, Edge[T]], ts: Optional[int]
+    ) -> LWWGraphOperation[T]:
+        ts = ts if ts is not None else self.clock.nanoseconds
+        operation = LWWGraphOperation[T](op=op, arg=arg, ts=ts)  # type: ignore
+        if self._apply([operation]):
+            raise LWWGraphError(f"Timestamp {ts} is not after the stable frontier")
+        return operation
+
+    def add_vertex(self, vertex: T, ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        return self._record_op("add_v", vertex, ts)
+
+    def add_edge(self, edge: Edge[T], ts: Optional[int] = None) -> LWWGraphOperation[T]:
+        return self._record_op("add_e", edge, ts)
+
+    def remove_vertex(
+        self, vertex: T, ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        return self._record_op("del_v", vertex, ts)
+
+    def remove_edge(
+        self, edge: Edge[T], ts: Optional[int] = None
+    ) -> LWWGraphOperation[T]:
+        return self._record_op("del_e", edge, ts)
@@ -8,6 +8,9 @@ from __future__ import annotations
 
 from abc import abstractmethod
 from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Callable,
     Dict,
     Iterable,
     List,
@@ -19,9 +22,15 @@ from typing import (
     Union,
 )
 
+from crdt.clock.interface import Clock
+from crdt.lww_graph import queries
 from crdt.lww_graph.edge import Edge, FrozenEdge
+from crdt.lww_graph.feed import ChangesCallback, GraphChanges
 from crdt.lww_graph.operation import LWWGraphOperation
 
+if TYPE_CHECKING:
+    from crdt.lww_graph.csr import CSR
+
 T = TypeVar("T")
 
 
@@ -41,6 +50,8 @@ class LWWGraph(Protocol[T]):
     restore the previously cascaded edge deletions.
     """
 
+    clock: Clock
+
     @property
     @abstractmethod
     def vertices(self) -> Iterable[T]:
@@ -76,6 +87,73 @@ class LWWGraph(Protocol[T]):
     ) -> LWWGraphOperation[T]:
         ...
 
+    def apply(self, ops: Iterable[LWWGraphOperation[T]]) -> None:
+        """Integrate already timestamped operations, f.e. received from a
+        remote replica."""
+
+    def collect_garbage(self, frontier: int) -> None:
+        """Forget the tombstones and superseded additions that operations later
+        than ``frontier`` can't need, and reject earlier operations from then
+        on. All operations up to ``frontier`` must have been applied, and no
+        replica may generate earlier ones: it is a stability frontier."""
+
+    # The following queries are implemented on top of ``components``, which
+    # costs time proportional to the graph size. Implementations that index
+    # adjacency should override them.
+
+    def neighbors(self, vertex: T) -> Set[T]:
+        """Return the vertices adjacent to ``vertex``, or an empty set if it is
+        not in the graph."""
+        for component in self.components:
+            if vertex in component:
+                return set(component[vertex])
+        return set()
+
+    def degree(self, vertex: T) -> int:
+        return len(self.neighbors(vertex))
+
+    def k_hop(self, vertex: T, k: int) -> Set[T]:
+        """Return the vertices at most ``k`` edges away from ``vertex``,
+        including itself if it is in the graph."""
+        for component in self.components:
+            if vertex in component:
+                return queries.k_hop(component, vertex, k)
+        return set()
+
+    def induced_subgraph(self, vertices: Iterable[T]) -> Dict[T, Set[T]]:
+        """Return the subgraph made of ``vertices`` and the edges between them,
+        mapping each vertex to its neighbors in the subgraph."""
+        adjacency: Dict[T, Set[T]] = {}
+        for component in self.components:
+            adjacency.update(component)
+        return queries.induced_subgraph(adjacency, vertices)
+
+    def to_csr(self) -> CSR[T]:
+        """Export the adjacency of the graph in compressed sparse row format,
+        see ``crdt.lww_graph.csr``, which requires numpy."""
+        # pylint: disable=import-outside-toplevel
+        from crdt.lww_graph.csr import build_csr
+
+        adjacency: Dict[T, Set[T]] = {}
+        for component in self.components:
+            adjacency.update(component)
+        return build_csr(adjacency)
+
+
+class ObservableLWWGraph(LWWGraph[T], Protocol):
+    """LWW-element-graph that publishes the net changes caused by each write
+    or batch of applied operations"""
+
+    def subscribe(self, callback: ChangesCallback) -> Callable[[], None]:
+        """Register a callback, and return a function that cancels it."""
+
+    def changes(self) -> AsyncIterator[GraphChanges[T]]:
+        ...
+
+    def catch_up(self) -> None:
+        """Publish the changes of the operations that the graph holds back from
+        its feed, if any, so that its observers follow its current state."""
+
 
 def _backtrack(backtracking_map: Dict[T, T], end: T, start: T) -> List[Edge[T]]:
     reverse_path = []
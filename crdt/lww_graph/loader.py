@@ -0,0 +1,219 @@
+"""Bulk loading of large static graphs, such as imported datasets, from edge
+lists. Adding each element with ``add_vertex`` and ``add_edge`` validates one
+operation and reads the clock per element, and the log-based graph then sorts
+and replays all of them on the first read. ``load_edges`` instead interns the
+vertices with numpy, takes the timestamps of all the operations from a single
+clock reservation, or from the nanoseconds following one clock reading, and
+computes the adjacency and the connected components at once, the latter with a
+vectorized union-find. Engines install
+the result as their resolved state, which is the same as if each vertex, then
+each edge, had been added in turn. Requires numpy."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from os import PathLike
+from typing import Any, Dict, Generic, Iterable, List, Set, Tuple, Union
+
+import numpy as np
+
+from crdt.clock.interface import Clock
+from crdt.lww_graph.edge import BaseEdge, SlotEdge
+from crdt.lww_graph.interface import LWWGraph, T
+from crdt.lww_graph.operation import LWWGraphOperation
+from crdt.lww_graph.tables import GraphTables
+
+INDEX_DTYPE = np.int64
+
+
+def read_edge_list(
+    path: Union[str, PathLike],
+    delimiter: Union[str, None] = None,
+    comments: str = "#",
+    skiprows: int = 0,
+    dtype: Any = str,
+) -> np.ndarray:
+    """Read the first two columns of a text file as an array with one edge per
+    row: a whitespace-separated edge list by default, or a CSV file with
+    ``delimiter=","`` (and ``skiprows=1`` to skip its header). Vertices are
+    read as strings, unless ``dtype`` is f.e. ``np.int64``."""
+    return np.loadtxt(
+        path,
+        dtype=dtype,
+        delimiter=delimiter,
+        comments=comments,
+        skiprows=skiprows,
+        usecols=(0, 1),
+        ndmin=2,
+    )
+
+
+@dataclass(frozen=True, eq=False)
+class BulkGraph(Generic[T]):
+    """A static graph ready to be installed in an engine: adding ``vertices``
+    then ``edges`` in turn, each with the next timestamp of ``timestamps``,
+    resolves to ``adjacency``, whose connected components are the groups of
+    vertices of ``components``."""
+
+    vertices: List[T]
+    edges: List[SlotEdge[T]]
+    timestamps: range
+    adjacency: Dict[T, Set[T]]
+    components: List[List[T]]
+
+    @property
+    def vertex_timestamps(self) -> range:
+        """The timestamps of the vertex additions"""
+        return self.timestamps[: len(self.vertices)]
+
+    @property
+    def edge_timestamps(self) -> range:
+        """The timestamps of the edge additions"""
+        return self.timestamps[len(self.vertices) :]
+
+    def operations(self) -> List[LWWGraphOperation[T]]:
+        """The operations adding the graph, in timestamp order. They are valid
+        by construction, and built without validation."""
+        ops: List[LWWGraphOperation[T]] = [
+            LWWGraphOperation.construct(op="add_v", arg=vertex, ts=ts)
+            for vertex, ts in zip(self.vertices, self.vertex_timestamps)
+        ]
+        ops.extend(
+            LWWGraphOperation.construct(
+                op="add_e", arg=BaseEdge.construct(a=edge.a, b=edge.b), ts=ts
+            )
+            for edge, ts in zip(self.edges, self.edge_timestamps)
+        )
+        return ops
+
+    def tables(self) -> GraphTables[T]:
+        """The records of the operations adding the graph"""
+        return GraphTables(
+            vertices={
+                vertex: (None, (ts,))
+                for vertex, ts in zip(self.vertices, self.vertex_timestamps)
+            },
+            edges={
+                edge: (ts, None) for edge, ts in zip(self.edges, self.edge_timestamps)
+            },
+        )
+
+
+def _intern(
+    edges: Union[np.ndarray, Iterable[Tuple[T, T]]], vertices: Iterable[T]
+) -> Tuple[List[T], np.ndarray]:
+    """Number the vertices in order of first appearance, ``vertices`` first,
+    and return them with the array of the numbered edges."""
+    if isinstance(edges, np.ndarray):
+        extra = list(vertices)
+        values = edges[:, :2].ravel()
+        if extra:
+            values = np.concatenate([np.asarray(extra), values])
+        unique, first, inverse = np.unique(
+            values, return_index=True, return_inverse=True
+        )
+        order = np.argsort(first, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        ids = rank[inverse.ravel()][len(extra) :]
+        return unique[order].tolist(), ids.reshape(-1, 2).astype(INDEX_DTYPE)
+    numbers: Dict[T, int] = {}
+    for vertex in vertices:
+        numbers.setdefault(vertex, len(numbers))
+    pairs = [
+        (numbers.setdefault(a, len(numbers)), numbers.setdefault(b, len(numbers)))
+        for a, b in edges
+    ]
+    return list(numbers), np.array(pairs, dtype=INDEX_DTYPE).reshape(-1, 2)
+
+
+def _component_labels(a: np.ndarray, b: np.ndarray, count: int) -> np.ndarray:
+    """Label each of ``count`` vertices with the smallest vertex of its
+    connected component. Each round hooks the root of the greater endpoint of
+    each edge under that of the smaller one, and compresses the paths by
+    pointer jumping, until the endpoints of all edges share their root."""
+    parent = np.arange(count, dtype=INDEX_DTYPE)
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        split = root_a != root_b
+        if not split.any():
+            return parent
+        np.minimum.at(
+            parent,
+            np.maximum(root_a, root_b)[split],
+            np.minimum(root_a, root_b)[split],
+        )
+        grandparent = parent[parent]
+        while not np.array_equal(grandparent, parent):
+            parent = grandparent
+            grandparent = parent[parent]
+
+
+def _group_names(names: List[T], keys: np.ndarray, values: np.ndarray) -> List[List[T]]:
+    """Group the names of the vertex numbers ``values`` by the vertex numbers
+    ``keys``: the ``i``-th group is that of vertex ``i``."""
+    order = np.argsort(keys, kind="stable")
+    ordered = [names[i] for i in values[order].tolist()]
+    ends = np.cumsum(np.bincount(keys, minlength=len(names))).tolist()
+    return [ordered[start:end] for start, end in zip([0] + ends[:-1], ends)]
+
+
+def _reserve(clock: Clock, count: int) -> range:
+    reserve = getattr(clock, "reserve", None)
+    if reserve is not None:
+        return reserve(count)
+    # Start after the operations timestamped so far, and wait for the clock to
+    # pass the last timestamp, so that later operations come after all of them
+    start = clock.nanoseconds
+    while count > 1 and clock.nanoseconds < start + count:
+        pass
+    return range(start, start + count)
+
+
+def prepare_edges(
+    edges: Union[np.ndarray, Iterable[Tuple[T, T]]],
+    clock: Clock,
+    vertices: Iterable[T] = (),
+) -> BulkGraph[T]:
+    """Prepare the graph made of ``edges``, an array with one edge per row (see
+    read_edge_list) or an iterable of vertex pairs, and of the isolated
+    ``vertices``. Duplicate edges are only added once.
+
+    Timestamps are reserved from the clock if it supports it, like
+    HybridLogicalClock. Otherwise, they start at a reading of the clock, after
+    the operations it timestamped before, and the clock is read until it
+    passes them, so that the operations it timestamps next come after them."""
+    names, numbered = _intern(edges, vertices)
+    count = len(names)
+    a, b = numbered[:, 0], numbered[:, 1]
+    # Keep the first occurrence of each edge, in either direction
+    keys = np.minimum(a, b) * count + np.maximum(a, b)
+    first = np.sort(np.unique(keys, return_index=True)[1])
+    a, b = a[first], b[first]
+    # Each edge is listed from both ends in the neighbors
+    neighbors = _group_names(names, np.concatenate([a, b]), np.concatenate([b, a]))
+    labels = _component_labels(a, b, count)
+    components = _group_names(names, labels, np.arange(count))
+    return BulkGraph(
+        vertices=names,
+        edges=[SlotEdge(names[i], names[j]) for i, j in zip(a.tolist(), b.tolist())],
+        timestamps=_reserve(clock, count + len(a)),
+        adjacency={vertex: set(group) for vertex, group in zip(names, neighbors)},
+        components=[component for component in components if component],
+    )
+
+
+def load_edges(
+    graph: LWWGraph[T],
+    edges: Union[np.ndarray, Iterable[Tuple[T, T]]],
+    vertices: Iterable[T] = (),
+) -> BulkGraph[T]:
+    """Add the graph made of ``edges`` and of the isolated ``vertices`` to
+    ``graph`` (see prepare_edges), and return it. Engines that can install it
+    directly do so when they are empty, the others apply its operations."""
+    bulk = prepare_edges(edges, graph.clock, vertices)
+    load = getattr(graph, "load", None)
+    if load is not None:
+        load(bulk)
+    else:
+        graph.apply(bulk.operations())
+    return bulk
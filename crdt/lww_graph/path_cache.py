@@ -0,0 +1,128 @@
+"""Cache of breadth-first search trees, for repeated path and connectivity
+queries from the same source vertices. The trees are kept up to date with the
+change feed of the graph, which only discards the trees that a change
+actually alters."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Generic, List, Optional
+
+from crdt.lww_graph.edge import Edge, FrozenEdge
+from crdt.lww_graph.feed import GraphChanges
+from crdt.lww_graph.interface import LWWGraphError, ObservableLWWGraph, T
+
+
+@dataclass
+class _BFSTree(Generic[T]):
+    """Shortest paths from a source to every vertex of its component"""
+
+    source: T
+    # Mapping: reached vertex -> its parent in the tree (None for the source)
+    parents: Dict[T, Optional[T]] = field(default_factory=dict)
+    # Mapping: reached vertex -> its distance to the source
+    depths: Dict[T, int] = field(default_factory=dict)
+
+    def is_altered_by(self, changes: GraphChanges[T]) -> bool:
+        """Whether the tree may no longer give shortest paths to all the
+        vertices reachable from its source after ``changes``. Removing an edge
+        outside of the tree, or adding one between vertices at the same or at
+        consecutive depths, leaves it valid."""
+        depths = self.depths
+        if any(v in depths for v in changes.vertices_removed):
+            return True
+        for edge in changes.edges_removed:
+            a, b = edge.vertices
+            if self.parents.get(a) == b or self.parents.get(b) == a:
+                return True
+        for edge in changes.edges_added:
+            a, b = edge.vertices
+            if (a in depths or b in depths) and not (
+                a in depths and b in depths and abs(depths[a] - depths[b]) <= 1
+            ):
+                return True
+        return False
+
+
+class PathCache(Generic[T]):
+    """Answers path and connectivity queries on an observable graph by walking
+    the BFS trees of the least recently queried sources. Building a tree costs
+    as much as a search of the component of its source, and later queries from
+    the same source cost as much as the length of the path returned."""
+
+    def __init__(self, graph: ObservableLWWGraph[T], capacity: int = 64) -> None:
+        """Initialize an empty cache, that follows the changes of ``graph``.
+
+        Params
+            graph: the graph queried
+            capacity: maximal number of cached trees
+        """
+        if capacity < 1:
+            raise LWWGraphError("A path cache must hold at least one tree")
+        self.graph = graph
+        self.capacity = capacity
+        self._trees: OrderedDict[T, _BFSTree[T]] = OrderedDict()
+        self._unsubscribe = graph.subscribe(self._invalidate)
+
+    def __len__(self) -> int:
+        return len(self._trees)
+
+    def _invalidate(self, changes: GraphChanges[T]) -> None:
+        for source in [s for s, t in self._trees.items() if t.is_altered_by(changes)]:
+            del self._trees[source]
+
+    def _build(self, source: T) -> _BFSTree[T]:
+        tree: _BFSTree[T] = _BFSTree(source, {source: None}, {source: 0})
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for vertex in frontier:
+                for neighbor in self.graph.neighbors(vertex):
+                    if neighbor not in tree.parents:
+                        tree.parents[neighbor] = vertex
+                        tree.depths[neighbor] = depth
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return tree
+
+    def _tree(self, source: T) -> Optional[_BFSTree[T]]:
+        """The tree of ``source``, built if needed, or None if ``source`` is not
+        in the graph."""
+        # Operations held back from the feed may alter the cached trees
+        self.graph.catch_up()
+        tree = self._trees.get(source)
+        if tree is not None:
+            self._trees.move_to_end(source)
+            return tree
+        if source not in self.graph:
+            return None
+        tree = self._trees[source] = self._build(source)
+        if len(self._trees) > self.capacity:
+            self._trees.popitem(last=False)
+        return tree
+
+    def connected(self, a: T, b: T) -> bool:
+        """Whether there is a path from ``a`` to ``b``"""
+        tree = self._tree(a)
+        return tree is not None and b in tree.parents
+
+    def find_path(self, a: T, b: T) -> Optional[List[Edge[T]]]:
+        """Return the edges of a shortest path from ``a`` to ``b``, or None if
+        there is no such path."""
+        tree = self._tree(a)
+        if tree is None or b not in tree.parents:
+            return None
+        reverse_path: List[Edge[T]] = []
+        vertex = b
+        parent = tree.parents[vertex]
+        while parent is not None:
+            reverse_path.append(FrozenEdge(parent, vertex))
+            vertex, parent = parent, tree.parents[parent]
+        return list(reversed(reverse_path))
+
+    def close(self) -> None:
+        """Stop following the changes of the graph, and drop all trees."""
+        self._unsubscribe()
+        self._trees.clear()
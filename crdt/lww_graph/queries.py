@@ -0,0 +1,35 @@
+"""Neighborhood queries on the adjacency mapping of a graph, which maps each
+vertex to the set of its neighbors. They only explore the part of the mapping
+they return."""
+from typing import AbstractSet, Dict, Iterable, Mapping, Set, TypeVar
+
+T = TypeVar("T")
+
+
+def k_hop(adjacency: Mapping[T, AbstractSet[T]], vertex: T, k: int) -> Set[T]:
+    """Return the vertices at most ``k`` edges away from ``vertex``, including
+    itself if it is in the graph."""
+    if vertex not in adjacency:
+        return set()
+    reached = {vertex}
+    frontier = [vertex]
+    for _ in range(k):
+        next_frontier = []
+        for v in frontier:
+            for neighbor in adjacency[v]:
+                if neighbor not in reached:
+                    reached.add(neighbor)
+                    next_frontier.append(neighbor)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    return reached
+
+
+def induced_subgraph(
+    adjacency: Mapping[T, Set[T]], vertices: Iterable[T]
+) -> Dict[T, Set[T]]:
+    """Return the adjacency mapping of the subgraph made of ``vertices`` (those
+    that are in the graph) and the edges between them."""
+    selected = {v for v in vertices if v in adjacency}
+    return {v: adjacency[v] & selected for v in selected}
@@ -0,0 +1,266 @@
+"""Order-independent resolution of LWW-element-graphs. Instead of replaying a
+sorted operations log, the state of a graph is derived from per-element tables
+of timestamps, which can be updated in any order, split by element and merged
+back.
+
+A vertex is present iff it was added after its last removal (removals win
+ties). An edge is present iff it was added after its last removal, and each of
+its vertices was removed before the edge addition and added again after that
+removal but no later than the edge addition. This is the outcome of replaying
+the log, including the cascading removal of edges by vertex removals, and why
+all the additions of a vertex since its last removal are kept: a late vertex
+removal may fall between two of them.
+
+Once all replicas have received every operation up to a stability frontier, and
+will only generate later ones, the records can forget what no later operation
+can revive: removals and additions older than the frontier that are superseded,
+and the elements that are gone for good."""
+from __future__ import annotations
+
+from bisect import insort
+from dataclasses import dataclass, field
+from typing import (
+    Dict,
+    Generic,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from crdt.lww_graph.edge import Edge, SlotEdge
+from crdt.lww_graph.operation import LWWGraphOperation, LWWGraphOpName
+
+T = TypeVar("T")
+
+# Timestamp of the last removal of a vertex, and sorted timestamps of its
+# additions since. Records are immutable, so tables can be copied cheaply.
+VertexRecord = Tuple[Optional[int], Tuple[int, ...]]
+# Timestamps of the last addition and of the last removal of an edge
+EdgeRecord = Tuple[Optional[int], Optional[int]]
+
+NO_VERTEX: VertexRecord = (None, ())
+NO_EDGE: EdgeRecord = (None, None)
+
+
+def _latest(first: Optional[int], second: Optional[int]) -> Optional[int]:
+    if first is None or (second is not None and second > first):
+        return second
+    return first
+
+
+def merge_vertex_op(record: VertexRecord, op: LWWGraphOpName, ts: int) -> VertexRecord:
+    """Return ``record`` updated with an operation on its vertex."""
+    removed, added = record
+    if removed is not None and ts <= removed:
+        return record
+    if op == "del_v":
+        return ts, tuple(t for t in added if t > ts)
+    if ts in added:
+        return record
+    new_added = list(added)
+    insort(new_added, ts)
+    return removed, tuple(new_added)
+
+
+def merge_edge_op(record: EdgeRecord, op: LWWGraphOpName, ts: int) -> EdgeRecord:
+    """Return ``record`` updated with an operation on its edge."""
+    added, removed = record
+    if op == "add_e":
+        return _latest(added, ts), removed
+    return added, _latest(removed, ts)
+
+
+def merge_vertex_records(first: VertexRecord, second: VertexRecord) -> VertexRecord:
+    """Merge the records of the same vertex made from two sets of operations."""
+    removed = _latest(first[0], second[0])
+    added = {t for t in first[1] + second[1] if removed is None or t > removed}
+    return removed, tuple(sorted(added))
+
+
+def merge_edge_records(first: EdgeRecord, second: EdgeRecord) -> EdgeRecord:
+    """Merge the records of the same edge made from two sets of operations."""
+    return _latest(first[0], second[0]), _latest(first[1], second[1])
+
+
+def vertex_is_live(record: VertexRecord) -> bool:
+    """Whether the vertex of ``record`` is present"""
+    return bool(record[1])
+
+
+def edge_is_live(
+    edge: Edge[T], record: EdgeRecord, vertices: Mapping[T, VertexRecord]
+) -> bool:
+    """Whether ``edge`` is present, given the records of its vertices"""
+    added, removed = record
+    if added is None or (removed is not None and added <= removed):
+        return False
+    for vertex in edge.vertices:
+        # All additions since the last removal are recorded, so the vertex was
+        # removed before the edge addition iff its first recorded addition is.
+        vertex_added = vertices.get(vertex, NO_VERTEX)[1]
+        if not vertex_added or vertex_added[0] > added:
+            return False
+    return True
+
+
+def collect_vertex_record(
+    record: VertexRecord, frontier: int
+) -> Optional[VertexRecord]:
+    """Return ``record`` without what operations later than ``frontier`` can't
+    need, or None if the vertex can be forgotten."""
+    removed, added = record
+    # The first addition since the removal decides which edges are present
+    added = added[:1] + tuple(t for t in added[1:] if t > frontier)
+    if removed is not None and removed <= frontier:
+        # A later removal would supersede it anyway
+        return (None, added) if added else None
+    return removed, added
+
+
+def collect_edge_record(
+    edge: Edge[T], record: EdgeRecord, vertices: Dict[T, VertexRecord], frontier: int
+) -> Optional[EdgeRecord]:
+    """Return ``record`` without what operations later than ``frontier`` can't
+    need, or None if the edge can be forgotten."""
+    added, removed = record
+    if removed is not None and removed <= frontier:
+        if added is None or added <= removed:
+            return None
+        record = added, None
+    # An absent edge only comes back with a new addition, even if its vertices
+    # are removed and added again, so an old addition can go.
+    if (
+        added is not None
+        and added <= frontier
+        and not edge_is_live(edge, record, vertices)
+    ):
+        return None if record[1] is None else (None, record[1])
+    return record
+
+
+@dataclass
+class GraphTables(Generic[T]):
+    """Records of all the vertices and edges ever operated on"""
+
+    vertices: Dict[T, VertexRecord] = field(default_factory=dict)
+    edges: Dict[SlotEdge[T], EdgeRecord] = field(default_factory=dict)
+
+    def apply(self, op: LWWGraphOperation[T]) -> bool:
+        """Merge one operation, in any order. Return whether it matters, now or
+        after any further operation: duplicates, vertex operations preceding
+        the last removal, and edge operations preceding the last one of their
+        kind or the last one of the other kind (removals win ties) don't."""
+        if op.op in ("add_v", "del_v"):
+            vertex: T = op.arg  # type: ignore
+            record = self.vertices.get(vertex, NO_VERTEX)
+            new_record = merge_vertex_op(record, op.op, op.ts)
+            self.vertices[vertex] = new_record
+            return new_record != record
+        edge = SlotEdge.from_edge(op.arg)  # type: ignore
+        e_record = self.edges.get(edge, NO_EDGE)
+        new_e_record = merge_edge_op(e_record, op.op, op.ts)
+        self.edges[edge] = new_e_record
+        added, removed = new_e_record
+        if op.op == "add_e":
+            dominated = removed is not None and op.ts <= removed
+        else:
+            dominated = added is not None and op.ts < added
+        return new_e_record != e_record and not dominated
+
+    def copy(self) -> GraphTables[T]:
+        """Copy the tables, sharing the immutable records."""
+        return GraphTables(vertices=dict(self.vertices), edges=dict(self.edges))
+
+    def update(self, other: GraphTables[T]) -> None:
+        """Merge tables holding other elements, f.e. from another partition."""
+        self.vertices.update(other.vertices)
+        self.edges.update(other.edges)
+
+    def collect_garbage(
+        self, frontier: int, vertices: Optional[Dict[T, VertexRecord]] = None
+    ) -> None:
+        """Forget what operations later than ``frontier`` can't need. The
+        presence of edges is decided with ``vertices`` if given, f.e. for the
+        tables of a partition holding only some of the vertices."""
+        vertices = self.vertices if vertices is None else vertices
+        edges: Dict[SlotEdge[T], EdgeRecord] = {}
+        for edge, e_record in self.edges.items():
+            collected_edge = collect_edge_record(edge, e_record, vertices, frontier)
+            if collected_edge is not None:
+                edges[edge] = collected_edge
+        collected_vertices: Dict[T, VertexRecord] = {}
+        for vertex, v_record in self.vertices.items():
+            collected_vertex = collect_vertex_record(v_record, frontier)
+            if collected_vertex is not None:
+                collected_vertices[vertex] = collected_vertex
+        self.vertices, self.edges = collected_vertices, edges
+
+    def live_vertices(self) -> Set[T]:
+        """The vertices currently present"""
+        return {v for v, record in self.vertices.items() if vertex_is_live(record)}
+
+    def live_edges(self) -> Set[SlotEdge[T]]:
+        """The edges currently present"""
+        return {
+            e
+            for e, record in self.edges.items()
+            if edge_is_live(e, record, self.vertices)
+        }
+
+    def is_live(self, item: Union[T, Edge[T]]) -> bool:
+        """Whether a vertex or an edge is currently present"""
+        if isinstance(item, Edge):
+            record = self.edges.get(item)  # type: ignore
+            return record is not None and edge_is_live(item, record, self.vertices)
+        return vertex_is_live(self.vertices.get(item, NO_VERTEX))
+
+    def operations(self) -> List[LWWGraphOperation[T]]:
+        """The smallest operations log that resolves to these tables"""
+        ops: List[LWWGraphOperation[T]] = []
+        for vertex, (removed, added) in self.vertices.items():
+            if removed is not None:
+                ops.append(LWWGraphOperation[T](op="del_v", arg=vertex, ts=removed))
+            ops.extend(
+                LWWGraphOperation[T](op="add_v", arg=vertex, ts=ts) for ts in added
+            )
+        for edge, (e_added, e_removed) in self.edges.items():
+            base_edge = edge.to_base_edge()
+            if e_removed is not None:
+                ops.append(
+                    LWWGraphOperation[T](op="del_e", arg=base_edge, ts=e_removed)
+                )
+            if e_added is not None and (e_removed is None or e_added > e_removed):
+                ops.append(LWWGraphOperation[T](op="add_e", arg=base_edge, ts=e_added))
+        return ops
+
+
+def build_adjacency(vertices: Set[T], edges: Set[SlotEdge[T]]) -> Dict[T, Set[T]]:
+    """Map each vertex to its neighbors."""
+    neighbors: Dict[T, Set[T]] = {v: set() for v in vertices}
+    for edge in edges:
+        neighbors[edge.a].add(edge.b)
+        neighbors[edge.b].add(edge.a)
+    return neighbors
+
+
+def build_components(neighbors: Mapping[T, Set[T]]) -> List[Dict[T, Set[T]]]:
+    """Group the vertices of an adjacency mapping in connected components, each
+    mapping its vertices to their neighbors."""
+    components = []
+    unexplored = set(neighbors)
+    while unexplored:
+        explore_stack = [unexplored.pop()]
+        component = {}
+        while explore_stack:
+            vertex = explore_stack.pop()  # DFS
+            component[vertex] = neighbors[vertex]
+            for neighbor in neighbors[vertex]:
+                if neighbor in unexplored:
+                    unexplored.remove(neighbor)
+                    explore_stack.append(neighbor)
+        components.append(component)
+    return components
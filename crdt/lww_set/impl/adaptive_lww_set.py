@@ -0,0 +1,89 @@
+"""LWW-element-set switching at runtime between a log and an index of its
+elements, according to the workload"""
+from typing import Iterable, List, Optional, Sequence, Union
+
+from crdt.clock.interface import Clock
+from crdt.functools.workload import Migration, Representation, WorkloadMonitor
+from crdt.lww_set.impl.indexed_lww_set import IndexedLWWSet
+from crdt.lww_set.impl.log_lww_set import LogLWWSet
+from crdt.lww_set.interface import LWWSet, T
+from crdt.lww_set.operation import LWWSetOperation
+
+
+class AdaptiveLWWSet(LWWSet[T]):
+    """Holds its elements in a LogLWWSet while operations are mostly written,
+    and in an IndexedLWWSet while they are mostly read, as each query of the
+    log reads all of it. A WorkloadMonitor decides when to migrate, which
+    applies the operations of one set to the other one.
+
+    Decisions are logged, and kept in ``migrations``."""
+
+    def __init__(
+        self,
+        clock: Clock,
+        window: int = 100,
+        read_ratio: float = 1.0,
+        write_ratio: float = 10.0,
+    ) -> None:
+        """Initialize an empty set, held in a log.
+
+        Params
+            clock: clock used to timestamp local operations
+            window: see WorkloadMonitor
+            read_ratio: see WorkloadMonitor
+            write_ratio: see WorkloadMonitor
+        """
+        self.clock = clock
+        self.monitor = WorkloadMonitor("log", window, read_ratio, write_ratio)
+        self.engine: Union[LogLWWSet[T], IndexedLWWSet[T]] = LogLWWSet(clock)
+
+    @property
+    def representation(self) -> Representation:
+        """The representation of the set: "log" or "indexed" """
+        return self.monitor.representation
+
+    @property
+    def migrations(self) -> List[Migration]:
+        """The migrations decided so far, oldest first"""
+        return self.monitor.migrations
+
+    @property
+    def operations(self) -> Sequence[LWWSetOperation[T]]:
+        """The operations held by the current set"""
+        return self.engine.operations
+
+    def _observe(self, reads: int = 0, writes: int = 0) -> None:
+        migration = self.monitor.observe(reads, writes)
+        if migration is None:
+            return
+        engine: Union[LogLWWSet[T], IndexedLWWSet[T]]
+        if migration.target == "log":
+            engine = LogLWWSet(self.clock)
+        else:
+            engine = IndexedLWWSet(self.clock)
+        ops = list(self.engine.operations)
+        engine.apply(ops)
+        self.engine = engine
+        self.monitor.migrated(len(ops))
+
+    @property
+    def elements(self) -> Iterable[T]:
+        self._observe(reads=1)
+        return self.engine.elements
+
+    def __contains__(self, item: T) -> bool:
+        self._observe(reads=1)
+        return item in self.engine
+
+    def apply(self, ops: Iterable[LWWSetOperation[T]]) -> None:
+        ops = list(ops)
+        self._observe(writes=len(ops))
+        self.engine.apply(ops)
+
+    def add(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
+        self._observe(writes=1)
+        return self.engine.add(item, ts)
+
+    def remove(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
+        self._observe(writes=1)
+        return self.engine.remove(item, ts)
@@ -0,0 +1,87 @@
+"""LWW-element-set implementation that survives process restarts by persisting
+its operations to a snapshot and a write-ahead log"""
+from typing import Iterable, Optional
+
+from crdt.clock.interface import Clock
+from crdt.lww_set.impl.log_lww_set import LogLWWSet
+from crdt.lww_set.interface import LWWSet, T
+from crdt.lww_set.operation import LWWSetOperation
+from crdt.persistence.records import SET_OPS
+from crdt.persistence.store import ReplicaStore
+
+
+class DurableLWWSet(LWWSet[T]):
+    """Wraps a LogLWWSet, logging each operation to a write-ahead log before
+    acknowledging it, and periodically checkpointing the compacted log as a
+    snapshot."""
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        directory: str,
+        clock: Clock,
+        checkpoint_every: int = 100_000,
+        sync_every: int = 1,
+        sync_interval: Optional[float] = None,
+    ) -> None:
+        """Open or create the replica persisted in ``directory``.
+
+        Params
+            directory: where the snapshot and write-ahead log are kept
+            clock: clock used to timestamp local operations
+            checkpoint_every: number of operations between two snapshots
+            sync_every: number of operations between two fsyncs of the log
+            sync_interval: number of seconds after an fsync past which the
+                next append fsyncs: an idle log is only synced by that append
+        """
+        self.clock = clock
+        self._set: LogLWWSet[T] = LogLWWSet(clock=clock)
+        self._store: ReplicaStore[LWWSetOperation] = ReplicaStore(
+            directory,
+            family=SET_OPS,
+            checkpoint_every=checkpoint_every,
+            sync_every=sync_every,
+            sync_interval=sync_interval,
+        )
+        self._store.restore(self._set)
+
+    @property
+    def elements(self) -> Iterable[T]:
+        return self._set.elements
+
+    def __contains__(self, item: T) -> bool:
+        return item in self._set
+
+    def checkpoint(self) -> None:
+        """Compact the log and write it as the new snapshot."""
+        self._store.checkpoint(self._set)
+
+    def close(self) -> None:
+        """Make all operations durable and release the log file."""
+        self._store.close()
+
+    @property
+    def dropped_ops(self) -> int:
+        """Number of operations dropped on ingestion, see LogLWWSet"""
+        return self._set.dropped_ops
+
+    def _logged(self, op: LWWSetOperation[T], dropped: int) -> LWWSetOperation[T]:
+        """Log ``op`` unless the replica dropped it: if it dropped more than
+        the ``dropped`` operations counted before ``op``."""
+        if self._set.dropped_ops == dropped:
+            self._store.log(op, self._set)
+        return op
+
+    def apply(self, ops: Iterable[LWWSetOperation[T]]) -> None:
+        for op in ops:
+            dropped = self._set.dropped_ops
+            self._set.apply([op])
+            self._logged(op, dropped)
+
+    def add(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
+        dropped = self._set.dropped_ops
+        return self._logged(self._set.add(item, ts), dropped)
+
+    def remove(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
+        dropped = self._set.dropped_ops
+        return self._logged(self._set.remove(item, ts), dropped)
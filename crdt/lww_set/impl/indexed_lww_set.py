@@ -0,0 +1,69 @@
+"""LWW-element-set implementation resolving each operation as it is applied"""
+# pylint: disable=duplicate-code
+from typing import Dict, Iterable, List, Optional, Set
+
+from crdt.clock.interface import Clock
+from crdt.lww_graph.tables import NO_EDGE, EdgeRecord, merge_edge_op
+from crdt.lww_set.interface import LWWSet, T
+from crdt.lww_set.operation import LWWSetOperation
+
+
+class IndexedLWWSet(LWWSet[T]):
+    """This LWW-element-set implementation keeps the last addition and the
+    last removal of each element, like the record of an edge, and the set of
+    elements they resolve to, which it updates on each operation. Queries
+    cost no resolution, unlike those of the LogLWWSet."""
+
+    def __init__(self, clock: Clock) -> None:
+        """Initialize an empty set.
+
+        Params
+            clock: clock used to timestamp local operations
+        """
+        self.clock = clock
+        self._records: Dict[T, EdgeRecord] = {}
+        self._elements: Set[T] = set()
+
+    @property
+    def elements(self) -> Iterable[T]:
+        return list(self._elements)
+
+    def __contains__(self, item: T) -> bool:
+        return item in self._elements
+
+    @property
+    def operations(self) -> List[LWWSetOperation[T]]:
+        """The last removal of each element and its last addition if it is
+        more recent, which is all that LWW resolution needs, in timestamp
+        order"""
+        ops: List[LWWSetOperation[T]] = []
+        for item, (added, removed) in self._records.items():
+            if removed is not None:
+                ops.append(LWWSetOperation(op="del", arg=item, ts=removed))
+            if added is not None and (removed is None or added > removed):
+                ops.append(LWWSetOperation(op="add", arg=item, ts=added))
+        return sorted(ops, key=lambda op: op.ts)
+
+    def apply(self, ops: Iterable[LWWSetOperation[T]]) -> None:
+        for op in ops:
+            added, removed = self._records[op.arg] = merge_edge_op(
+                self._records.get(op.arg, NO_EDGE),
+                "add_e" if op.op == "add" else "del_e",
+                op.ts,
+            )
+            if added is not None and (removed is None or added > removed):
+                self._elements.add(op.arg)
+            else:
+                self._elements.discard(op.arg)
+
+    def add(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
+        ts = ts if ts is not None else self.clock.nanoseconds
+        op: LWWSetOperation[T] = LWWSetOperation(op="add", arg=item, ts=ts)
+        self.apply([op])
+        return op
+
+    def remove(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
+        ts = ts if ts is not None else self.clock.nanoseconds
+        op: LWWSetOperation[T] = LWWSetOperation(op="del", arg=item, ts=ts)
+        self.apply([op])
+        return op
@@ -1,5 +1,5 @@
 """Simplistic LWW-element-set implementation based on append-only log"""
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, MutableSequence, Optional, Sequence, Tuple
 
 from crdt.clock.interface import Clock
 from crdt.functools.typing import assert_never
@@ -10,11 +10,29 @@ from crdt.lww_set.operation import LWWSetOperation
 class LogLWWSet(LWWSet[T]):
     """This LWWW-element-set implementation keeps a log of all operations in
     memory, and reads it entirely each time the final set of elements is
-    queried."""
+    queried. Operations that can't change the set, such as the duplicates of
+    an at-least-once delivery, are dropped before they reach the log."""
 
-    def __init__(self, clock: Clock):
+    def __init__(
+        self,
+        clock: Clock,
+        oplog: Optional[MutableSequence[LWWSetOperation[T]]] = None,
+    ):
+        """Initialize a set, with an empty in-memory log by default.
+
+        Params
+            clock: clock used to timestamp local operations
+            oplog: log to read and append operations to, f.e. a BinaryOpLog
+        """
         self.clock = clock
-        self._oplog: List[LWWSetOperation] = []
+        self._oplog: MutableSequence[LWWSetOperation[T]] = (
+            oplog if oplog is not None else []
+        )
+        # Mapping: (operation, element) -> last timestamp in the log, built on
+        # the first ingested operation
+        self._index: Optional[Dict[Tuple[str, T], int]] = None
+        # Number of operations dropped on ingestion
+        self.dropped_ops = 0
 
     @property
     def elements(self) -> Iterable[T]:
@@ -40,14 +58,62 @@ class LogLWWSet(LWWSet[T]):
     def __contains__(self, item: T) -> bool:
         return item in set(self.elements)
 
+    @property
+    def operations(self) -> Sequence[LWWSetOperation[T]]:
+        """The operations log, in insertion order"""
+        return self._oplog
+
+    def _admit(self, op: LWWSetOperation[T]) -> bool:
+        """Whether ``op`` must be appended to the log, which it must unless an
+        operation on its element at the same time or later is logged, of the
+        same kind or of the other one (removals win ties). Count it as dropped
+        otherwise."""
+        if self._index is None:
+            self._index = {}
+            for logged in self._oplog:
+                prev = self._index.get((logged.op, logged.arg))
+                if prev is None or prev < logged.ts:
+                    self._index[(logged.op, logged.arg)] = logged.ts
+        last = self._index.get((op.op, op.arg))
+        other = self._index.get(("del" if op.op == "add" else "add", op.arg))
+        if (last is not None and op.ts <= last) or (
+            other is not None and (op.ts <= other if op.op == "add" else op.ts < other)
+        ):
+            self.dropped_ops += 1
+            return False
+        self._index[(op.op, op.arg)] = op.ts
+        return True
+
+    def apply(self, ops: Iterable[LWWSetOperation[T]]) -> None:
+        """Append already timestamped operations (f.e. remote ones) to the
+        log, except those that can't change the set (see ``dropped_ops``)."""
+        self._oplog.extend(op for op in ops if self._admit(op))
+
+    def compact(self) -> None:
+        """Replace the operations log by the last removal of each element and
+        its last addition if it is more recent, which is all that LWW
+        resolution needs."""
+        last: Dict[Tuple[str, T], LWWSetOperation[T]] = {}
+        for op in self._oplog:
+            prev = last.get((op.op, op.arg))
+            if prev is None or prev.ts < op.ts:
+                last[(op.op, op.arg)] = op
+        for (name, item), op in list(last.items()):
+            del_op = last.get(("del", item))
+            if name == "add" and del_op is not None and op.ts <= del_op.ts:
+                del last[(name, item)]
+        self._oplog[:] = sorted(last.values(), key=lambda o: o.ts)
+
     def add(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
         ts = ts if ts is not None else self.clock.nanoseconds
         op: LWWSetOperation[T] = LWWSetOperation(op="add", arg=item, ts=ts)
-        self._oplog.append(op)
+        if self._admit(op):
+            self._oplog.append(op)
         return op
 
     def remove(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
         ts = ts if ts is not None else self.clock.nanoseconds
         op: LWWSetOperation[T] = LWWSetOperation(op="del", arg=item, ts=ts)
-        self._oplog.append(op)
+        if self._admit(op):
+            self._oplog.append(op)
         return op
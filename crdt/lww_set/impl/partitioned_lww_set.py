@@ -0,0 +1,266 @@
+"""LWW-element-set implementation spread across worker processes, for element
+spaces that exceed the memory of one process or the throughput of one core.
+Elements are assigned to workers by consistent hashing, so that adding a
+worker only moves the elements of the ring ranges it takes over."""
+import hashlib
+import multiprocessing
+import os
+from bisect import bisect
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from crdt.clock.interface import Clock
+from crdt.lww_graph.operation import LWWGraphOpName
+from crdt.lww_graph.tables import (
+    NO_EDGE,
+    EdgeRecord,
+    merge_edge_op,
+    merge_edge_records,
+)
+from crdt.lww_set.interface import LWWSet, T
+from crdt.lww_set.operation import LWWSetOperation
+from crdt.persistence.records import encode_value
+
+# A shard holds the last addition and the last removal of each element, like
+# the record of an edge
+_EDGE_OPS: Dict[str, LWWGraphOpName] = {"add": "add_e", "del": "del_e"}
+# Operations sent to a worker in one message, as (name, element, timestamp)
+_Batch = List[Tuple[str, Any, int]]
+
+# Positions of each worker on the hash ring
+RING_REPLICAS = 64
+
+
+def _canonical(item: Any) -> Any:
+    """The value of ``item`` that all the numbers equal to it encode to: equal
+    elements, such as ``1``, ``1.0`` and ``True``, are the same element."""
+    if isinstance(item, bool):
+        return int(item)
+    if isinstance(item, float) and item.is_integer():
+        return int(item)
+    if isinstance(item, (list, tuple)):
+        return [_canonical(value) for value in item]
+    return item
+
+
+def element_hash(item: Any) -> int:
+    """Hash of an element that is the same in all processes and runs, unlike
+    ``hash`` on strings, and for all the elements equal to it"""
+    digest = hashlib.blake2b(encode_value(_canonical(item)), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class HashRing:
+    """Consistent hashing of elements over worker ids"""
+
+    def __init__(self, workers: Iterable[int] = ()) -> None:
+        """Initialize a ring, empty by default.
+
+        Params
+            workers: the ids of the workers on the ring
+        """
+        self.points: List[Tuple[int, int]] = []
+        for worker in workers:
+            self.add(worker)
+
+    def add(self, worker: int) -> None:
+        """Place ``worker`` on the ring."""
+        for replica in range(RING_REPLICAS):
+            self.points.append((element_hash([worker, replica]), worker))
+        self.points.sort()
+
+    def owner(self, item: Any) -> int:
+        """The id of the worker holding ``item``"""
+        index = bisect(self.points, (element_hash(item), -1))
+        return self.points[index % len(self.points)][1]
+
+
+def _is_live(record: EdgeRecord) -> bool:
+    added, removed = record
+    return added is not None and (removed is None or added > removed)
+
+
+def _serve(conn: Connection, worker: int, chunk_size: int) -> None:
+    """Worker: hold a shard and answer the requests of the set."""
+    records: Dict[Any, EdgeRecord] = {}
+    while True:
+        command, payload = conn.recv()
+        if command == "apply":
+            for name, item, ts in payload:
+                records[item] = merge_edge_op(
+                    records.get(item, NO_EDGE), _EDGE_OPS[name], ts
+                )
+        elif command == "contains":
+            conn.send([_is_live(records.get(item, NO_EDGE)) for item in payload])
+        elif command == "elements":
+            live = [item for item, record in records.items() if _is_live(record)]
+            for start in range(0, len(live), chunk_size):
+                conn.send(live[start : start + chunk_size])
+            conn.send(None)
+        elif command == "release":
+            ring = HashRing()
+            ring.points = payload
+            moved = {i: r for i, r in records.items() if ring.owner(i) != worker}
+            for item in moved:
+                del records[item]
+            conn.send(moved)
+        elif command == "merge":
+            for item, record in payload.items():
+                records[item] = merge_edge_records(records.get(item, NO_EDGE), record)
+        elif command == "size":
+            conn.send(len(records))
+        else:  # stop
+            conn.close()
+            return
+
+
+class PartitionedLWWSet(LWWSet[T]):
+    """Routes the operations and queries of each element to the worker process
+    holding its shard. Operations are buffered per worker, and sent in batches
+    of ``batch_size``, or before any query, over a pipe to each worker. Queries
+    of many elements are best made with ``contains_many``, which makes one
+    round trip per worker.
+
+    Elements must be picklable and JSON-encodable, as they are hashed from
+    their JSON encoding, after equal numbers are encoded alike. Like the other
+    implementations, the set is not thread safe; ``close`` stops the
+    workers."""
+
+    def __init__(
+        self,
+        clock: Clock,
+        workers: Optional[int] = None,
+        batch_size: int = 10_000,
+        chunk_size: int = 10_000,
+    ) -> None:
+        """Start the worker processes of an empty set.
+
+        Params
+            clock: clock used to timestamp local operations
+            workers: number of worker processes (by default, one per CPU)
+            batch_size: number of operations buffered for a worker before
+                they are sent to it
+            chunk_size: number of elements per message when listing them
+        """
+        self.clock = clock
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.ring = HashRing()
+        self._conns: List[Connection] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._pending: List[_Batch] = []
+        for _ in range(workers or os.cpu_count() or 1):
+            self.ring.add(self._start_worker())
+
+    def _start_worker(self) -> int:
+        worker = len(self._conns)
+        conn, worker_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_serve, args=(worker_conn, worker, self.chunk_size), daemon=True
+        )
+        process.start()
+        worker_conn.close()
+        self._conns.append(conn)
+        self._processes.append(process)
+        self._pending.append([])
+        return worker
+
+    def _send(self, worker: int) -> None:
+        if self._pending[worker]:
+            self._conns[worker].send(("apply", self._pending[worker]))
+            self._pending[worker] = []
+
+    def _flush(self) -> None:
+        for worker in range(len(self._conns)):
+            self._send(worker)
+
+    def _route(self, op: LWWSetOperation[T]) -> None:
+        worker = self.ring.owner(op.arg)
+        self._pending[worker].append((op.op, op.arg, op.ts))
+        if len(self._pending[worker]) >= self.batch_size:
+            self._send(worker)
+
+    @property
+    def workers(self) -> int:
+        """The number of worker processes"""
+        return len(self._conns)
+
+    def shard_sizes(self) -> List[int]:
+        """The number of elements recorded by each worker, tombstones
+        included"""
+        self._flush()
+        for conn in self._conns:
+            conn.send(("size", None))
+        return [conn.recv() for conn in self._conns]
+
+    @property
+    def elements(self) -> Iterator[T]:
+        """Stream the elements of each shard in turn."""
+        self._flush()
+        for conn in self._conns:
+            conn.send(("elements", None))
+            chunk: Optional[List[T]] = conn.recv()
+            try:
+                while chunk is not None:
+                    yield from chunk
+                    chunk = conn.recv()
+            finally:
+                # Keep the pipe in sync if the iteration is abandoned
+                while chunk is not None:
+                    chunk = conn.recv()
+
+    def contains_many(self, items: Iterable[T]) -> List[bool]:
+        """Whether each of ``items`` is in the set"""
+        self._flush()
+        items = list(items)
+        by_worker: Dict[int, List[int]] = {}
+        for index, item in enumerate(items):
+            by_worker.setdefault(self.ring.owner(item), []).append(index)
+        for worker, indices in by_worker.items():
+            self._conns[worker].send(("contains", [items[i] for i in indices]))
+        result = [False] * len(items)
+        for worker, indices in by_worker.items():
+            for index, found in zip(indices, self._conns[worker].recv()):
+                result[index] = found
+        return result
+
+    def __contains__(self, item: T) -> bool:
+        return self.contains_many([item])[0]
+
+    def apply(self, ops: Iterable[LWWSetOperation[T]]) -> None:
+        for op in ops:
+            self._route(op)
+
+    def add(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
+        ts = ts if ts is not None else self.clock.nanoseconds
+        op: LWWSetOperation[T] = LWWSetOperation(op="add", arg=item, ts=ts)
+        self._route(op)
+        return op
+
+    def remove(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
+        ts = ts if ts is not None else self.clock.nanoseconds
+        op: LWWSetOperation[T] = LWWSetOperation(op="del", arg=item, ts=ts)
+        self._route(op)
+        return op
+
+    def add_worker(self) -> None:
+        """Start a new worker, and move to it the records of the elements it
+        now owns. Only about one in ``workers`` elements move."""
+        self._flush()
+        worker = self._start_worker()
+        self.ring.add(worker)
+        for conn in self._conns[:worker]:
+            conn.send(("release", self.ring.points))
+        moved: Dict[Any, EdgeRecord] = {}
+        for conn in self._conns[:worker]:
+            moved.update(conn.recv())
+        self._conns[worker].send(("merge", moved))
+
+    def close(self) -> None:
+        """Stop the worker processes, dropping the set."""
+        for conn in self._conns:
+            conn.send(("stop", None))
+            conn.close()
+        for process in self._processes:
+            process.join()
+        self._conns, self._processes, self._pending = [], [], []
@@ -0,0 +1,100 @@
+"""LWW-element-set implementation stored in Redis, that several processes can
+share"""
+from typing import Iterable, Optional
+
+from redis import Redis
+
+from crdt.clock.interface import Clock
+from crdt.lww_set.interface import LWWSet, T
+from crdt.lww_set.operation import LWWSetOperation
+from crdt.persistence.redis_backend import (
+    DEFAULT_BATCH_SIZE,
+    LATER_LUA,
+    encode_atom,
+    encode_timestamp,
+    key,
+    run_batched,
+    scan_atoms,
+)
+
+# KEYS: last additions hash, last removals hash, live elements set.
+# ARGV: operation name, encoded element and timestamp of each operation.
+_MERGE_LUA = (
+    LATER_LUA
+    + """
+local adds, dels, live = KEYS[1], KEYS[2], KEYS[3]
+for i = 1, #ARGV, 3 do
+  local op, element, ts = ARGV[i], ARGV[i + 1], ARGV[i + 2]
+  local records = op == 'add' and adds or dels
+  if later(ts, redis.call('HGET', records, element)) then
+    redis.call('HSET', records, element, ts)
+    local added = redis.call('HGET', adds, element)
+    if added and later(added, redis.call('HGET', dels, element)) then
+      redis.call('SADD', live, element)
+    else
+      redis.call('SREM', live, element)
+    end
+  end
+end
+return 0
+"""
+)
+
+
+class RedisLWWSet(LWWSet[T]):
+    """LWW-element-set keeping the last addition and the last removal of each
+    element in Redis hashes, and its live elements in a Redis set. Operations
+    are merged by a Lua script comparing timestamps atomically, so any number
+    of processes can write to and read from the same set."""
+
+    def __init__(
+        self,
+        client: Redis,
+        name: str,
+        clock: Clock,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        """Open the set ``name``, which is empty if it doesn't exist yet.
+
+        Params
+            client: connection to the Redis server
+            name: name of the set, shared by all its replicas
+            clock: clock used to timestamp local operations
+            batch_size: number of operations merged per script call, and of
+                elements read per scan
+        """
+        self.client = client
+        self.name = name
+        self.clock = clock
+        self.batch_size = batch_size
+        self._keys = [key(name, "add"), key(name, "del"), key(name, "elements")]
+        self._merge = client.register_script(_MERGE_LUA)
+
+    @property
+    def elements(self) -> Iterable[T]:
+        """Stream the elements of the set."""
+        return scan_atoms(self.client, self._keys[2], self.batch_size)
+
+    def __contains__(self, item: T) -> bool:
+        return bool(self.client.sismember(self._keys[2], encode_atom(item)))
+
+    def apply(self, ops: Iterable[LWWSetOperation[T]]) -> None:
+        run_batched(
+            self.client,
+            self._merge,
+            self._keys,
+            ((op.op, encode_atom(op.arg), encode_timestamp(op.ts)) for op in ops),
+            self.batch_size,
+        )
+
+    def add(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
+        ts = ts if ts is not None else self.clock.nanoseconds
+        op: LWWSetOperation[T] = LWWSetOperation(op="add", arg=item, ts=ts)
+        self.apply([op])
+        return op
+
+    def remove(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
+        ts = ts if ts is not None else self.clock.nanoseconds
+        op: LWWSetOperation[T] = LWWSetOperation(op="del", arg=item, ts=ts)
+        self.apply([op])
+        return op
@@ -35,3 +35,7 @@ class LWWSet(Protocol[T]):
 
     def remove(self, item: T, ts: Optional[int] = None) -> LWWSetOperation[T]:
         ...
+
+    def apply(self, ops: Iterable[LWWSetOperation[T]]) -> None:
+        """Integrate already timestamped operations, f.e. received from a
+        remote replica."""
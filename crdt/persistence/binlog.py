@@ -0,0 +1,238 @@
+"""Native on-disk operations log: a file of fixed-size binary records, and a
+side file of the interned values they refer to. The records are read through
+``mmap`` without copying, and can be viewed as a NumPy array with
+``numpy.frombuffer(view, dtype=RECORD_DTYPE)``."""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from typing import (
+    Any,
+    BinaryIO,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Union,
+    overload,
+)
+
+from crdt.persistence.interface import O, PersistenceError
+from crdt.persistence.records import (
+    RECORD,
+    OpFamily,
+    ValueTable,
+    decode_record,
+    decode_value,
+    encode_record,
+    encode_value,
+)
+from crdt.persistence.snapshot import fsync_directory
+
+VALUES_SUFFIX: Final[str] = ".values"
+
+_MAGIC: Final[bytes] = b"CRDTOPLG"
+_VERSION: Final[int] = 1
+# magic, version, op family code
+_HEADER: Final[struct.Struct] = struct.Struct("<8sHB5x")
+_LENGTH: Final[struct.Struct] = struct.Struct("<I")
+
+
+def _read_values(path: str) -> List[Any]:
+    """Read the value table file, discarding a torn value at its end."""
+    values: List[Any] = []
+    if not os.path.exists(path):
+        return values
+    with open(path, "r+b") as f:
+        data = f.read()
+        position = 0
+        while position + _LENGTH.size <= len(data):
+            (length,) = _LENGTH.unpack_from(data, position)
+            end = position + _LENGTH.size + length
+            if end > len(data):
+                break
+            values.append(decode_value(data[position + _LENGTH.size : end]))
+            position = end
+        f.truncate(position)
+    return values
+
+
+class BinaryOpLog(MutableSequence[O]):
+    """Operations log stored in a file, that replicas can use as their backing
+    log. Operations are only appended, except for the replacement of the whole
+    log (f.e. by its compaction), which is atomic. Appended data is flushed to
+    the operating system after each append, and made durable by ``sync``."""
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, path: str, family: OpFamily[O]) -> None:
+        """Open the log at ``path``, creating it if needed. The value table is
+        kept next to it, with the ``.values`` suffix.
+
+        Params
+            path: location of the records file
+            family: the kind of operations logged
+        """
+        self.path = path
+        self.family: OpFamily[O] = family
+        self.values_path = path + VALUES_SUFFIX
+        self._table = ValueTable(_read_values(self.values_path))
+        self._saved_values = len(self._table)
+        self._values_file = open(  # pylint: disable=consider-using-with
+            self.values_path, "ab"
+        )
+        self._mmap: Optional[mmap.mmap] = None
+        self._file = self._open_records()
+
+    def _open_records(self) -> BinaryIO:
+        f = open(self.path, "ab+")  # pylint: disable=consider-using-with
+        f.seek(0)
+        header = f.read(_HEADER.size)
+        if not header:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.family.code))
+            f.flush()
+            fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+        elif len(header) < _HEADER.size or _HEADER.unpack(header) != (
+            _MAGIC,
+            _VERSION,
+            self.family.code,
+        ):
+            f.close()
+            raise PersistenceError(f"{self.path} is not a compatible operations log")
+        size = f.seek(0, os.SEEK_END)
+        # Discard a torn record at the end
+        f.truncate(size - (size - _HEADER.size) % RECORD.size)
+        f.seek(0, os.SEEK_END)
+        return f
+
+    def _records(self) -> memoryview:
+        """View of the records section, valid until the next append"""
+        size = self._file.tell()
+        if self._mmap is None or len(self._mmap) != size:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)[_HEADER.size :]
+
+    @contextmanager
+    def records_view(self) -> Iterator[memoryview]:
+        """Provide a zero-copy view of the raw records, that must not be used
+        after the context exits."""
+        view = self._records()
+        try:
+            yield view
+        finally:
+            view.release()
+
+    def __len__(self) -> int:
+        return (self._file.tell() - _HEADER.size) // RECORD.size
+
+    def __iter__(self) -> Iterator[O]:
+        if not self:
+            return
+        values = self._table.values
+        with self.records_view() as view:
+            for record in RECORD.iter_unpack(view):
+                yield decode_record(self.family, record, values)
+
+    @overload
+    def __getitem__(self, index: int) -> O:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[O]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[O, List[O]]:
+        values = self._table.values
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if start >= stop:
+                return []
+            with self.records_view() as view:
+                records = view[start * RECORD.size : stop * RECORD.size]
+                try:
+                    ops = [
+                        decode_record(self.family, record, values)
+                        for record in RECORD.iter_unpack(records)
+                    ]
+                finally:
+                    records.release()
+            return ops[::step]
+        if not -len(self) <= index < len(self):
+            raise IndexError("Operations log index out of range")
+        with self.records_view() as view:
+            record = RECORD.unpack_from(view, (index % len(self)) * RECORD.size)
+        return decode_record(self.family, record, values)
+
+    def extend(self, values: Iterable[O]) -> None:
+        """Append operations, writing their new values before the records
+        referring to them."""
+        records = b"".join(encode_record(self.family, op, self._table) for op in values)
+        new_values = self._table.values[self._saved_values :]
+        if new_values:
+            for value in new_values:
+                encoded = encode_value(value)
+                self._values_file.write(_LENGTH.pack(len(encoded)) + encoded)
+            self._values_file.flush()
+            self._saved_values = len(self._table)
+        self._file.write(records)
+        self._file.flush()
+
+    def append(self, value: O) -> None:
+        self.extend([value])
+
+    def insert(self, index: int, value: O) -> None:
+        if index != len(self):
+            raise PersistenceError("Operations can only be appended to the log")
+        self.append(value)
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        """Only replacing the whole log is supported: ``log[:] = ops``"""
+        if index != slice(None):
+            raise PersistenceError("Only the whole operations log can be replaced")
+        self._replace(list(value))
+
+    def __delitem__(self, index: Any) -> None:
+        """Only emptying the whole log is supported: ``del log[:]``"""
+        if index != slice(None):
+            raise PersistenceError("Only the whole operations log can be deleted")
+        self._replace([])
+
+    def _replace(self, ops: List[O]) -> None:
+        """Atomically replace the records file. The value table only grows, so
+        it stays valid for both the old and the new records."""
+        records = b"".join(encode_record(self.family, op, self._table) for op in ops)
+        self.extend([])  # Save the new values first
+        self.sync()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.family.code))
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+        self._close_records()
+        os.replace(tmp_path, self.path)
+        fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+        self._file = self._open_records()
+
+    def sync(self) -> None:
+        """Make all appended operations durable."""
+        for f in (self._values_file, self._file):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _close_records(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def close(self) -> None:
+        """Make all appended operations durable and close the log files."""
+        self.sync()
+        self._close_records()
+        self._values_file.close()
@@ -0,0 +1,30 @@
+"""Interface classes for the on-disk persistence of LWW replicas."""
+# pylint: disable=missing-class-docstring,missing-function-docstring,
+# pylint: disable=too-few-public-methods
+from abc import abstractmethod
+from typing import Iterable, Protocol, Sequence, TypeVar
+
+from crdt.lww_graph.operation import LWWGraphOperation
+from crdt.lww_set.operation import LWWSetOperation
+
+# Any operation that can be persisted
+O = TypeVar("O", LWWSetOperation, LWWGraphOperation)
+
+
+class PersistenceError(Exception):
+    """Raised when persisted data is malformed or can't be encoded"""
+
+
+class CompactableReplica(Protocol[O]):
+    """An in-memory replica whose operations log can be persisted"""
+
+    @property
+    @abstractmethod
+    def operations(self) -> Sequence[O]:
+        ...
+
+    def apply(self, ops: Iterable[O]) -> None:
+        ...
+
+    def compact(self) -> None:
+        ...
@@ -0,0 +1,87 @@
+"""Interchange of operations logs as newline-delimited JSON, optionally
+gzip-compressed. Each line holds one operation in the same form as the
+operation models serialize to, f.e.
+``{"op": "add_e", "arg": {"a": 1, "b": 2}, "ts": 42}``. Files are read and
+written in chunks of operations, so that memory use doesn't depend on their
+size."""
+import gzip
+import itertools
+import json
+from typing import IO, Any, Final, Iterable, Iterator, List, cast
+
+from crdt.persistence.interface import O, PersistenceError
+from crdt.persistence.records import OpFamily, freeze_value
+
+DEFAULT_CHUNK_SIZE: Final[int] = 10_000
+_GZIP_MAGIC: Final[bytes] = b"\x1f\x8b"
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    """Open a text file, compressed with gzip when reading a gzip file or
+    writing a ``.gz`` file"""
+    if "r" in mode:
+        with open(path, "rb") as f:
+            compressed = f.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC
+    else:
+        compressed = path.endswith(".gz")
+    if compressed:
+        return cast(IO[str], gzip.open(path, mode + "t", encoding="utf-8"))
+    return open(path, mode, encoding="utf-8")
+
+
+def encode_line(family: OpFamily[O], op: O) -> str:
+    """Serialize one operation, without the line terminator."""
+    arg: Any = op.arg
+    if op.op in family.edge_ops:
+        arg = {"a": op.arg.a, "b": op.arg.b}
+    try:
+        return json.dumps({"op": op.op, "arg": arg, "ts": op.ts}, separators=(",", ":"))
+    except TypeError as e:
+        raise PersistenceError(f"Can't encode operation {op!r}") from e
+
+
+def decode_line(family: OpFamily[O], line: str) -> O:
+    """Deserialize one operation."""
+    try:
+        data = json.loads(line)
+        op_code = family.op_code(data["op"])
+        arg = data["arg"]
+        args = [arg["a"], arg["b"]] if data["op"] in family.edge_ops else [arg]
+        return family.build(op_code, [freeze_value(a) for a in args], data["ts"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise PersistenceError(f"Malformed operation line: {line!r}") from e
+
+
+def _chunks(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def dump_ops(
+    path: str,
+    family: OpFamily[O],
+    ops: Iterable[O],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Write ``ops`` to ``path``, gzip-compressed if it ends with ``.gz``, and
+    return the number of operations written. ``ops`` is consumed
+    lazily."""
+    count = 0
+    with _open(path, "w") as f:
+        for chunk in _chunks(ops, chunk_size):
+            f.write("".join(encode_line(family, op) + "\n" for op in chunk))
+            count += len(chunk)
+    return count
+
+
+def load_ops(
+    path: str, family: OpFamily[O], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[List[O]]:
+    """Lazily read the operations stored at ``path`` in chunks of
+    ``chunk_size``, meant to be passed to the ``apply`` method of a replica one
+    at a time. Blank lines are skipped."""
+    with _open(path, "r") as f:
+        lines = (line for line in f if line.strip())
+        for chunk in _chunks(lines, chunk_size):
+            yield [decode_line(family, line) for line in chunk]
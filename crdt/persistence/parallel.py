@@ -0,0 +1,296 @@
+"""Multi-core resolution of large operation logs, for offline tools: the
+replicas restore and replay their logs in process. Worker processes each reduce
+a part of the log to per-element timestamp records: a range of the binary
+records of a snapshot, placed in shared memory, or a slice of an operations
+log, pickled to them as tuples, which they encode themselves. A merge phase
+combines the partial records and resolves the cross-element rules (edges
+removed by vertex removals, and components) once."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Generic, Iterable, List, Optional, Set, Tuple
+
+from crdt.lww_graph.edge import SlotEdge
+from crdt.lww_graph.interface import T
+from crdt.lww_graph.operation import LWWGraphOperation, LWWGraphOpName
+from crdt.lww_graph.tables import (
+    NO_EDGE,
+    NO_VERTEX,
+    EdgeRecord,
+    GraphTables,
+    VertexRecord,
+    build_adjacency,
+    build_components,
+    merge_edge_op,
+    merge_edge_records,
+    merge_vertex_op,
+    merge_vertex_records,
+)
+from crdt.lww_set.operation import LWWSetOperation
+from crdt.persistence.interface import O
+from crdt.persistence.records import (
+    GRAPH_OPS,
+    NO_VALUE,
+    RECORD,
+    SET_OPS,
+    OpFamily,
+    ValueTable,
+)
+from crdt.persistence.snapshot import mapped_snapshot
+
+# Partial records of a range of operations, keyed by value ids. Edges are keyed
+# by the sorted ids of their vertices.
+_GraphPartial = Tuple[Dict[int, VertexRecord], Dict[Tuple[int, int], EdgeRecord]]
+# Last addition and last removal of each set element
+_SetPartial = Dict[int, EdgeRecord]
+# Timestamp, operation code and argument values of an operation
+_FlatOp = Tuple[int, int, Tuple[Any, ...]]
+
+# Ranges smaller than this are not worth sending to another process
+MIN_RECORDS_PER_WORKER = 100_000
+
+
+@dataclass
+class ResolvedGraph(Generic[T]):
+    """The present vertices, edges and connected components of a graph, and
+    the records of all its elements that they were resolved from"""
+
+    tables: GraphTables[T]
+    vertices: Set[T]
+    edges: Set[SlotEdge[T]]
+    components: List[Dict[T, Set[T]]]
+
+
+def _shared_view(shm: SharedMemory) -> memoryview:
+    assert shm.buf is not None, "Shared memory must be open"
+    return shm.buf
+
+
+def _reduce_graph_records(records: memoryview) -> _GraphPartial:
+    vertices: Dict[int, VertexRecord] = {}
+    edges: Dict[Tuple[int, int], EdgeRecord] = {}
+    op_names = GRAPH_OPS.op_names
+    for ts, op_code, first, second in RECORD.iter_unpack(records):
+        op: LWWGraphOpName = op_names[op_code]  # type: ignore
+        if second == NO_VALUE:
+            vertices[first] = merge_vertex_op(vertices.get(first, NO_VERTEX), op, ts)
+        else:
+            key = (first, second) if first <= second else (second, first)
+            edges[key] = merge_edge_op(edges.get(key, NO_EDGE), op, ts)
+    return vertices, edges
+
+
+def _reduce_set_records(records: memoryview) -> _SetPartial:
+    elements: _SetPartial = {}
+    add_code = SET_OPS.op_code("add")
+    for ts, op_code, first, _ in RECORD.iter_unpack(records):
+        # Set and edge records are both a last addition and a last removal
+        op: LWWGraphOpName = "add_e" if op_code == add_code else "del_e"
+        elements[first] = merge_edge_op(elements.get(first, NO_EDGE), op, ts)
+    return elements
+
+
+def _flatten(family: OpFamily[O], ops: Iterable[O]) -> List[_FlatOp]:
+    """The operations as tuples, which unlike parametrized models can be sent
+    to other processes"""
+    op_codes = {name: code for code, name in enumerate(family.op_names)}
+    return [(op.ts, op_codes[op.op], family.args(op)) for op in ops]
+
+
+def _encode(ops: List[_FlatOp]) -> Tuple[memoryview, List[Any]]:
+    table = ValueTable()
+    records = []
+    for ts, op_code, args in ops:
+        ids = [table.intern(value) for value in args]
+        second = ids[1] if len(ids) == 2 else NO_VALUE
+        records.append(RECORD.pack(ts, op_code, ids[0], second))
+    return memoryview(b"".join(records)), table.values
+
+
+def _resolve_graph_range(shm_name: str, start: int, stop: int) -> _GraphPartial:
+    """Worker: reduce the graph records ``start`` to ``stop``."""
+    shm = SharedMemory(name=shm_name)
+    records = _shared_view(shm)[start * RECORD.size : stop * RECORD.size]
+    try:
+        return _reduce_graph_records(records)
+    finally:
+        records.release()
+        shm.close()
+
+
+def _resolve_set_range(shm_name: str, start: int, stop: int) -> _SetPartial:
+    """Worker: reduce the set records ``start`` to ``stop``."""
+    shm = SharedMemory(name=shm_name)
+    records = _shared_view(shm)[start * RECORD.size : stop * RECORD.size]
+    try:
+        return _reduce_set_records(records)
+    finally:
+        records.release()
+        shm.close()
+
+
+def _resolve_graph_slice(ops: List[_FlatOp]) -> Tuple[_GraphPartial, List[Any]]:
+    """Worker: encode and reduce a slice of graph operations, keyed by the ids
+    of the returned values."""
+    records, values = _encode(ops)
+    return _reduce_graph_records(records), values
+
+
+def _resolve_set_slice(ops: List[_FlatOp]) -> Tuple[_SetPartial, List[Any]]:
+    """Worker: encode and reduce a slice of set operations, keyed by the ids of
+    the returned values."""
+    records, values = _encode(ops)
+    return _reduce_set_records(records), values
+
+
+def _worker_count(n_records: int, workers: Optional[int]) -> int:
+    workers = workers or os.cpu_count() or 1
+    return max(1, min(workers, n_records // MIN_RECORDS_PER_WORKER))
+
+
+def _map_ranges(worker: Any, records: memoryview, workers: Optional[int]) -> List[Any]:
+    """Copy ``records`` to shared memory, and apply ``worker`` to ranges of
+    records in as many processes."""
+    n_records = len(records) // RECORD.size
+    workers = _worker_count(n_records, workers)
+    shm = SharedMemory(create=True, size=max(1, len(records)))
+    try:
+        _shared_view(shm)[: len(records)] = records
+        bounds = [n_records * i // workers for i in range(workers + 1)]
+        if workers == 1:
+            return [worker(shm.name, 0, n_records)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(worker, shm.name, start, stop)
+                for start, stop in zip(bounds, bounds[1:])
+            ]
+            return [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _map_slices(worker: Any, ops: List[Any], workers: Optional[int]) -> List[Any]:
+    """Apply ``worker`` to slices of ``ops`` in as many processes."""
+    workers = _worker_count(len(ops), workers)
+    if workers == 1:
+        return [worker(ops)]
+    bounds = [len(ops) * i // workers for i in range(workers + 1)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(worker, ops[start:stop])
+            for start, stop in zip(bounds, bounds[1:])
+        ]
+        return [future.result() for future in futures]
+
+
+def _rebase_graph_partial(
+    partial: _GraphPartial, values: List[Any], table: ValueTable
+) -> _GraphPartial:
+    """Key the records of ``partial``, keyed by the ids of ``values``, by the
+    ids of ``table`` instead."""
+    vertices, edges = partial
+    ids = [table.intern(value) for value in values]
+    rebased_edges: Dict[Tuple[int, int], EdgeRecord] = {}
+    for (a, b), record in edges.items():
+        first, second = ids[a], ids[b]
+        key = (first, second) if first <= second else (second, first)
+        rebased_edges[key] = record
+    return {ids[i]: record for i, record in vertices.items()}, rebased_edges
+
+
+def _merge_graph_partials(
+    partials: List[_GraphPartial], values: List[Any]
+) -> ResolvedGraph[Any]:
+    vertex_records: Dict[int, VertexRecord] = {}
+    edge_records: Dict[Tuple[int, int], EdgeRecord] = {}
+    for vertices, edges in partials:
+        for vertex_id, v_record in vertices.items():
+            previous = vertex_records.get(vertex_id)
+            vertex_records[vertex_id] = (
+                v_record
+                if previous is None
+                else merge_vertex_records(previous, v_record)
+            )
+        for edge_ids, e_record in edges.items():
+            edge_records[edge_ids] = merge_edge_records(
+                edge_records.get(edge_ids, NO_EDGE), e_record
+            )
+    tables = GraphTables(
+        vertices={values[i]: record for i, record in vertex_records.items()},
+        edges={
+            SlotEdge(values[a], values[b]): record
+            for (a, b), record in edge_records.items()
+        },
+    )
+    # Edges removed by vertex removals are only known once all records merged
+    live_vertices, live_edges = tables.live_vertices(), tables.live_edges()
+    return ResolvedGraph(
+        tables=tables,
+        vertices=live_vertices,
+        edges=live_edges,
+        components=build_components(build_adjacency(live_vertices, live_edges)),
+    )
+
+
+def _merge_set_partials(partials: List[_SetPartial], values: List[Any]) -> Set[Any]:
+    records: _SetPartial = {}
+    for elements in partials:
+        for element_id, record in elements.items():
+            records[element_id] = merge_edge_records(
+                records.get(element_id, NO_EDGE), record
+            )
+    return {
+        values[i]
+        for i, (added, removed) in records.items()
+        if added is not None and (removed is None or added > removed)
+    }
+
+
+def resolve_graph_operations(
+    ops: Iterable[LWWGraphOperation], workers: Optional[int] = None
+) -> ResolvedGraph[Any]:
+    """Resolve a graph operations log using ``workers`` processes (by default,
+    one per CPU), which each encode and reduce a slice of it."""
+    table = ValueTable()
+    partials = [
+        _rebase_graph_partial(partial, values, table)
+        for partial, values in _map_slices(
+            _resolve_graph_slice, _flatten(GRAPH_OPS, ops), workers
+        )
+    ]
+    return _merge_graph_partials(partials, table.values)
+
+
+def resolve_graph_snapshot(
+    path: str, workers: Optional[int] = None
+) -> ResolvedGraph[Any]:
+    """Resolve the graph snapshot at ``path``, whose records are shared with
+    the workers without being decoded."""
+    with mapped_snapshot(path, GRAPH_OPS) as (values, records):
+        partials = _map_ranges(_resolve_graph_range, records, workers)
+    return _merge_graph_partials(partials, values)
+
+
+def resolve_set_operations(
+    ops: Iterable[LWWSetOperation], workers: Optional[int] = None
+) -> Set[Any]:
+    """Return the elements of the set resulting from ``ops``, using
+    ``workers`` processes (by default, one per CPU), which each encode and
+    reduce a slice of them."""
+    table = ValueTable()
+    partials = [
+        {table.intern(values[i]): record for i, record in partial.items()}
+        for partial, values in _map_slices(
+            _resolve_set_slice, _flatten(SET_OPS, ops), workers
+        )
+    ]
+    return _merge_set_partials(partials, table.values)
+
+
+def resolve_set_snapshot(path: str, workers: Optional[int] = None) -> Set[Any]:
+    """Return the elements of the set snapshot at ``path``."""
+    with mapped_snapshot(path, SET_OPS) as (values, records):
+        partials = _map_ranges(_resolve_set_range, records, workers)
+    return _merge_set_partials(partials, values)
@@ -0,0 +1,146 @@
+"""Compact binary encoding of operations. An operation is stored as a
+fixed-size record (timestamp, operation code, and the ids of up to two interned
+argument values) referring to a side table of JSON-encoded values."""
+# pylint: disable=missing-function-docstring,too-few-public-methods
+import json
+import struct
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Final,
+    FrozenSet,
+    Generic,
+    Iterable,
+    List,
+    Sequence,
+    Tuple,
+)
+
+from crdt.lww_graph.edge import BaseEdge
+from crdt.lww_graph.operation import LWWGraphOperation
+from crdt.lww_set.operation import LWWSetOperation
+from crdt.persistence.interface import O, PersistenceError
+
+# Record layout: int64 timestamp, uint8 operation code, uint32 value ids.
+RECORD: Final[struct.Struct] = struct.Struct("<qBII")
+# The same layout, as a NumPy structured dtype specification
+RECORD_DTYPE: Final[List[Tuple[str, str]]] = [
+    ("ts", "<i8"),
+    ("op", "u1"),
+    ("first", "<u4"),
+    ("second", "<u4"),
+]
+
+# Value id of the unused second argument of vertex and set operations
+NO_VALUE: Final[int] = 0xFFFFFFFF
+
+
+@dataclass(frozen=True)
+class OpFamily(Generic[O]):
+    """Describes how the operations of one kind of CRDT map to records. The
+    code of an operation is its index in ``op_names``."""
+
+    code: int
+    op_names: Tuple[str, ...]
+    edge_ops: FrozenSet[str]
+    model: Callable[..., O]
+
+    def op_code(self, op_name: str) -> int:
+        return self.op_names.index(op_name)
+
+    def args(self, op: O) -> Tuple[Any, ...]:
+        """The values that make up the argument of ``op``"""
+        if op.op in self.edge_ops:
+            return op.arg.vertices
+        return (op.arg,)
+
+    def build(self, op_code: int, args: Sequence[Any], ts: int) -> O:
+        """Create the operation described by an operation code, its argument
+        values and its timestamp."""
+        try:
+            op_name = self.op_names[op_code]
+        except IndexError as e:
+            raise PersistenceError(f"Unknown operation code {op_code}") from e
+        if op_name in self.edge_ops:
+            a, b = args
+            return self.model(op=op_name, arg=BaseEdge(a=a, b=b), ts=ts)
+        return self.model(op=op_name, arg=args[0], ts=ts)
+
+
+SET_OPS: Final[OpFamily[LWWSetOperation]] = OpFamily(
+    code=0, op_names=("add", "del"), edge_ops=frozenset(), model=LWWSetOperation
+)
+
+GRAPH_OPS: Final[OpFamily[LWWGraphOperation]] = OpFamily(
+    code=1,
+    op_names=("add_v", "del_v", "add_e", "del_e"),
+    edge_ops=frozenset({"add_e", "del_e"}),
+    model=LWWGraphOperation,
+)
+
+
+def freeze_value(value: Any) -> Any:
+    """JSON has no tuples; atoms are hashable, so lists must have been
+    tuples."""
+    if isinstance(value, list):
+        return tuple(freeze_value(v) for v in value)
+    return value
+
+
+def encode_value(value: Any) -> bytes:
+    try:
+        return json.dumps(value, separators=(",", ":")).encode()
+    except TypeError as e:
+        raise PersistenceError(f"Can't encode atom {value!r}") from e
+
+
+def decode_value(data: bytes) -> Any:
+    try:
+        return freeze_value(json.loads(data))
+    except ValueError as e:
+        raise PersistenceError(f"Can't decode atom {bytes(data)!r}") from e
+
+
+class ValueTable:
+    """Interns the atoms referred to by records"""
+
+    def __init__(self, values: Iterable[Any] = ()) -> None:
+        self.values: List[Any] = []
+        self._ids: Dict[Any, int] = {}
+        for value in values:
+            self.intern(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value: Any) -> int:
+        """Return the id of ``value``, adding it to the table if needed."""
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            if value_id >= NO_VALUE:
+                raise PersistenceError("Too many distinct values")
+            self._ids[value] = value_id
+            self.values.append(value)
+        return value_id
+
+
+def encode_record(family: OpFamily[O], op: O, table: ValueTable) -> bytes:
+    ids = [table.intern(v) for v in family.args(op)]
+    first, second = (ids[0], ids[1]) if len(ids) == 2 else (ids[0], NO_VALUE)
+    return RECORD.pack(op.ts, family.op_code(op.op), first, second)
+
+
+def decode_record(
+    family: OpFamily[O], record: Tuple[int, int, int, int], values: Sequence[Any]
+) -> O:
+    ts, op_code, first, second = record
+    try:
+        args = (
+            [values[first]] if second == NO_VALUE else [values[first], values[second]]
+        )
+    except IndexError as e:
+        raise PersistenceError(f"Record refers to unknown value: {record}") from e
+    return family.build(op_code, args, ts)
@@ -0,0 +1,73 @@
+"""Building blocks of the replicas stored in Redis. Their records are kept in
+Redis hashes and merged by Lua scripts, so that several processes can share a
+replica, and their live elements in Redis sets, so that reading them doesn't
+replay anything.
+
+Atoms are stored as their JSON encoding, and timestamps as decimal strings:
+Lua numbers are doubles, which can't hold nanosecond timestamps exactly."""
+from __future__ import annotations
+
+import itertools
+from typing import Any, Final, Iterable, Iterator, List, Sequence
+
+from redis import Redis
+from redis.commands.core import Script
+
+from crdt.persistence.interface import PersistenceError
+from crdt.persistence.records import decode_value, encode_value
+
+DEFAULT_BATCH_SIZE: Final[int] = 1000
+
+# Lua function comparing two timestamps encoded by encode_timestamp, the second
+# of which may be missing (false, as returned by a Redis call).
+LATER_LUA: Final[
+    str
+] = """
+local function later(a, b)
+  if not b then return true end
+  if #a ~= #b then return #a > #b end
+  return a > b
+end
+"""
+
+
+def encode_timestamp(ts: int) -> str:
+    """Encode a timestamp as a decimal string, which the Lua function ``later``
+    compares exactly."""
+    if ts < 0:
+        raise PersistenceError(f"Can't store negative timestamp {ts} in Redis")
+    return str(ts)
+
+
+def encode_atom(value: Any) -> str:
+    """Encode an atom as its JSON encoding, used as Redis hash field and set
+    member."""
+    return encode_value(value).decode()
+
+
+def key(name: str, suffix: str) -> str:
+    """Key of one of the structures of the replica ``name``. The name is a hash
+    tag, so that all the keys of a replica live on the same cluster node."""
+    return f"{{{name}}}:{suffix}"
+
+
+def run_batched(
+    client: Redis,
+    script: Script,
+    keys: Sequence[str],
+    args: Iterable[Sequence[Any]],
+    batch_size: int,
+) -> List[Any]:
+    """Run ``script`` on batches of ``batch_size`` argument tuples, sending all
+    the calls in one pipeline, and return the result of each call."""
+    pipeline = client.pipeline(transaction=False)
+    iterator = iter(args)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        script(keys=keys, args=[arg for t in batch for arg in t], client=pipeline)
+    return list(pipeline.execute())
+
+
+def scan_atoms(client: Redis, set_key: str, batch_size: int) -> Iterator[Any]:
+    """Stream the atoms of a Redis set."""
+    for data in client.sscan_iter(set_key, count=batch_size):
+        yield decode_value(data)
@@ -0,0 +1,153 @@
+"""Snapshots are binary files holding a compacted operations log: a header, the
+table of interned values, then the fixed-size operation records. The header
+also holds the stability frontier of the replica, if any, as collecting garbage
+drops the records that protect the snapshot from operations before it.
+Snapshots are read back through ``mmap``, so that only the pages actually
+decoded are loaded."""
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from typing import Any, Dict, Final, Iterable, Iterator, List, Optional, Tuple
+
+from crdt.persistence.interface import O, PersistenceError
+from crdt.persistence.records import (
+    RECORD,
+    OpFamily,
+    ValueTable,
+    decode_record,
+    decode_value,
+    encode_record,
+    encode_value,
+)
+
+_MAGIC: Final[bytes] = b"CRDTSNAP"
+_VERSION: Final[int] = 2
+# magic, version, op family code, whether a frontier is stored, number of
+# values, number of records, offset of the records section, stability frontier
+_HEADER: Final[struct.Struct] = struct.Struct("<8sHB?4xQQQq")
+# Version 1 snapshots have no frontier
+_HEADERS: Final[Dict[int, struct.Struct]] = {
+    1: struct.Struct("<8sHB5xQQQ"),
+    _VERSION: _HEADER,
+}
+_PREFIX: Final[struct.Struct] = struct.Struct("<8sH")
+_LENGTH: Final[struct.Struct] = struct.Struct("<I")
+
+
+def fsync_directory(directory: str) -> None:
+    """Make a rename or a file creation in ``directory`` durable."""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_snapshot(
+    path: str, family: OpFamily[O], ops: Iterable[O], frontier: Optional[int] = None
+) -> None:
+    """Atomically replace the snapshot at ``path`` by one holding ``ops``, and
+    the stability ``frontier`` of the replica if given."""
+    table = ValueTable()
+    records = b"".join(encode_record(family, op, table) for op in ops)
+    encoded_values = [encode_value(v) for v in table.values]
+    records_offset = _HEADER.size + sum(_LENGTH.size + len(v) for v in encoded_values)
+    header = _HEADER.pack(
+        _MAGIC,
+        _VERSION,
+        family.code,
+        frontier is not None,
+        len(encoded_values),
+        len(records) // RECORD.size,
+        records_offset,
+        frontier or 0,
+    )
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for value in encoded_values:
+            f.write(_LENGTH.pack(len(value)))
+            f.write(value)
+        f.write(records)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def _read_values(view: memoryview, position: int, n_values: int) -> List[Any]:
+    values = []
+    for _ in range(n_values):
+        (length,) = _LENGTH.unpack_from(view, position)
+        position += _LENGTH.size
+        values.append(decode_value(bytes(view[position : position + length])))
+        position += length
+    return values
+
+
+def _read_header(
+    view: memoryview, path: str
+) -> Tuple[int, int, int, int, int, Optional[int]]:
+    """The size of the header, the op family code, the numbers of values and
+    records, the offset of the records section and the frontier"""
+    if len(view) < _PREFIX.size:
+        raise PersistenceError(f"Truncated snapshot {path}")
+    magic, version = _PREFIX.unpack_from(view)
+    header = _HEADERS.get(version)
+    if magic != _MAGIC or header is None:
+        raise PersistenceError(f"{path} is not a supported snapshot")
+    if len(view) < header.size:
+        raise PersistenceError(f"Truncated snapshot {path}")
+    if version == 1:
+        _, _, family_code, n_values, n_records, offset = header.unpack_from(view)
+        return header.size, family_code, n_values, n_records, offset, None
+    fields = header.unpack_from(view)
+    _, _, family_code, has_frontier, n_values, n_records, offset = fields[:-1]
+    frontier = fields[-1] if has_frontier else None
+    return header.size, family_code, n_values, n_records, offset, frontier
+
+
+@contextmanager
+def _mapped(
+    path: str, family: OpFamily[O]
+) -> Iterator[Tuple[List[Any], memoryview, Optional[int]]]:
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped, memoryview(mapped) as view:
+        size, family_code, n_values, n_records, offset, frontier = _read_header(
+            view, path
+        )
+        if family_code != family.code:
+            raise PersistenceError(f"{path} holds another kind of operations")
+        if offset + n_records * RECORD.size > len(view):
+            raise PersistenceError(f"Truncated snapshot {path}")
+        values = _read_values(view, size, n_values)
+        records = view[offset : offset + n_records * RECORD.size]
+        try:
+            yield values, records, frontier
+        finally:
+            records.release()
+
+
+@contextmanager
+def mapped_snapshot(
+    path: str, family: OpFamily[O]
+) -> Iterator[Tuple[List[Any], memoryview]]:
+    """Map the snapshot at ``path``, and provide its value table and the view
+    of its records section."""
+    with _mapped(path, family) as (values, records, _):
+        yield values, records
+
+
+def read_snapshot(path: str, family: OpFamily[O]) -> Iterator[O]:
+    """Lazily decode the operations stored in the snapshot at ``path``."""
+    with mapped_snapshot(path, family) as (values, records):
+        for record in RECORD.iter_unpack(records):
+            yield decode_record(family, record, values)
+
+
+def read_snapshot_frontier(path: str, family: OpFamily[O]) -> Optional[int]:
+    """The stability frontier stored in the snapshot at ``path``, if any"""
+    with _mapped(path, family) as (_, __, frontier):
+        return frontier
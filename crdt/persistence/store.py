@@ -0,0 +1,102 @@
+"""A replica store is a directory holding the last snapshot of a replica and
+the write-ahead log of the operations applied since."""
+import itertools
+import os
+from typing import Final, Generic, Iterable, Iterator, Optional
+
+from crdt.persistence.interface import CompactableReplica, O
+from crdt.persistence.records import OpFamily
+from crdt.persistence.snapshot import (
+    read_snapshot,
+    read_snapshot_frontier,
+    write_snapshot,
+)
+from crdt.persistence.wal import WriteAheadLog
+
+SNAPSHOT_FILE: Final[str] = "snapshot.bin"
+WAL_FILE: Final[str] = "wal.log"
+
+
+class ReplicaStore(Generic[O]):
+    """Persists the operations of one replica. Recovery reads the snapshot and
+    replays the write-ahead log tail, so its cost is bounded by the size of the
+    snapshot plus the number of operations since the last checkpoint.
+    Every ``checkpoint_every`` logged operations, the replica is compacted and
+    written as the new snapshot, and the write-ahead log is emptied.
+
+    The stability frontier of replicas that collect garbage is written with
+    each snapshot, and restored with it."""
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        directory: str,
+        family: OpFamily[O],
+        checkpoint_every: int = 100_000,
+        sync_every: int = 1,
+        sync_interval: Optional[float] = None,
+    ) -> None:
+        """Open the store in ``directory``, creating it if needed.
+
+        Params
+            directory: where the snapshot and log files are kept
+            family: the kind of operations stored
+            checkpoint_every: number of logged operations between two snapshots
+            sync_every: number of logged operations between two fsyncs
+            sync_interval: number of seconds after an fsync past which the
+                next append fsyncs: an idle log is only synced by that append
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.family: OpFamily[O] = family
+        self.checkpoint_every = checkpoint_every
+        self._since_checkpoint = 0
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.wal: WriteAheadLog[O] = WriteAheadLog(
+            os.path.join(directory, WAL_FILE),
+            family=family,
+            sync_every=sync_every,
+            sync_interval=sync_interval,
+        )
+
+    def recover(self) -> Iterator[O]:
+        """Iterate over the snapshot operations, then the logged ones."""
+        snapshot: Iterable[O] = ()
+        if os.path.exists(self.snapshot_path):
+            snapshot = read_snapshot(self.snapshot_path, self.family)
+        return itertools.chain(snapshot, self.wal)
+
+    def restore(self, replica: CompactableReplica[O]) -> None:
+        """Apply all persisted operations to an empty replica, and restore its
+        stability frontier."""
+        replica.apply(self.recover())
+        if os.path.exists(self.snapshot_path):
+            frontier = read_snapshot_frontier(self.snapshot_path, self.family)
+            if frontier is not None:
+                getattr(replica, "collect_garbage")(frontier)
+
+    def log(self, op: O, replica: CompactableReplica[O]) -> None:
+        """Log an operation that was applied to ``replica``, checkpointing the
+        replica when due."""
+        self.wal.append(op)
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint(replica)
+
+    def checkpoint(self, replica: CompactableReplica[O]) -> None:
+        """Compact ``replica``, which must hold all operations logged so far,
+        write it as the new snapshot and empty the log. A crash between the two
+        steps only causes logged operations to be replayed twice, which is
+        harmless as operations are idempotent."""
+        replica.compact()
+        write_snapshot(
+            self.snapshot_path,
+            self.family,
+            replica.operations,
+            getattr(replica, "frontier", None),
+        )
+        self.wal.truncate()
+        self._since_checkpoint = 0
+
+    def close(self) -> None:
+        """Make all logged operations durable and release the log file."""
+        self.wal.close()
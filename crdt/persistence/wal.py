@@ -0,0 +1,117 @@
+"""Append-only write-ahead log of the operations applied since the last
+snapshot. Each entry is self-contained and checksummed, so that a torn write at
+the end of the log (f.e. after a power loss) is detected and discarded."""
+import os
+import struct
+import time
+import zlib
+from typing import BinaryIO, Final, Generic, Iterator, Optional, Tuple
+
+from crdt.persistence.interface import O, PersistenceError
+from crdt.persistence.records import OpFamily, decode_value, encode_value
+from crdt.persistence.snapshot import fsync_directory
+
+# payload length, crc32 of the rest of the entry, timestamp, operation code
+_ENTRY: Final[struct.Struct] = struct.Struct("<IIqB")
+_CHECKED: Final[struct.Struct] = struct.Struct("<qB")
+
+
+def _checksum(ts: int, op_code: int, payload: bytes) -> int:
+    return zlib.crc32(_CHECKED.pack(ts, op_code) + payload)
+
+
+def _scan(f: BinaryIO) -> Iterator[Tuple[int, int, int, bytes]]:
+    """Yield the (end offset, timestamp, operation code, payload) of each valid
+    entry, stopping at the first truncated or corrupted one."""
+    position = 0
+    while True:
+        header = f.read(_ENTRY.size)
+        if len(header) < _ENTRY.size:
+            return
+        length, crc, ts, op_code = _ENTRY.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or _checksum(ts, op_code, payload) != crc:
+            return
+        position += _ENTRY.size + length
+        yield position, ts, op_code, payload
+
+
+class WriteAheadLog(Generic[O]):
+    """Durable log of operations. Writes are flushed and fsync'ed in batches:
+    after ``sync_every`` appends, or when an append happens more than
+    ``sync_interval`` seconds after the last sync, whichever comes first."""
+
+    def __init__(
+        self,
+        path: str,
+        family: OpFamily[O],
+        sync_every: int = 1,
+        sync_interval: Optional[float] = None,
+    ) -> None:
+        """Open the log at ``path``, creating it if needed and discarding any
+        torn entry at its end.
+
+        Params
+            path: location of the log file
+            family: the kind of operations logged
+            sync_every: number of appends between two fsyncs
+            sync_interval: number of seconds after an fsync past which the
+                next append fsyncs: an idle log is only synced by that append
+        """
+        if sync_every < 1:
+            raise PersistenceError("sync_every must be at least 1")
+        self.path = path
+        self.family: OpFamily[O] = family
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        created = not os.path.exists(path)
+        self._file = open(path, "ab+")  # pylint: disable=consider-using-with
+        self._file.seek(0)
+        valid_end = 0
+        for valid_end, *_ in _scan(self._file):
+            pass
+        self._file.truncate(valid_end)
+        self._file.seek(valid_end)
+        if created:
+            fsync_directory(os.path.dirname(os.path.abspath(path)))
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def __iter__(self) -> Iterator[O]:
+        """Iterate over the logged operations"""
+        self._file.flush()
+        with open(self.path, "rb") as f:
+            for _, ts, op_code, payload in _scan(f):
+                yield self.family.build(op_code, decode_value(payload), ts)
+
+    def append(self, op: O) -> None:
+        """Log ``op``, making it durable if a sync is due."""
+        payload = encode_value(self.family.args(op))
+        op_code = self.family.op_code(op.op)
+        crc = _checksum(op.ts, op_code, payload)
+        self._file.write(_ENTRY.pack(len(payload), crc, op.ts, op_code))
+        self._file.write(payload)
+        self._pending += 1
+        if self._pending >= self.sync_every or (
+            self.sync_interval is not None
+            and time.monotonic() - self._last_sync >= self.sync_interval
+        ):
+            self.sync()
+
+    def sync(self) -> None:
+        """Make all appended operations durable."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def truncate(self) -> None:
+        """Durably empty the log, f.e. once a snapshot covers its content."""
+        self._file.truncate(0)
+        self._file.seek(0)
+        self.sync()
+
+    def close(self) -> None:
+        """Make all appended operations durable and close the log file."""
+        self.sync()
+        self._file.close()
@@ -4,6 +4,7 @@ from typing import List
 
 import pytest
 
+from crdt.clock.impl.hybrid import HybridLogicalClock
 from crdt.clock.impl.mocktime import MockMonotonicClock
 from crdt.clock.impl.realtime import MonotonicRealTimeClock
 from crdt.clock.interface import Clock
@@ -15,6 +16,7 @@ def make_new_instance_of_each_impl() -> List[Clock]:
     return [
         MockMonotonicClock(0),
         MonotonicRealTimeClock(0),
+        HybridLogicalClock(MonotonicRealTimeClock(0), node_id=1),
     ]
 
 
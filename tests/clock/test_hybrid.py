@@ -0,0 +1,62 @@
+"""Test the specific hybrid logical clock implementation"""
+from pytest import raises
+
+from crdt.clock.impl.hybrid import HybridLogicalClock
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.clock.interface import ClockError
+
+
+def test_hybrid_logical_clock__unique_across_nodes() -> None:
+    """Two nodes sharing the same stalled physical time issue strictly
+    increasing timestamps, and never the same one"""
+    physical = MockMonotonicClock(0)
+    physical.step_size = 0
+    a = HybridLogicalClock(physical, node_id=1)
+    b = HybridLogicalClock(physical, node_id=2)
+    ts_a = [a.nanoseconds for _ in range(100)]
+    ts_b = [b.nanoseconds for _ in range(100)]
+    assert ts_a == sorted(set(ts_a))
+    assert ts_b == sorted(set(ts_b))
+    assert not set(ts_a) & set(ts_b)
+
+
+def test_hybrid_logical_clock__follows_physical_time() -> None:
+    """Timestamps stay in the timeframe of the physical clock"""
+    physical = MockMonotonicClock(0)
+    clock = HybridLogicalClock(physical, node_id=3, node_bits=4)
+    physical.next_tick = 10**9
+    assert clock.nanoseconds == 10**9 | 3
+
+
+def test_hybrid_logical_clock__update() -> None:
+    """Timestamps issued after observing a remote timestamp are greater"""
+    clock = HybridLogicalClock(MockMonotonicClock(0), node_id=1)
+    remote = 10**12
+    clock.update(remote)
+    assert clock.nanoseconds > remote
+    clock.update(0)
+    assert clock.nanoseconds > remote
+
+
+def test_hybrid_logical_clock__reserve() -> None:
+    """A reserved block holds increasing timestamps, all lower than the
+    following ones, and costs a single physical clock read"""
+    physical = MockMonotonicClock(0)
+    clock = HybridLogicalClock(physical, node_id=5)
+    before = clock.nanoseconds
+    now = physical.now
+    block = clock.reserve(10_000)
+    assert physical.now == now + 1
+    assert len(block) == 10_000
+    assert list(block) == sorted(set(block))
+    assert before < block[0]
+    assert block[-1] < clock.nanoseconds
+    assert len(clock.reserve(0)) == 0
+
+
+def test_hybrid_logical_clock__raises_on_bad_arguments() -> None:
+    """Node ids must fit in the node bits, and blocks can't be negative"""
+    with raises(ClockError):
+        HybridLogicalClock(MockMonotonicClock(0), node_id=16, node_bits=4)
+    with raises(ClockError):
+        HybridLogicalClock(MockMonotonicClock(0), node_id=1).reserve(-1)
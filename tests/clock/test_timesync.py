@@ -0,0 +1,86 @@
+"""Test the clock synchronization protocol: the client-side synced clock and
+the server-side tracker"""
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.clock.impl.synced import SyncedClock
+from crdt.clock.timesync import TimeSync, TimeSyncAck, TimeSyncTracker
+
+
+def stopped_clock(now: int) -> MockMonotonicClock:
+    """A mock clock that only moves when its next tick is set"""
+    clock = MockMonotonicClock(now)
+    clock.step_size = 0
+    return clock
+
+
+def test_synced_clock__extrapolates_global_time() -> None:
+    """The clock follows the last timesync, and corrects the drift of the
+    local clock"""
+    local = stopped_clock(0)
+    clock = SyncedClock(local, smoothing=1)
+    assert clock.nanoseconds == 0
+    clock.receive(TimeSync(index=0, ts=10_000, rtt=200))
+    assert clock.nanoseconds == 10_100
+    assert clock.skew == 10_100
+    local.next_tick = 1000
+    assert clock.nanoseconds == 11_100
+    # The global clock runs twice as fast as the local clock
+    clock.receive(TimeSync(index=1, ts=12_000, rtt=200))
+    assert clock.drift == 1.0
+    local.next_tick = 1100
+    assert clock.nanoseconds == 12_300
+
+
+def test_synced_clock__is_monotonic() -> None:
+    """Out-of-order timesyncs are ignored, and time never goes backward"""
+    local = stopped_clock(0)
+    clock = SyncedClock(local)
+    clock.receive(TimeSync(index=5, ts=10_000))
+    clock.receive(TimeSync(index=4, ts=50_000))
+    t1 = clock.nanoseconds
+    assert t1 == 10_000
+    clock.receive(TimeSync(index=6, ts=5_000))
+    assert clock.skew == t1
+    assert clock.nanoseconds > t1
+
+
+def test_synced_clock__ack() -> None:
+    """The acknowledgement refers to the last timesync received"""
+    local = stopped_clock(0)
+    clock = SyncedClock(local)
+    assert clock.ack() is None
+    clock.receive(TimeSync(index=3, ts=10_000))
+    local.next_tick = 50
+    assert clock.ack() == TimeSyncAck(index=3, guess=10_050, held=50)
+
+
+def test_synced_clock__ack_reads_the_local_clock_once() -> None:
+    """The guess and the holding time of an acknowledgement are measured at
+    the same instant"""
+    local = MockMonotonicClock(0)
+    clock = SyncedClock(local)
+    clock.receive(TimeSync(index=0, ts=10_000))
+    ack = clock.ack()
+    assert ack is not None
+    assert ack.guess - ack.held == 10_000
+
+
+def test_tracker__estimates_rtt_and_skew() -> None:
+    """The tracker estimates the round-trip delay and the skew of a client,
+    and forgets acknowledged timesyncs"""
+    server = stopped_clock(1000)
+    tracker = TimeSyncTracker(server, smoothing=1)
+    tracker.register("client")
+    assert tracker.idle("client", interval=100)
+    assert tracker.timesync("client") == TimeSync(index=0, ts=1000)
+    server.next_tick = 1010
+    assert tracker.timesync("client").index == 1
+    assert not tracker.idle("client", interval=100)
+    assert tracker.unacknowledged("client") == 2
+    # Sent at 1000, held 40, received at 1100: the round trip took 60
+    server.next_tick = 1100
+    tracker.acknowledge("client", TimeSyncAck(index=0, guess=1090, held=40))
+    assert tracker.rtt("client") == 60
+    assert tracker.skew("client") == 20
+    assert tracker.unacknowledged("client") == 1
+    assert tracker.timesync("client").rtt == 60
+    assert tracker.idle("client", interval=0)
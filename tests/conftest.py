@@ -0,0 +1,37 @@
+"""Fixtures shared by the tests of several packages"""
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+
+@pytest.fixture(name="redis_client")
+def fixture_redis_client(tmp_path: Path) -> Iterator[Any]:
+    """Client of an empty Redis server: a local redis-server if one is
+    installed, or else an in-process fake. Skip the test without the redis
+    package, or without both."""
+    redis = pytest.importorskip("redis")
+    if shutil.which("redis-server") is None:
+        fakeredis = pytest.importorskip("fakeredis")
+        yield fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        return
+    socket = str(tmp_path / "redis.sock")
+    with subprocess.Popen(
+        ["redis-server", "--port", "0", "--unixsocket", socket, "--save", ""],
+        stdout=subprocess.DEVNULL,
+    ) as server:
+        client = redis.Redis(unix_socket_path=socket)
+        try:
+            for _ in range(100):
+                try:
+                    client.ping()
+                    break
+                except redis.ConnectionError:
+                    time.sleep(0.05)
+            yield client
+        finally:
+            client.close()
+            server.terminate()
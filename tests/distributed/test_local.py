@@ -0,0 +1,282 @@
+"""Test the in-process client and server: replication, and clock
+synchronization piggybacked on operation batches"""
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import pytest
+
+from crdt.clock.impl.hybrid import HybridLogicalClock
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.clock.impl.synced import SyncedClock
+from crdt.distributed.batch import OpBatch
+from crdt.distributed.impl.local import LocalLWWGraphClient, LocalLWWGraphServer
+from crdt.distributed.interest import Interest
+from crdt.lww_graph.edge import FrozenEdge
+from crdt.lww_graph.impl.durable_lww_graph import DurableLWWGraph
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.interface import LWWGraphError
+from crdt.lww_graph.operation import LWWGraphOperation
+from crdt.lww_graph.path_cache import PathCache
+
+INTERVAL = 1000
+
+
+class RecordingClient(LocalLWWGraphClient[int]):
+    """Client recording the batches it receives"""
+
+    def __init__(self, local: MockMonotonicClock) -> None:
+        clock = SyncedClock(local)
+        super().__init__(LogLWWGraph(clock=clock), clock, INTERVAL)
+        self.received: List[OpBatch[int]] = []
+
+    def update(self, ops: Iterable[LWWGraphOperation[int]]) -> None:
+        assert isinstance(ops, OpBatch)
+        self.received.append(ops)
+        super().update(ops)
+
+
+def make_network(
+    n_clients: int, frontier_interval: Optional[int] = None
+) -> Tuple[MockMonotonicClock, LocalLWWGraphServer[int], List[RecordingClient]]:
+    """A server and connected clients, whose clocks only move when told to"""
+    server_clock = MockMonotonicClock(10**9)
+    server_clock.step_size = 0
+    server: LocalLWWGraphServer[int] = LocalLWWGraphServer(
+        LogLWWGraph(clock=server_clock), server_clock, INTERVAL, frontier_interval
+    )
+    clients = []
+    for _ in range(n_clients):
+        local = MockMonotonicClock(0)
+        local.step_size = 0
+        client = RecordingClient(local)
+        client.connect(server)
+        clients.append(client)
+    return server_clock, server, clients
+
+
+def test_replication() -> None:
+    """Operations of a client reach the other clients, with timestamps in the
+    global timeframe"""
+    _, server, (a, b) = make_network(2)
+    a.add_vertex(1)
+    b.add_vertex(2)
+    a.add_edge(FrozenEdge(1, 2))
+    assert b.check_connected(1, 2)
+    assert b.find_path(1, 2) == [FrozenEdge(1, 2)]
+    for graph in (a.graph, b.graph, server.graph):
+        assert set(graph.vertices) == {1, 2}
+    assert all(op.ts >= 10**9 for op in server.graph.operations)  # type: ignore
+
+
+def test_timesync_piggybacks_on_batches() -> None:
+    """Each forwarded batch carries a timesync, each sent batch an ack, and
+    heartbeats are only sent over idle links"""
+    server_clock, server, (a, b) = make_network(2)
+    assert [len(batch.received) for batch in (a, b)] == [1, 1]
+    a.add_vertex(1)
+    assert len(a.received) == 1
+    assert b.received[-1].ops and b.received[-1].timesync is not None
+    assert server.tracker.rtt(a) is not None
+    # Only the client that received nothing lately gets a heartbeat
+    server_clock.next_tick = 10**9 + INTERVAL
+    b.add_vertex(2)
+    server.tick()
+    assert len(a.received) == 2 and a.received[-1].ops
+    assert len(b.received) == 3 and not b.received[-1].ops
+    # Heartbeats from clients are also skipped on busy links
+    sent = server.tracker.unacknowledged(b)
+    b.tick()
+    assert server.tracker.unacknowledged(b) == sent
+    b.clock.local.next_tick = INTERVAL  # type: ignore
+    b.tick()
+    assert server.tracker.unacknowledged(b) == 0
+
+
+def test_path_cache() -> None:
+    """A client answers path queries from its path cache, which follows the
+    remote operations"""
+    _, server, (a, b) = make_network(2)
+    clock = SyncedClock(MockMonotonicClock(0))
+    graph: LogLWWGraph[int] = LogLWWGraph(clock=clock)
+    cached = LocalLWWGraphClient(graph, clock, INTERVAL, PathCache(graph))
+    cached.connect(server)
+    a.add_vertex(1)
+    b.add_vertex(2)
+    assert not cached.check_connected(1, 2)
+    a.add_edge(FrozenEdge(1, 2))
+    assert cached.check_connected(1, 2)
+    assert cached.find_path(1, 2) == [FrozenEdge(1, 2)]
+    b.remove_vertex(2)
+    assert cached.find_path(1, 2) == []
+    with pytest.raises(LWWGraphError):
+        LocalLWWGraphClient(LogLWWGraph(clock=clock), clock, INTERVAL, PathCache(graph))
+
+
+def test_stability_frontier() -> None:
+    """Once all clients reported a stable timestamp, the server collects its
+    garbage, and clients collect theirs when they receive the frontier"""
+    _, server, (a, b) = make_network(2, frontier_interval=1)
+    a.add_vertex(1)
+    a.remove_vertex(1)
+    a.add_vertex(2)
+    assert server.frontier is None  # b has not reported yet
+    b.clock.local.next_tick = INTERVAL  # type: ignore
+    b.add_vertex(3)
+    frontier = server.frontier
+    assert frontier is not None
+    assert all(op.arg != 1 for op in server.graph.operations)  # type: ignore
+    a.add_vertex(4)  # Forwarded to b with the frontier
+    assert b.frontier == frontier
+    assert all(op.arg != 1 for op in b.graph.operations)  # type: ignore
+    assert a.frontier is None
+    a.tick()
+    b.add_vertex(5)
+    assert a.frontier is not None and a.frontier >= frontier
+    late = LWWGraphOperation[int](op="add_v", arg=1, ts=frontier)
+    server.update(OpBatch(ops=[late]))
+    assert 1 not in server.graph
+    for graph in (a.graph, b.graph, server.graph):
+        assert set(graph.vertices) == {2, 3, 4, 5}
+
+
+def test_write_coalescing() -> None:
+    """Buffered local operations are collapsed per element, and uploaded on
+    size, on time or on demand"""
+    _, server, (b,) = make_network(1)
+    local = MockMonotonicClock(0)
+    clock = SyncedClock(local)
+    a: LocalLWWGraphClient[int] = LocalLWWGraphClient(
+        LogLWWGraph(clock=clock), clock, INTERVAL, flush_interval=10**6, max_pending=4
+    )
+    a.connect(server)
+    a.add_vertex(1)
+    a.add_vertex(2)
+    for _ in range(20):
+        a.add_edge(FrozenEdge(1, 2))
+        a.remove_edge(FrozenEdge(1, 2))
+    a.add_edge(FrozenEdge(1, 2))
+    assert len(b.received) == 1  # Only the initial state
+    a.flush()
+    # One operation per element and kind instead of 43
+    assert [op.op for op in b.received[-1].ops] == ["add_v", "add_v", "del_e", "add_e"]
+    assert b.check_connected(1, 2)
+    for v in (3, 4, 5, 6):
+        a.add_vertex(v)
+    assert len(b.received) == 3  # Four distinct elements fill the buffer
+    a.add_vertex(7)
+    a.tick()
+    assert len(b.received) == 3
+    local.next_tick += 10**6
+    a.tick()
+    assert len(b.received) == 4 and 7 in b.graph
+    for graph in (a.graph, b.graph, server.graph):
+        assert set(graph.vertices) == set(range(1, 8))
+        assert set(graph.edges) == {FrozenEdge(1, 2)}
+
+
+def test_writes_while_disconnected() -> None:
+    """Operations written before connecting are uploaded on connect"""
+    _, server, (b,) = make_network(1)
+    local = MockMonotonicClock(0)
+    local.step_size = 0
+    a = RecordingClient(local)
+    a.add_vertex(1)
+    a.add_vertex(2)
+    a.add_edge(FrozenEdge(1, 2))
+    a.tick()
+    a.connect(server)
+    for graph in (a.graph, b.graph, server.graph):
+        assert set(graph.vertices) == {1, 2}
+        assert set(graph.edges) == {FrozenEdge(1, 2)}
+
+
+def test_partial_replication() -> None:
+    """A subscribed client only receives its region, the edges crossing its
+    boundary and their far ends, and follows the region as it changes"""
+    _, server, (a,) = make_network(1)
+    for v in range(1, 7):
+        a.add_vertex(v)
+    for u, v in [(1, 2), (2, 3), (4, 5)]:
+        a.add_edge(FrozenEdge(u, v))
+    local = MockMonotonicClock(0)
+    local.step_size = 0
+    b = RecordingClient(local)
+    b.subscribe(Interest(frozenset({1}), hops=1))
+    b.connect(server)
+    assert set(b.graph.vertices) == {1, 2, 3}
+    assert set(b.graph.edges) == {FrozenEdge(1, 2), FrozenEdge(2, 3)}
+    received = len(b.received)
+    a.add_edge(FrozenEdge(5, 6))  # Outside the region
+    assert len(b.received) == received
+    a.add_edge(FrozenEdge(1, 4))  # Brings 4 in the region, and 5 in scope
+    assert set(b.graph.vertices) == {1, 2, 3, 4, 5}
+    assert FrozenEdge(4, 5) in b.graph
+    a.remove_vertex(3)
+    assert 3 not in b.graph
+    b.subscribe(Interest(frozenset({1}), hops=None))
+    assert set(b.graph.vertices) == {1, 2, 4, 5, 6}
+    b.subscribe(None)
+    a.add_vertex(7)
+    assert 7 in b.graph
+
+
+def test_hybrid_clock__follows_received_operations() -> None:
+    """A client whose graph has a hybrid clock timestamps its next operations
+    after those it receives, even when they come from a clock far ahead"""
+    local = MockMonotonicClock(0)
+    clock = SyncedClock(local)
+    graph: LogLWWGraph[int] = LogLWWGraph(clock=HybridLogicalClock(clock, node_id=1))
+    client: LocalLWWGraphClient[int] = LocalLWWGraphClient(graph, clock, INTERVAL)
+    ahead = LWWGraphOperation(op="add_v", arg=1, ts=10**15)
+    client.update(OpBatch(ops=[ahead]))
+    assert client.clock.nanoseconds < ahead.ts
+    client.remove_vertex(1)
+    assert 1 not in graph.vertices
+
+
+def test_hybrid_clock__stable_before_next_operations() -> None:
+    """The stable timestamp a client with a hybrid clock reports precedes its
+    next operations, so that the server doesn't drop them"""
+    server_clock, server, _ = make_network(0, frontier_interval=1)
+    local = MockMonotonicClock(0)
+    local.step_size = 0
+    clock = SyncedClock(local)
+    graph: LogLWWGraph[int] = LogLWWGraph(clock=HybridLogicalClock(clock, node_id=1))
+    client: LocalLWWGraphClient[int] = LocalLWWGraphClient(graph, clock, INTERVAL)
+    client.connect(server)
+    server_clock.next_tick += INTERVAL
+    client.tick()
+    assert server.frontier is not None
+    client.add_vertex(1)
+    assert 1 in server.graph
+
+
+def test_update__takes_a_generator() -> None:
+    """A client applies operations it receives from a one-shot iterable"""
+    clock = SyncedClock(MockMonotonicClock(0))
+    graph: LogLWWGraph[int] = LogLWWGraph(clock=clock)
+    client: LocalLWWGraphClient[int] = LocalLWWGraphClient(graph, clock, INTERVAL)
+    client.update(LWWGraphOperation(op="add_v", arg=v, ts=10 + v) for v in (1, 2))
+    assert set(graph.vertices) == {1, 2}
+
+
+def test_durable_server__new_clients_get_the_graph(tmp_path: Path) -> None:
+    """A server backed by a durable graph sends its operations to new
+    clients"""
+    server_clock = MockMonotonicClock(10**9)
+    graph: DurableLWWGraph[int] = DurableLWWGraph(str(tmp_path), server_clock)
+    try:
+        server: LocalLWWGraphServer[int] = LocalLWWGraphServer(
+            graph, server_clock, INTERVAL
+        )
+        a = RecordingClient(MockMonotonicClock(0))
+        a.connect(server)
+        a.add_vertex(1)
+        a.add_vertex(2)
+        a.add_edge(FrozenEdge(1, 2))
+        b = RecordingClient(MockMonotonicClock(0))
+        b.connect(server)
+        assert set(b.graph.vertices) == {1, 2}
+        assert set(b.graph.edges) == {FrozenEdge(1, 2)}
+    finally:
+        graph.close()
@@ -0,0 +1,64 @@
+"""Test the simulation harness: replicas converge over imperfect links, and
+the report accounts for what they exchanged"""
+import dataclasses
+
+import pytest
+
+from crdt.distributed.simulation import (
+    BATCH_HEADER_SIZE,
+    LinkModel,
+    Outage,
+    Simulation,
+    SimulationError,
+    Workload,
+)
+
+MS = 10**6
+WORKLOAD = Workload(ops_per_client=30, op_interval=100 * MS, vertices=10)
+
+
+def test_convergence__perfect_links() -> None:
+    """Over links without losses, replicas agree one round trip after the last
+    operation, and each operation is sent once and forwarded to all others"""
+    report = Simulation(4, LinkModel(delay=20 * MS), WORKLOAD).run(10**10)
+    assert report.convergence_time == 40 * MS
+    assert sum(stats.ops_sent for stats in report.clients) == report.server.ops_received
+    # Operations dropped by the server replica aren't forwarded
+    assert report.server.ops_sent <= 3 * report.server.ops_received
+    for stats in report.clients:
+        assert stats.ops_sent == WORKLOAD.ops_per_client
+        assert stats.bytes_sent > BATCH_HEADER_SIZE * stats.ops_sent
+        assert stats.peak_retained_ops > 0
+
+
+def test_convergence__lossy_reordering_links() -> None:
+    """Losses, reordering and disconnections delay the agreement of the
+    replicas, but they all end up with the same graph"""
+    link = LinkModel(
+        delay=20 * MS, jitter=50 * MS, loss=0.2, retransmit_timeout=200 * MS
+    )
+    outages = [Outage(client=0, start=500 * MS, end=4000 * MS)]
+    base = Simulation(4, LinkModel(delay=20 * MS), WORKLOAD, seed=3).run(10**10)
+    report = Simulation(
+        4,
+        link,
+        WORKLOAD,
+        outages=outages,
+        flush_interval=50 * MS,
+        frontier_interval=100 * MS,
+        seed=3,
+    ).run(10**11)
+    assert report.convergence_time >= base.convergence_time
+    # Retransmissions cost bytes
+    received = sum(stats.bytes_received for stats in report.clients)
+    assert report.server.bytes_sent > received
+    unordered = Simulation(
+        4, dataclasses.replace(link, fifo=False), WORKLOAD, outages=outages, seed=3
+    ).run(10**11)
+    assert unordered.convergence_time >= 0
+    with pytest.raises(SimulationError):
+        Simulation(
+            4, dataclasses.replace(link, fifo=False), WORKLOAD, frontier_interval=1
+        )
+    with pytest.raises(SimulationError):
+        Simulation(4, LinkModel(delay=MS), WORKLOAD).run(0)
@@ -0,0 +1,67 @@
+"""Test the graph switching engines by workload against the log-based one"""
+import logging
+import random
+
+import pytest
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.edge import FrozenEdge
+from crdt.lww_graph.impl.adaptive_lww_graph import AdaptiveLWWGraph
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.impl.persistent_lww_graph import PersistentLWWGraph
+from tests.lww_graph.test_log_lww_graph import random_ops
+
+
+def test_migrations__follow_read_write_ratio(caplog: pytest.LogCaptureFixture) -> None:
+    """Bulk writes keep the log, reads between writes migrate to the index,
+    and writes without reads migrate back, once the state was migrated"""
+    graph: AdaptiveLWWGraph[int] = AdaptiveLWWGraph(
+        MockMonotonicClock(0), window=10, write_ratio=4.0
+    )
+    for v in range(20):
+        graph.add_vertex(v)
+    assert graph.representation == "log" and not graph.migrations
+    with caplog.at_level(logging.INFO, logger="crdt.functools.workload"):
+        for v in range(5):
+            graph.add_edge(FrozenEdge(v, v + 1))
+            assert graph.neighbors(v + 1) == {v}
+        assert graph.representation == "indexed"
+        assert isinstance(graph.engine, PersistentLWWGraph)
+        assert "from log to indexed" in caplog.text
+        # The migration must be amortized by as many operations as it moved
+        for v in range(20):
+            graph.remove_vertex(v)
+        assert graph.representation == "indexed"
+        graph.apply(random_ops(random.Random(1), 10))
+        assert graph.representation == "log"
+        assert isinstance(graph.engine, LogLWWGraph)
+    assert len(graph.migrations) == 2
+    first, second = graph.migrations[0], graph.migrations[1]
+    assert (first.source, first.target) == ("log", "indexed")
+    assert first.reads == first.writes and first.size == 25
+    assert (second.source, second.target) == ("indexed", "log")
+    assert second.writes == 10 and second.size == 25 + 30
+
+
+def test_adaptive_graph__resolves_like_log() -> None:
+    """Operations in any order, and garbage collection, resolve like the
+    log-based graph across migrations"""
+    rng = random.Random(23)
+    for _ in range(50):
+        graph: AdaptiveLWWGraph[int] = AdaptiveLWWGraph(
+            MockMonotonicClock(0), window=4, write_ratio=2.0
+        )
+        reference: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+        for batch in range(10):
+            ops = random_ops(rng, rng.randrange(1, 8))
+            graph.apply(ops)
+            reference.apply(ops)
+            for _ in range(rng.randrange(6)):
+                v = rng.randrange(5)
+                assert graph.neighbors(v) == reference.neighbors(v)
+            if batch == 5:
+                graph.collect_garbage(50)
+                reference.collect_garbage(50)
+            assert set(graph.vertices) == set(reference.vertices)
+            assert set(graph.edges) == set(reference.edges)
+        assert graph.migrations
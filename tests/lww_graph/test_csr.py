@@ -0,0 +1,97 @@
+"""Test that CSR exports match the adjacency of the graphs, including when
+refreshed incrementally"""
+# pylint: disable=wrong-import-position
+import random
+from pathlib import Path
+from typing import Dict, Set
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.csr import CSR, CSRExporter, build_csr, update_csr
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from tests.lww_graph.test_log_lww_graph import random_ops
+from tests.lww_graph.test_lww_graph import (
+    close_each,
+    edge,
+    make_new_instance_of_each_impl,
+)
+
+
+def as_adjacency(csr: CSR[int]) -> Dict[int, Set[int]]:
+    """Decode the arrays, checking that rows are sorted"""
+    assert len(csr.indptr) == len(csr.vertices) + 1
+    assert csr.ids == {v: i for i, v in enumerate(csr.vertices)}
+    adjacency = {}
+    for i, vertex in enumerate(csr.vertices):
+        row = csr.indices[csr.indptr[i] : csr.indptr[i + 1]]
+        assert list(row) == sorted(row)
+        adjacency[vertex] = {csr.vertices[j] for j in row}
+    return adjacency
+
+
+def test_to_csr__each_engine(tmp_path: Path) -> None:
+    """All engines export the same adjacency"""
+    graphs = make_new_instance_of_each_impl(tmp_path)
+    try:
+        for graph in graphs:
+            for v in range(5):
+                graph.add_vertex(v)
+            for a, b in [(0, 1), (1, 2), (0, 2), (3, 4)]:
+                graph.add_edge(edge(a, b))
+            graph.remove_vertex(2)
+            csr = graph.to_csr()
+            assert as_adjacency(csr) == {0: {1}, 1: {0}, 3: {4}, 4: {3}}
+            degrees = [len(csr.neighbors(v)) for v in csr.vertices]
+            assert list(csr.degrees()) == degrees
+    finally:
+        close_each(graphs)
+
+
+def test_update_csr__keeps_clean_rows_and_ids() -> None:
+    """Updated rows are replaced, new vertices appended, others copied"""
+    previous = build_csr({0: {1}, 1: {0, 2}, 2: {1}, 3: set()})
+    updated = update_csr(previous, {2: {1, 4}, 4: {2}, 3: {0}, 0: {1, 3}})
+    assert updated.vertices == [0, 1, 2, 3, 4]
+    assert as_adjacency(updated) == {0: {1, 3}, 1: {0, 2}, 2: {1, 4}, 3: {0}, 4: {2}}
+    assert as_adjacency(previous) == {0: {1}, 1: {0, 2}, 2: {1}, 3: set()}
+
+
+def test_exporter__incremental_refresh_matches_rebuild() -> None:
+    """After each batch of random operations, the refreshed export decodes to
+    the adjacency of the graph, and small batches don't rebuild it"""
+    rng = random.Random(3)
+    graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+    for v in range(100):
+        graph.add_vertex(v)
+    exporter = CSRExporter(graph, rebuild_fraction=0.1)
+    exporter.refresh()
+    for _ in range(50):
+        a, b = rng.sample(range(100), 2)
+        graph.add_edge(edge(a, b))
+        if rng.random() < 0.3:
+            graph.remove_edge(edge(*rng.sample(range(100), 2)))
+        csr = exporter.refresh()
+        assert as_adjacency(csr) == graph.induced_subgraph(graph.vertices)
+    assert exporter.rebuilds == 1
+    graph.apply(random_ops(rng, 20))
+    csr = exporter.refresh()
+    assert as_adjacency(csr) == graph.induced_subgraph(graph.vertices)
+    assert exporter.refresh() is csr
+    exporter.close()
+    assert np.array_equal(graph.to_csr().indptr[-1:], [2 * len(list(graph.edges))])
+
+
+def test_exporter__reorder_window() -> None:
+    """In watermark mode, where the graph holds recent operations back from its
+    feed until it is read, refreshed exports still follow them"""
+    rng = random.Random(5)
+    graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0), reorder_window=3)
+    exporter = CSRExporter(graph)
+    for _ in range(300):
+        graph.apply(random_ops(rng, rng.randrange(1, 4)))
+        csr = exporter.refresh()
+        assert as_adjacency(csr) == graph.induced_subgraph(graph.vertices)
+    exporter.close()
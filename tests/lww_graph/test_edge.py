@@ -0,0 +1,20 @@
+"""Test the edge implementations"""
+from typing import Dict
+
+from crdt.lww_graph.edge import BaseEdge, Edge, FrozenEdge, SlotEdge
+
+
+def test_slot_edge__interoperates_with_other_edges() -> None:
+    """SlotEdges are canonical, compact, and interchangeable with other edges
+    as keys"""
+    edge = SlotEdge(1, "x")
+    assert edge == SlotEdge("x", 1) and edge.vertices == SlotEdge("x", 1).vertices
+    assert edge != SlotEdge(1, "y")
+    assert edge == FrozenEdge("x", 1) and BaseEdge(a=1, b="x") == edge
+    keyed: Dict[Edge, bool] = {edge: True}
+    assert keyed[BaseEdge(a="x", b=1)]
+    assert FrozenEdge(1, "x") in {edge}
+    assert 1 in edge and "y" not in edge
+    assert SlotEdge.from_edge(BaseEdge(a=2, b=2)) == FrozenEdge(2, 2)
+    assert edge.to_base_edge() == BaseEdge(a="x", b=1)
+    assert not hasattr(edge, "__dict__")
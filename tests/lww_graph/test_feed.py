@@ -0,0 +1,102 @@
+"""Test the change feeds of observable LWWGraph implementations"""
+import asyncio
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.edge import BaseEdge, FrozenEdge
+from crdt.lww_graph.feed import GraphChanges
+from crdt.lww_graph.impl.durable_lww_graph import DurableLWWGraph
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.interface import ObservableLWWGraph
+from crdt.lww_graph.operation import LWWGraphOperation
+
+
+@pytest.fixture(name="graph", params=["log", "durable"])
+def fixture_graph(
+    request: pytest.FixtureRequest, tmp_path: Path
+) -> Iterator[ObservableLWWGraph]:
+    """A new empty instance of each implementation of the ObservableLWWGraph
+    interface, backed by a mock clock, and closed after the test."""
+    if request.param == "log":
+        yield LogLWWGraph(clock=MockMonotonicClock(0))
+        return
+    graph: DurableLWWGraph = DurableLWWGraph(
+        directory=str(tmp_path), clock=MockMonotonicClock(0)
+    )
+    yield graph
+    graph.close()
+
+
+def test_subscribe__in_order_and_late_operations(
+    graph: ObservableLWWGraph[int],
+) -> None:
+    """Observe the changes of in-order writes, then of late operations that
+    retroactively change the graph."""
+    received: List[GraphChanges[int]] = []
+    unsubscribe = graph.subscribe(received.append)
+    graph.add_vertex(1, ts=10)
+    graph.add_vertex(2, ts=10)
+    graph.add_edge(FrozenEdge(1, 2), ts=20)
+    assert received == [
+        GraphChanges(vertices_added=[1]),
+        GraphChanges(vertices_added=[2]),
+        GraphChanges(edges_added=[BaseEdge[int](a=1, b=2)]),
+    ]
+    assert isinstance(received[-1].edges_added[0], BaseEdge)
+    received.clear()
+    # Late removal of 1, which cascades to the edge added afterwards
+    graph.remove_vertex(1, ts=15)
+    assert received == [
+        GraphChanges(vertices_removed=[1], edges_removed=[BaseEdge[int](a=1, b=2)])
+    ]
+    received.clear()
+    # Operations that don't change anything are not published
+    graph.remove_edge(FrozenEdge(1, 2), ts=30)
+    graph.add_vertex(2, ts=40)
+    assert not received
+    unsubscribe()
+    graph.add_vertex(3, ts=50)
+    assert not received
+
+
+def test_subscribe__net_changes_of_a_batch() -> None:
+    """A batch of operations only publishes its net effect"""
+    graph: LogLWWGraph[int] = LogLWWGraph(clock=MockMonotonicClock(0))
+    graph.add_vertex(1, ts=1)
+    received: List[GraphChanges[int]] = []
+    graph.subscribe(received.append)
+    graph.apply(
+        [
+            LWWGraphOperation[int](op="add_v", arg=2, ts=2),
+            LWWGraphOperation[int](op="add_e", arg=BaseEdge[int](a=1, b=2), ts=3),
+            LWWGraphOperation[int](op="del_e", arg=BaseEdge[int](a=1, b=2), ts=4),
+            LWWGraphOperation[int](op="del_v", arg=1, ts=5),
+            LWWGraphOperation[int](op="add_v", arg=1, ts=6),
+            LWWGraphOperation[int](op="add_v", arg=3, ts=7),
+            LWWGraphOperation[int](op="del_v", arg=3, ts=8),
+        ]
+    )
+    assert received == [GraphChanges(vertices_added=[2])]
+
+
+def test_changes__async_iteration() -> None:
+    """Consume the change feed as an asynchronous iterator"""
+    graph: LogLWWGraph[str] = LogLWWGraph(clock=MockMonotonicClock(0))
+
+    async def observe() -> List[GraphChanges[str]]:
+        feed = graph.changes()
+        first = asyncio.ensure_future(feed.__anext__())
+        await asyncio.sleep(0)  # let the iterator subscribe
+        graph.add_vertex("a")
+        graph.add_vertex("b")
+        received = [await first, await feed.__anext__()]
+        await feed.aclose()  # type: ignore
+        return received
+
+    assert asyncio.run(observe()) == [
+        GraphChanges(vertices_added=["a"]),
+        GraphChanges(vertices_added=["b"]),
+    ]
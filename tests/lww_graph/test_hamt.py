@@ -0,0 +1,58 @@
+"""Test the persistent maps and sets against dicts and sets"""
+import random
+from typing import Dict
+
+from crdt.lww_graph.hamt import HAMT, PSet
+
+
+class Colliding:
+    """Key whose hash collides with that of other keys"""
+
+    def __init__(self, value: int) -> None:
+        self.value = value
+
+    def __hash__(self) -> int:
+        return self.value % 3
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Colliding) and other.value == self.value
+
+    def __repr__(self) -> str:
+        return f"Colliding({self.value})"
+
+
+def test_hamt__behaves_like_dict() -> None:
+    """Random updates give the same map as a dict, and leave the previous
+    versions unchanged"""
+    rng = random.Random(11)
+    for make_key in (int, Colliding):
+        trie: HAMT[object, int] = HAMT()
+        expected: Dict[object, int] = {}
+        versions = []
+        for i in range(2000):
+            key: object = make_key(rng.randrange(300))
+            if rng.random() < 0.3:
+                trie = trie.delete(key)
+                expected.pop(key, None)
+            else:
+                trie = trie.set(key, i)
+                expected[key] = i
+            versions.append((trie, dict(expected)))
+        for version, content in versions[::50]:
+            assert len(version) == len(content)
+            assert dict(version.items()) == content
+            assert make_key(1000) not in version
+        for old_key in list(expected):
+            trie = trie.delete(old_key)
+        assert len(trie) == 0 and not list(trie)
+
+
+def test_pset() -> None:
+    """Persistent sets are sets whose updates return copies"""
+    empty: PSet[int] = PSet()
+    numbers = empty.add(1).add(2).add(2)
+    assert numbers == {1, 2} and len(numbers) == 2
+    assert numbers.discard(1) == {2} and numbers == {1, 2}
+    assert numbers.discard(3) is numbers
+    assert numbers & {2, 3} == {2}
+    assert not empty
@@ -0,0 +1,121 @@
+"""Test the bulk loading of static graphs against the addition of each vertex
+and edge in turn"""
+import random
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from crdt.clock.impl.hybrid import HybridLogicalClock
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.edge import FrozenEdge
+from crdt.lww_graph.impl.adaptive_lww_graph import AdaptiveLWWGraph
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.impl.persistent_lww_graph import PersistentLWWGraph
+from crdt.lww_graph.interface import LWWGraph
+from crdt.lww_graph.loader import load_edges, prepare_edges, read_edge_list
+from tests.lww_graph.test_log_lww_graph import random_ops
+
+
+def assert_same_graph(graph: LWWGraph[int], reference: LWWGraph[int]) -> None:
+    """Compare the graphs through their queries"""
+    assert set(graph.vertices) == set(reference.vertices)
+    assert set(graph.edges) == set(reference.edges)
+    for vertex in reference.vertices:
+        assert graph.neighbors(vertex) == reference.neighbors(vertex)
+    assert sorted(map(sorted, graph.components)) == sorted(
+        map(sorted, reference.components)
+    )
+
+
+def test_load_edges__same_as_op_by_op() -> None:
+    """Loaded graphs resolve like the additions of their vertices then edges,
+    with self-loops, duplicate and reversed edges, before and after later
+    operations"""
+    rng = random.Random(3)
+    for _ in range(30):
+        pairs: List[Tuple[int, int]] = [
+            (rng.randrange(40), rng.randrange(40)) for _ in range(rng.randrange(60))
+        ]
+        isolated = [rng.randrange(50) for _ in range(5)]
+        graphs: List[LWWGraph[int]] = [
+            LogLWWGraph(MockMonotonicClock(10**6)),
+            LogLWWGraph(MockMonotonicClock(10**6), reorder_window=10),
+            PersistentLWWGraph(MockMonotonicClock(10**6)),
+            AdaptiveLWWGraph(MockMonotonicClock(10**6), window=4),
+        ]
+        for graph in graphs:
+            edges = np.array(pairs).reshape(-1, 2) if rng.random() < 0.5 else pairs
+            bulk = load_edges(graph, edges, isolated)
+            reference: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+            for vertex, ts in zip(bulk.vertices, bulk.vertex_timestamps):
+                reference.add_vertex(vertex, ts=ts)
+            for edge, ts in zip(bulk.edges, bulk.edge_timestamps):
+                reference.add_edge(FrozenEdge(edge.a, edge.b), ts=ts)
+            endpoints = [vertex for pair in pairs for vertex in pair]
+            assert bulk.vertices == list(dict.fromkeys(isolated + endpoints))
+            assert_same_graph(graph, reference)
+            if isinstance(graph, LogLWWGraph):
+                assert [(op.op, op.arg, op.ts) for op in graph.operations] == [
+                    (op.op, op.arg, op.ts) for op in reference.operations
+                ]
+            later = [
+                op.copy(update={"ts": 10**6 + op.ts}) for op in random_ops(rng, 20)
+            ]
+            graph.apply(later)
+            reference.apply(later)
+            assert_same_graph(graph, reference)
+
+
+def test_timestamps__reserved_from_hybrid_clock() -> None:
+    """The timestamps of a loaded graph are reserved at once from a hybrid
+    clock, which issues later ones next"""
+    clock = HybridLogicalClock(MockMonotonicClock(0), node_id=3)
+    bulk = prepare_edges([("a", "b"), ("b", "c")], clock)
+    assert len(bulk.timestamps) == 5 and bulk.timestamps[0] % (1 << 16) == 3
+    assert clock.nanoseconds > bulk.timestamps[-1]
+
+
+def test_timestamps__before_later_readings() -> None:
+    """Without reservations, the timestamps of a loaded graph precede the next
+    readings of the clock, so that later local operations win"""
+    graphs: List[LWWGraph[int]] = [
+        LogLWWGraph(MockMonotonicClock(0)),
+        PersistentLWWGraph(MockMonotonicClock(0)),
+    ]
+    for graph in graphs:
+        load_edges(graph, [(1, 2), (2, 3), (3, 4)])
+        graph.remove_edge(FrozenEdge(1, 2))
+        graph.remove_vertex(4)
+        assert set(graph.vertices) == {1, 2, 3}
+        assert set(graph.edges) == {FrozenEdge(2, 3)}
+
+
+def test_timestamps__after_earlier_operations() -> None:
+    """Without reservations, the timestamps of a graph loaded into a non-empty
+    replica follow its earlier operations"""
+    graphs: List[LWWGraph[int]] = [
+        LogLWWGraph(MockMonotonicClock(0)),
+        PersistentLWWGraph(MockMonotonicClock(0)),
+    ]
+    for graph in graphs:
+        graph.add_vertex(9)
+        graph.remove_vertex(9)
+        load_edges(graph, [(9, 1), (1, 2)])
+        assert set(graph.vertices) == {1, 2, 9}
+        assert set(graph.edges) == {FrozenEdge(9, 1), FrozenEdge(1, 2)}
+        graph.remove_vertex(2)
+        assert set(graph.vertices) == {1, 9}
+
+
+def test_read_edge_list__csv_and_whitespace(tmp_path: Path) -> None:
+    """Edge lists are read from CSV and whitespace-separated files"""
+    (tmp_path / "edges.csv").write_text("source,target,weight\na,b,1\nb,c,2\n")
+    (tmp_path / "edges.txt").write_text("# comment\n1 2\n2\t3\n")
+    csv = read_edge_list(tmp_path / "edges.csv", delimiter=",", skiprows=1)
+    assert csv.tolist() == [["a", "b"], ["b", "c"]]
+    listed = read_edge_list(tmp_path / "edges.txt", dtype=np.int64)
+    assert listed.tolist() == [[1, 2], [2, 3]]
+    graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+    load_edges(graph, listed)
+    assert list(graph.components) == [{1: {2}, 2: {1, 3}, 3: {2}}]
@@ -0,0 +1,180 @@
+"""Test the specific log-based LWWGraph implementation"""
+import random
+from typing import List
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.edge import BaseEdge, SlotEdge
+from crdt.lww_graph.feed import GraphChanges
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.operation import LWWGraphOperation, LWWGraphOpName
+from crdt.lww_graph.tables import GraphTables
+
+
+def random_ops(rng: random.Random, count: int) -> List[LWWGraphOperation[int]]:
+    """Generate random operations on a few vertices, with colliding
+    timestamps."""
+    names: List[LWWGraphOpName] = ["add_v", "add_v", "del_v", "add_e", "add_e", "del_e"]
+    ops = []
+    for _ in range(count):
+        name = rng.choice(names)
+        ts = rng.randrange(100)
+        if name.endswith("_e"):
+            edge = BaseEdge(a=rng.randrange(5), b=rng.randrange(5))
+            ops.append(LWWGraphOperation[int](op=name, arg=edge, ts=ts))
+        else:
+            ops.append(LWWGraphOperation[int](op=name, arg=rng.randrange(5), ts=ts))
+    return ops
+
+
+def test_compaction__preserves_state_and_future() -> None:
+    """A compacted log must resolve like the full one, including after further
+    late operations are applied to both."""
+    rng = random.Random(42)
+    for _ in range(200):
+        full: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+        full.apply(random_ops(rng, 40))
+        compacted: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+        compacted.apply(full.operations)
+        compacted.compact()
+        assert len(compacted.operations) <= len(full.operations)
+        assert set(compacted.vertices) == set(full.vertices)
+        assert set(compacted.edges) == set(full.edges)
+        late_ops = random_ops(rng, 10)
+        full.apply(late_ops)
+        compacted.apply(late_ops)
+        assert set(compacted.vertices) == set(full.vertices)
+        assert set(compacted.edges) == set(full.edges)
+
+
+def test_collect_garbage__drops_tombstones() -> None:
+    """Removed elements leave neither operations nor replay records behind"""
+    graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+    for v in range(10):
+        graph.add_vertex(v)
+        graph.add_vertex(v + 1)
+        graph.add_edge(BaseEdge(a=v, b=v + 1))
+        graph.remove_vertex(v)
+    assert graph.operations
+    graph.collect_garbage(graph.clock.nanoseconds)
+    assert [(op.op, op.arg) for op in graph.operations] == [("add_v", 10)]
+    state = graph._current_state  # pylint: disable=protected-access
+    assert sum(map(len, state.last_op.values())) == 1
+
+
+def test_remove_vertex__records_no_edge_tombstones() -> None:
+    """Removing a hub records its deletion only, which still rejects the edge
+    additions it supersedes, but not later ones"""
+    graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+    for v in range(100):
+        graph.add_vertex(v, ts=1)
+        graph.add_edge(BaseEdge(a=0, b=v), ts=2)
+    graph.remove_vertex(0, ts=3)
+    state = graph._current_state  # pylint: disable=protected-access
+    assert not state.last_op["del_e"] and set(graph.edges) == set()
+    graph.add_vertex(0, ts=4)
+    graph.add_edge(BaseEdge(a=0, b=1), ts=3)
+    assert set(graph.edges) == set()
+    graph.add_edge(BaseEdge(a=0, b=2), ts=5)
+    assert set(graph.edges) == {BaseEdge(a=0, b=2)}
+    assert graph.neighbors(0) == {2}
+
+
+def test_ingest__drops_redundant_operations() -> None:
+    """Duplicates and dominated operations don't reach the log, which still
+    resolves like all the operations, including after further late ones."""
+    rng = random.Random(7)
+    for _ in range(100):
+        graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+        ops = random_ops(rng, 40)
+        graph.apply(ops)
+        logged = len(graph.operations)
+        graph.apply(ops)
+        assert len(graph.operations) == logged
+        assert graph.dropped_ops == 2 * len(ops) - logged
+        late_ops = random_ops(rng, 10)
+        graph.apply(late_ops)
+        tables: GraphTables[int] = GraphTables()
+        for op in ops + late_ops:
+            tables.apply(op)
+        assert set(graph.vertices) == tables.live_vertices()
+        assert {SlotEdge.from_edge(e) for e in graph.edges} == tables.live_edges()
+    graph.add_vertex(1, ts=500)
+    graph.add_vertex(1, ts=500)
+    assert graph.operations[-1].ts == 500
+    assert graph.operations[-2].ts != 500
+
+
+def assert_published_up_to_watermark(
+    graph: LogLWWGraph[int], published: List[GraphChanges[int]], read: int
+) -> None:
+    """The changes published so far are those of the logged operations up to
+    the watermark, and of all the operations logged before the last read."""
+    watermark = graph.watermark
+    assert watermark is not None
+    # Operations dominated by held ones are dropped on ingestion
+    logged = graph.operations
+    tables: GraphTables[int] = GraphTables()
+    for i, op in enumerate(logged):
+        if i < read or op.ts <= watermark:
+            tables.apply(op)
+    net = GraphChanges.net(published)
+    assert set(net.vertices_added) == tables.live_vertices()
+    assert not net.vertices_removed
+    assert {SlotEdge.from_edge(e) for e in net.edges_added} == tables.live_edges()
+
+
+def test_reorder_window__repairs_late_operations() -> None:
+    """With a reorder window, batches of operations in any order resolve like
+    the whole log replayed, late operations are repaired in place, and the
+    change feed follows the operations up to the watermark, or all of them
+    once the graph is read."""
+    rng = random.Random(11)
+    for with_feed in (False, True):
+        repaired = 0
+        for _ in range(100):
+            graph: LogLWWGraph[int] = LogLWWGraph(
+                MockMonotonicClock(0), reorder_window=20
+            )
+            published: List[GraphChanges[int]] = []
+            if with_feed:
+                graph.subscribe(published.append)
+            ops: List[LWWGraphOperation[int]] = []
+            read = 0
+            for _ in range(8):
+                batch = random_ops(rng, 6)
+                ops += batch
+                graph.apply(batch)
+                if with_feed:
+                    assert_published_up_to_watermark(graph, published, read)
+                if rng.random() < 0.5:
+                    read = len(graph.operations)
+                    replayed: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+                    replayed.apply(ops)
+                    assert set(graph.vertices) == set(replayed.vertices)
+                    assert set(graph.edges) == set(replayed.edges)
+                    assert sorted(map(sorted, graph.components)) == sorted(
+                        map(sorted, replayed.components)
+                    )
+                    assert graph.induced_subgraph(range(5)) == (
+                        replayed.induced_subgraph(range(5))
+                    )
+            repaired += graph.repaired_ops
+        assert repaired
+
+
+def test_reorder_window__new_subscriber_releases_to_the_others() -> None:
+    """The held operations released when a subscriber joins are published to
+    the earlier subscribers, and not to the new one"""
+    graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0), reorder_window=100)
+    first: List[GraphChanges[int]] = []
+    second: List[GraphChanges[int]] = []
+    graph.subscribe(first.append)
+    graph.add_vertex(1, ts=1000)
+    assert not first
+    graph.subscribe(second.append)
+    assert GraphChanges.net(first).vertices_added == [1]
+    assert not second
+    graph.add_vertex(2, ts=1001)
+    graph.catch_up()
+    assert GraphChanges.net(first).vertices_added == [1, 2]
+    assert GraphChanges.net(second).vertices_added == [2]
@@ -5,23 +5,63 @@
 - query for all vertices connected to a vertex,
 - find any path between two vertices,
 - merge with concurrent changes from other graph/replica."""
-from typing import Any, Iterable, List
+import random
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List
 from unittest import TestCase
 
 import pytest
 
 from crdt.clock.impl.mocktime import MockMonotonicClock
-from crdt.lww_graph.edge import FrozenEdge
+from crdt.lww_graph.edge import BaseEdge, FrozenEdge
+from crdt.lww_graph.impl.adaptive_lww_graph import AdaptiveLWWGraph
+from crdt.lww_graph.impl.concurrent_lww_graph import ConcurrentLWWGraph
+from crdt.lww_graph.impl.durable_lww_graph import DurableLWWGraph
 from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
-from crdt.lww_graph.interface import LWWGraph, find_shortest_path
+from crdt.lww_graph.impl.persistent_lww_graph import PersistentLWWGraph
+from crdt.lww_graph.interface import LWWGraph, LWWGraphError, find_shortest_path
+from crdt.lww_graph.operation import LWWGraphOperation
+from tests.lww_graph.test_log_lww_graph import random_ops
 
+# Factories of an empty instance of each implementation of the LWWGraph
+# interface, backed by a mock clock, given a directory for the durable ones
+IMPLEMENTATIONS: Dict[str, Callable[[Path], LWWGraph]] = {
+    "log": lambda _: LogLWWGraph(clock=MockMonotonicClock(0)),
+    "log_reordered": lambda _: LogLWWGraph(
+        clock=MockMonotonicClock(0), reorder_window=10
+    ),
+    "concurrent": lambda _: ConcurrentLWWGraph(clock=MockMonotonicClock(0)),
+    "persistent": lambda _: PersistentLWWGraph(clock=MockMonotonicClock(0)),
+    "durable": lambda directory: DurableLWWGraph(
+        directory=str(directory),
+        clock=MockMonotonicClock(0),
+        checkpoint_every=5,
+    ),
+    "adaptive": lambda _: AdaptiveLWWGraph(clock=MockMonotonicClock(0), window=4),
+}
 
-def make_new_instance_of_each_impl() -> List[LWWGraph]:
+
+def make_new_instance_of_each_impl(directory: Path) -> List[LWWGraph]:
     """Make a new empty instance of each implementation of the LWWGraph
-    interface, backed by a mock clock."""
-    return [
-        LogLWWGraph(clock=MockMonotonicClock(0)),
-    ]
+    interface, the durable ones in subdirectories of ``directory``. Close them
+    with close_each."""
+    return [make(directory / name) for name, make in IMPLEMENTATIONS.items()]
+
+
+def close_each(graphs: Iterable[LWWGraph]) -> None:
+    """Release the files and processes of the graphs that hold some"""
+    for graph in graphs:
+        close = getattr(graph, "close", None)
+        if close is not None:
+            close()
+
+
+@pytest.fixture(name="graph", params=list(IMPLEMENTATIONS))
+def fixture_graph(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[LWWGraph]:
+    """A new empty instance of each implementation, closed after the test"""
+    graph = IMPLEMENTATIONS[request.param](tmp_path)
+    yield graph
+    close_each([graph])
 
 
 def edge(a: Any, b: Any) -> FrozenEdge:
@@ -34,7 +74,6 @@ def assert_same_counts(first: Iterable, second: Iterable, message: str = None) -
     return TestCase().assertCountEqual(first, second, msg=message)
 
 
-@pytest.mark.parametrize("graph", make_new_instance_of_each_impl())
 def test_correctness_via_interface__ordered(
     graph: LWWGraph[int],
 ) -> None:
@@ -91,7 +130,6 @@ def test_correctness_via_interface__ordered(
     assert set(graph.vertices) == set()
 
 
-@pytest.mark.parametrize("graph", make_new_instance_of_each_impl())
 def test_correctness_via_interface__unordered(
     graph: LWWGraph[int],
 ) -> None:
@@ -121,7 +159,6 @@ def test_correctness_via_interface__unordered(
     assert set(graph.edges) == {edge(1, 2)}
 
 
-@pytest.mark.parametrize("graph", make_new_instance_of_each_impl())
 def test_components_via_interface__unordered(
     graph: LWWGraph[str],
 ) -> None:
@@ -282,7 +319,6 @@ def test_components_via_interface__unordered(
     )
 
 
-@pytest.mark.parametrize("graph", make_new_instance_of_each_impl())
 def test_find_shortest_path(
     graph: LWWGraph[int],
 ) -> None:
@@ -322,3 +358,74 @@ def test_find_shortest_path(
     assert find_shortest_path(graph=graph, a=1, b=1) == []
     assert find_shortest_path(graph=graph, a=1000, b=50) is None
     assert find_shortest_path(graph=graph, a=1, b=5000) is None
+
+
+def test_neighborhood_queries(
+    graph: LWWGraph[int],
+) -> None:
+    """Test the neighborhood queries, and that they agree with the default
+    implementations of the protocol, based on the components."""
+    for v in range(1, 8):
+        graph.add_vertex(v, ts=10)
+    for a, b in [(1, 2), (2, 3), (3, 4), (4, 5), (2, 6), (6, 6)]:
+        graph.add_edge(edge(a, b), ts=20)
+    graph.remove_edge(edge(4, 5), ts=30)
+    graph.remove_vertex(3, ts=30)
+    expected_neighbors = {1: {2}, 2: {1, 6}, 3: set(), 4: set(), 6: {2, 6}, 7: set()}
+    for v, neighbors in expected_neighbors.items():
+        assert graph.neighbors(v) == neighbors
+        assert graph.degree(v) == len(neighbors)
+        assert LWWGraph.neighbors(graph, v) == neighbors
+    assert graph.neighbors(100) == set()
+    assert graph.k_hop(1, 0) == {1}
+    assert graph.k_hop(1, 1) == {1, 2}
+    assert graph.k_hop(1, 2) == graph.k_hop(1, 10) == {1, 2, 6}
+    assert graph.k_hop(3, 2) == set()
+    assert graph.k_hop(1, 2) == LWWGraph.k_hop(graph, 1, 2)
+    expected_subgraph = {1: {2}, 2: {1}, 4: set(), 5: set()}
+    assert graph.induced_subgraph([1, 2, 3, 4, 5, 100]) == expected_subgraph
+    assert LWWGraph.induced_subgraph(graph, [1, 2, 3, 4, 5]) == expected_subgraph
+    graph.add_edge(edge(4, 5), ts=40)
+    assert graph.neighbors(5) == {4}
+    assert graph.induced_subgraph([4, 5]) == {4: {5}, 5: {4}}
+
+
+def test_edges__are_serializable(graph: LWWGraph[int]) -> None:
+    """Graphs return their edges as BaseEdges, whatever edges they hold"""
+    graph.add_vertex(1, ts=10)
+    graph.add_vertex(2, ts=10)
+    graph.add_edge(edge(1, 2), ts=20)
+    (added,) = graph.edges
+    assert isinstance(added, BaseEdge)
+    assert BaseEdge[int].parse_raw(added.json()) == edge(1, 2)
+
+
+def test_collect_garbage__preserves_state_and_future(tmp_path: Path) -> None:
+    """After collecting garbage up to a stability frontier, a graph must resolve
+    like a graph holding all operations, including after later operations are
+    applied to both, while earlier operations are rejected."""
+    rng = random.Random(3)
+    for round_ in range(50):
+        ops = random_ops(rng, 40)
+        later_ops = [
+            LWWGraphOperation[int](op=op.op, arg=op.arg, ts=op.ts + 100)
+            for op in random_ops(rng, 20)
+        ]
+        graphs = make_new_instance_of_each_impl(tmp_path / str(round_))
+        try:
+            for graph in graphs:
+                reference: LogLWWGraph[int] = LogLWWGraph(clock=MockMonotonicClock(0))
+                reference.apply(ops)
+                graph.apply(ops)
+                graph.collect_garbage(99)
+                assert set(graph.vertices) == set(reference.vertices)
+                assert set(graph.edges) == set(reference.edges)
+                graph.apply(ops)  # Late, hence ignored
+                reference.apply(later_ops)
+                graph.apply(later_ops)
+                assert set(graph.vertices) == set(reference.vertices)
+                assert set(graph.edges) == set(reference.edges)
+                with pytest.raises(LWWGraphError):
+                    graph.add_vertex(1, ts=99)
+        finally:
+            close_each(graphs)
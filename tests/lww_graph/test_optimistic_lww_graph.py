@@ -0,0 +1,96 @@
+"""Test the client graph with optimistic local operations against the
+log-based one"""
+import random
+from typing import List
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.clock.impl.synced import SyncedClock
+from crdt.distributed.impl.local import LocalLWWGraphClient, LocalLWWGraphServer
+from crdt.lww_graph.edge import BaseEdge, FrozenEdge
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.impl.optimistic_lww_graph import OptimisticLWWGraph
+from crdt.lww_graph.operation import LWWGraphOperation, LWWGraphOpName
+
+WRITES = {
+    "add_v": "add_vertex",
+    "del_v": "remove_vertex",
+    "add_e": "add_edge",
+    "del_e": "remove_edge",
+}
+
+
+def random_op(rng: random.Random, ts: int) -> LWWGraphOperation[int]:
+    """A random operation on a few vertices"""
+    names: List[LWWGraphOpName] = ["add_v", "add_v", "del_v", "add_e", "add_e", "del_e"]
+    name = rng.choice(names)
+    if name.endswith("_e"):
+        edge = BaseEdge(a=rng.randrange(6), b=rng.randrange(6))
+        return LWWGraphOperation[int](op=name, arg=edge, ts=ts)
+    return LWWGraphOperation[int](op=name, arg=rng.randrange(6), ts=ts)
+
+
+def assert_same_graph(
+    graph: OptimisticLWWGraph[int], reference: LogLWWGraph[int]
+) -> None:
+    """Compare the graphs through all their queries"""
+    assert set(graph.vertices) == set(reference.vertices)
+    assert set(graph.edges) == set(reference.edges)
+    for v in range(6):
+        assert (v in graph) == (v in reference)
+        assert graph.neighbors(v) == reference.neighbors(v)
+    assert sorted(map(sorted, graph.components)) == sorted(
+        map(sorted, reference.components)
+    )
+
+
+def test_overlay__resolves_like_all_operations() -> None:
+    """Local and remote operations, in any timestamp order, resolve like the
+    log of all of them, whenever the pending ones are confirmed"""
+    rng = random.Random(17)
+    for _ in range(100):
+        graph: OptimisticLWWGraph[int] = OptimisticLWWGraph(
+            LogLWWGraph(MockMonotonicClock(0)), MockMonotonicClock(0)
+        )
+        reference: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+        latest = 0
+        for _ in range(30):
+            op = random_op(rng, latest + rng.randrange(-10, 10))
+            latest = max(latest, op.ts)
+            if rng.random() < 0.5:
+                getattr(graph, WRITES[op.op])(op.arg, ts=op.ts)
+            else:
+                graph.apply([op])
+            reference.apply([op])
+            assert_same_graph(graph, reference)
+            if rng.random() < 0.1:
+                graph.confirm(latest - rng.randrange(10))
+                assert_same_graph(graph, reference)
+
+
+def test_client__folds_confirmed_operations() -> None:
+    """The server confirms the local operations of a client with its next
+    batch, which folds them into the confirmed engine"""
+    server_clock = MockMonotonicClock(10**9)
+    server: LocalLWWGraphServer[int] = LocalLWWGraphServer(
+        LogLWWGraph(clock=server_clock), server_clock, heartbeat_interval=0
+    )
+    clients: List[LocalLWWGraphClient[int]] = []
+    for _ in range(2):
+        clock = SyncedClock(MockMonotonicClock(0))
+        graph: OptimisticLWWGraph[int] = OptimisticLWWGraph(
+            LogLWWGraph(clock=clock), clock
+        )
+        clients.append(LocalLWWGraphClient(graph, clock, heartbeat_interval=0))
+        clients[-1].connect(server)
+    a, b = clients[0], clients[1]
+    a.add_vertex(1)
+    a.add_vertex(2)
+    a.add_edge(FrozenEdge(1, 2))
+    assert a.check_connected(1, 2) and b.check_connected(1, 2)
+    assert isinstance(a.graph, OptimisticLWWGraph)
+    assert a.graph.pending == 3 and set(a.graph.confirmed.vertices) == set()
+    server.tick()
+    assert a.graph.pending == 0 and a.graph.confirmed_ops == 3
+    assert set(a.graph.confirmed.edges) == {FrozenEdge(1, 2)}
+    b.remove_vertex(1)
+    assert not a.check_connected(1, 2)
@@ -0,0 +1,97 @@
+"""Test that the BFS trees of the path cache stay consistent with the graph, and
+are only discarded when they are altered"""
+import random
+from typing import Optional
+
+import pytest
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.edge import FrozenEdge
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.interface import LWWGraphError, find_shortest_path
+from crdt.lww_graph.path_cache import PathCache
+from tests.lww_graph.test_log_lww_graph import random_ops
+
+
+@pytest.mark.parametrize("reorder_window", [None, 3])
+def test_cached_paths__match_searches(reorder_window: Optional[int]) -> None:
+    """After each batch of random operations, cached paths are shortest paths
+    of the current graph, including in watermark mode, where the graph holds
+    recent operations back from its feed until it is read"""
+    rng = random.Random(7)
+    graph: LogLWWGraph[int] = LogLWWGraph(
+        MockMonotonicClock(0), reorder_window=reorder_window
+    )
+    cache = PathCache(graph, capacity=3)
+    for _ in range(300):
+        graph.apply(random_ops(rng, rng.randrange(1, 4)))
+        a, b = rng.randrange(5), rng.randrange(5)
+        connected = cache.connected(a, b)
+        path = cache.find_path(a, b)
+        expected = find_shortest_path(graph, a, b)
+        assert connected == (expected is not None)
+        if expected is None:
+            assert path is None
+            continue
+        assert path is not None and len(path) == len(expected)
+        vertex = a
+        for edge in path:
+            assert edge in graph.edges
+            (vertex,) = set(edge.vertices) - {vertex} or {vertex}
+        assert vertex == b
+        assert len(cache) <= 3
+
+
+def test_invalidation__only_altered_trees() -> None:
+    """Changes outside of a tree, or that keep its depths, keep it cached"""
+    graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+    for v in range(1, 6):
+        graph.add_vertex(v)
+    graph.add_edge(FrozenEdge(1, 2))
+    graph.add_edge(FrozenEdge(2, 3))
+    graph.add_edge(FrozenEdge(4, 5))
+    cache = PathCache(graph)
+    assert cache.find_path(1, 3) == [FrozenEdge(1, 2), FrozenEdge(2, 3)]
+    assert not cache.connected(4, 1)
+    assert len(cache) == 2
+    graph.add_edge(FrozenEdge(3, 3))  # same depth, in the tree of 1 only
+    graph.remove_edge(FrozenEdge(3, 3))  # not a tree edge
+    assert len(cache) == 2
+    graph.add_edge(FrozenEdge(1, 3))  # shortens a path
+    assert len(cache) == 1
+    assert cache.find_path(1, 3) == [FrozenEdge(1, 3)]
+    graph.remove_vertex(5)
+    assert len(cache) == 1
+    assert not cache.connected(4, 5)
+
+
+def test_lru_eviction() -> None:
+    """The least recently queried source is evicted first"""
+    graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+    for v in range(3):
+        graph.add_vertex(v)
+    cache = PathCache(graph, capacity=2)
+    cache.connected(0, 1)
+    cache.connected(1, 0)
+    cache.connected(0, 2)
+    cache.connected(2, 0)
+    assert list(cache._trees) == [0, 2]  # pylint: disable=protected-access
+    cache.close()
+    graph.add_edge(FrozenEdge(0, 1))
+    assert len(cache) == 0
+    with pytest.raises(LWWGraphError):
+        PathCache(graph, capacity=0)
+
+
+def test_reorder_window__held_operations_alter_trees() -> None:
+    """Operations that the graph holds back from its feed still alter the
+    cached trees"""
+    graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0), reorder_window=100)
+    for v in (1, 2, 3):
+        graph.add_vertex(v, ts=100)
+    graph.add_edge(FrozenEdge(1, 2), ts=200)
+    cache = PathCache(graph)
+    assert not cache.connected(1, 3)
+    graph.add_edge(FrozenEdge(2, 3), ts=250)
+    assert cache.connected(1, 3)
+    assert cache.find_path(1, 3) == [FrozenEdge(1, 2), FrozenEdge(2, 3)]
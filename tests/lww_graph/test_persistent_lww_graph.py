@@ -0,0 +1,51 @@
+"""Test the specific persistent LWWGraph implementation"""
+import random
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.edge import FrozenEdge, SlotEdge
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.impl.persistent_lww_graph import GraphSnapshot, PersistentLWWGraph
+from crdt.lww_graph.tables import GraphTables
+from tests.lww_graph.test_log_lww_graph import random_ops
+
+
+def test_snapshots__are_immutable_versions() -> None:
+    """A snapshot keeps resolving like the graph did when it was taken"""
+    graph: PersistentLWWGraph[int] = PersistentLWWGraph(MockMonotonicClock(0))
+    graph.add_vertex(1)
+    graph.add_vertex(2)
+    graph.add_edge(FrozenEdge(1, 2))
+    before = graph.snapshot()
+    graph.remove_vertex(2)
+    graph.add_vertex(3)
+    assert set(before.vertices) == {1, 2} and FrozenEdge(1, 2) in before
+    assert before.neighbors(1) == {2} and before.k_hop(2, 1) == {1, 2}
+    assert [set(c) for c in before.components] == [{1, 2}]
+    after = graph.snapshot()
+    assert set(after.vertices) == {1, 3} and FrozenEdge(1, 2) not in after
+    assert after.neighbors(1) == set()
+    assert graph.snapshot() is after
+
+
+def test_incremental_resolution__matches_log() -> None:
+    """Resolving each operation as it comes gives the same graph as replaying
+    the log, and as resolving the records at once"""
+    rng = random.Random(13)
+    for _ in range(100):
+        ops = random_ops(rng, 60)
+        graph: PersistentLWWGraph[int] = PersistentLWWGraph(MockMonotonicClock(0))
+        graph.apply(ops)
+        reference: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+        reference.apply(ops)
+        assert set(graph.vertices) == set(reference.vertices)
+        assert set(graph.edges) == set(reference.edges)
+        for v in range(5):
+            assert graph.neighbors(v) == reference.neighbors(v)
+        tables: GraphTables[int] = GraphTables()
+        for op in ops:
+            tables.apply(op)
+        rebuilt: GraphSnapshot[int] = GraphSnapshot.from_tables(tables)
+        assert set(rebuilt.edges) == {SlotEdge.from_edge(e) for e in graph.edges}
+        assert dict(rebuilt.adjacency.items()) == dict(
+            graph.snapshot().adjacency.items()
+        )
@@ -0,0 +1,102 @@
+"""Test the LWW-element-graph stored in Redis against the log-based one"""
+# pylint: disable=wrong-import-position
+import random
+from typing import Any
+
+import pytest
+
+pytest.importorskip("redis")
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.edge import FrozenEdge
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_graph.impl.redis_lww_graph import RedisLWWGraph
+from crdt.lww_graph.interface import LWWGraph, LWWGraphError
+from crdt.lww_graph.operation import LWWGraphOperation
+from tests.lww_graph.test_log_lww_graph import random_ops
+
+
+def assert_same_graphs(graph: LWWGraph[int], reference: LWWGraph[int]) -> None:
+    """Compare the elements, components and neighborhoods of two graphs"""
+    assert set(graph.vertices) == set(reference.vertices)
+    assert set(graph.edges) == set(reference.edges)
+    assert sorted(map(sorted, graph.components)) == sorted(
+        map(sorted, reference.components)
+    )
+    for v in range(6):
+        assert graph.neighbors(v) == reference.neighbors(v)
+        assert graph.k_hop(v, 2) == reference.k_hop(v, 2)
+    assert graph.induced_subgraph(range(3)) == reference.induced_subgraph(range(3))
+
+
+def test_redis_graph__matches_log(redis_client: Any) -> None:
+    """Batched and single operations resolve like the log-based graph, and so
+    do the operations read back"""
+    rng = random.Random(11)
+    for i in range(40):
+        graph: RedisLWWGraph[int] = RedisLWWGraph(
+            redis_client, f"graph-{i}", MockMonotonicClock(0), batch_size=7
+        )
+        reference: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+        ops = random_ops(rng, 40)
+        graph.apply(ops[:30])
+        for op in ops[30:]:
+            if op.op == "add_v":
+                graph.add_vertex(op.arg, ts=op.ts)  # type: ignore
+            elif op.op == "del_v":
+                graph.remove_vertex(op.arg, ts=op.ts)  # type: ignore
+            elif op.op == "add_e":
+                graph.add_edge(op.arg, ts=op.ts)  # type: ignore
+            else:
+                graph.remove_edge(op.arg, ts=op.ts)  # type: ignore
+        reference.apply(ops)
+        assert_same_graphs(graph, reference)
+        replayed: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+        replayed.apply(graph.operations)
+        assert_same_graphs(replayed, reference)
+
+
+def test_redis_graph__collect_garbage(redis_client: Any) -> None:
+    """Collecting garbage forgets records without changing the graph, and late
+    operations are then rejected"""
+    rng = random.Random(12)
+    collected = 0
+    for i in range(20):
+        graph: RedisLWWGraph[int] = RedisLWWGraph(
+            redis_client, f"graph-{i}", MockMonotonicClock(0)
+        )
+        reference: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+        ops = random_ops(rng, 40)
+        graph.apply(ops)
+        reference.apply(ops)
+        before = len(graph.operations)
+        graph.collect_garbage(99)
+        assert graph.frontier == 99
+        collected += before - len(graph.operations)
+        assert_same_graphs(graph, reference)
+        later_ops = [
+            LWWGraphOperation[int](op=op.op, arg=op.arg, ts=op.ts + 100)
+            for op in random_ops(rng, 20)
+        ]
+        graph.apply(ops + later_ops)
+        reference.apply(later_ops)
+        assert_same_graphs(graph, reference)
+        with pytest.raises(LWWGraphError):
+            graph.add_vertex(1, ts=99)
+    assert collected > 0
+
+
+def test_redis_graph__shared(redis_client: Any) -> None:
+    """Replicas opened on the same name share their state, and timestamps are
+    compared exactly"""
+    ts = 1_700_000_000_000_000_000
+    first: RedisLWWGraph[str] = RedisLWWGraph(redis_client, "g", MockMonotonicClock(0))
+    second: RedisLWWGraph[str] = RedisLWWGraph(redis_client, "g", MockMonotonicClock(0))
+    first.add_vertex("a", ts=ts)
+    second.add_vertex("b", ts=ts)
+    first.add_edge(FrozenEdge("a", "b"), ts=ts + 1)
+    assert FrozenEdge("b", "a") in second
+    assert second.neighbors("a") == {"b"}
+    second.remove_vertex("b", ts=ts + 1)
+    assert set(first.edges) == set()
+    assert first.degree("a") == 0
@@ -0,0 +1,33 @@
+"""Test the sets resolving operations on write, and switching representation
+by workload, against the log-based one"""
+import random
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_set.impl.adaptive_lww_set import AdaptiveLWWSet
+from crdt.lww_set.impl.indexed_lww_set import IndexedLWWSet
+from crdt.lww_set.impl.log_lww_set import LogLWWSet
+from tests.lww_set.test_partitioned_lww_set import random_element_ops
+
+
+def test_indexed_and_adaptive_sets__resolve_like_log() -> None:
+    """Operations in any order resolve like the log-based set, and the
+    operations of the index resolve like all of them"""
+    rng = random.Random(5)
+    indexed: IndexedLWWSet = IndexedLWWSet(MockMonotonicClock(0))
+    adaptive: AdaptiveLWWSet = AdaptiveLWWSet(
+        MockMonotonicClock(0), window=20, write_ratio=2.0
+    )
+    reference: LogLWWSet = LogLWWSet(MockMonotonicClock(0))
+    for _ in range(30):
+        ops = random_element_ops(rng, rng.randrange(1, 30), 20)
+        indexed.apply(ops)
+        adaptive.apply(ops)
+        reference.apply(ops)
+        expected = sorted(map(str, reference.elements))
+        for _ in range(rng.randrange(10)):
+            assert sorted(map(str, adaptive.elements)) == expected
+        assert sorted(map(str, indexed.elements)) == expected
+        replayed: LogLWWSet = LogLWWSet(MockMonotonicClock(0))
+        replayed.apply(indexed.operations)
+        assert sorted(map(str, replayed.elements)) == expected
+    assert {m.target for m in adaptive.migrations} == {"log", "indexed"}
@@ -1,23 +1,45 @@
 """Black-box unit tests of LWWSet implementations"""
-
-from typing import List
+from pathlib import Path
+from typing import Callable, Dict, Iterator
 
 import pytest
 
 from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_set.impl.adaptive_lww_set import AdaptiveLWWSet
+from crdt.lww_set.impl.durable_lww_set import DurableLWWSet
+from crdt.lww_set.impl.indexed_lww_set import IndexedLWWSet
 from crdt.lww_set.impl.log_lww_set import LogLWWSet
+from crdt.lww_set.impl.partitioned_lww_set import PartitionedLWWSet
 from crdt.lww_set.interface import LWWSet
 
+# Factories of an empty instance of each implementation of the LWWSet
+# interface, backed by a mock clock, given a directory for the durable one
+IMPLEMENTATIONS: Dict[str, Callable[[Path], LWWSet]] = {
+    "log": lambda _: LogLWWSet(clock=MockMonotonicClock(0)),
+    "durable": lambda directory: DurableLWWSet(
+        directory=str(directory),
+        clock=MockMonotonicClock(0),
+        checkpoint_every=5,
+    ),
+    "partitioned": lambda _: PartitionedLWWSet(
+        clock=MockMonotonicClock(0), workers=2, batch_size=2
+    ),
+    "indexed": lambda _: IndexedLWWSet(clock=MockMonotonicClock(0)),
+    "adaptive": lambda _: AdaptiveLWWSet(clock=MockMonotonicClock(0), window=4),
+}
+
 
-def make_new_instance_of_each_impl() -> List[LWWSet]:
-    """Make a new empty instance of each implementation of the LWWSet interface,
-    backed by a mock clock."""
-    return [
-        LogLWWSet(clock=MockMonotonicClock(0)),
-    ]
+@pytest.fixture(name="lww_set", params=list(IMPLEMENTATIONS))
+def fixture_lww_set(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[LWWSet]:
+    """A new empty instance of each implementation, whose files and worker
+    processes are released after the test"""
+    lww_set = IMPLEMENTATIONS[request.param](tmp_path)
+    yield lww_set
+    close = getattr(lww_set, "close", None)
+    if close is not None:
+        close()
 
 
-@pytest.mark.parametrize("lww_set", make_new_instance_of_each_impl())
 def test_correctness_via_interface__ordered(
     lww_set: LWWSet[int],
 ) -> None:
@@ -43,7 +65,6 @@ def test_correctness_via_interface__ordered(
     assert set(lww_set.elements) == set()
 
 
-@pytest.mark.parametrize("lww_set", make_new_instance_of_each_impl())
 def test_correctness_via_interface__unordered(
     lww_set: LWWSet[int],
 ) -> None:
@@ -64,3 +85,20 @@ def test_correctness_via_interface__unordered(
     assert set(lww_set.elements) == {1}
     lww_set.add(item=2, ts=300)
     assert set(lww_set.elements) == {1, 2}
+
+
+def test_log_lww_set__drops_redundant_operations() -> None:
+    """Redelivered and dominated operations don't reach the log"""
+    lww_set: LogLWWSet[int] = LogLWWSet(clock=MockMonotonicClock(0))
+    lww_set.add(item=1, ts=10)
+    lww_set.remove(item=1, ts=20)
+    lww_set.add(item=2, ts=30)
+    lww_set.apply(list(lww_set.operations))
+    lww_set.add(item=1, ts=15)
+    lww_set.add(item=1, ts=20)
+    lww_set.remove(item=2, ts=5)
+    assert len(lww_set.operations) == 3
+    assert lww_set.dropped_ops == 6
+    lww_set.remove(item=2, ts=31)
+    assert len(lww_set.operations) == 4
+    assert set(lww_set.elements) == set()
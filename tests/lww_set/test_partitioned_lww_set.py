@@ -0,0 +1,91 @@
+"""Test the LWW-element-set partitioned over worker processes against the
+log-based one"""
+import random
+from typing import Any, List
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_set.impl.log_lww_set import LogLWWSet
+from crdt.lww_set.impl.partitioned_lww_set import HashRing, PartitionedLWWSet
+from crdt.lww_set.operation import LWWSetOperation, LWWSetOpName
+
+
+def random_element_ops(
+    rng: random.Random, count: int, elements: int
+) -> List[LWWSetOperation[Any]]:
+    """Random operations on ``elements`` ints and strings"""
+    names: List[LWWSetOpName] = ["add", "add", "del"]
+    return [
+        LWWSetOperation[Any](
+            op=rng.choice(names),
+            arg=rng.choice([i, str(i)]),
+            ts=rng.randrange(10 * count),
+        )
+        for i in (rng.randrange(elements) for _ in range(count))
+    ]
+
+
+def test_hash_ring__new_worker_takes_a_share() -> None:
+    """Adding a worker only moves elements to it"""
+    ring = HashRing(range(3))
+    before = {i: ring.owner(i) for i in range(3000)}
+    ring.add(3)
+    moved = [i for i in before if ring.owner(i) != before[i]]
+    assert all(ring.owner(i) == 3 for i in moved)
+    assert 400 < len(moved) < 1100
+
+
+def test_partitioned_set__matches_log_and_rebalances() -> None:
+    """Operations resolve like the log-based set, before and after workers
+    are added, including removals recorded before the rebalancing"""
+    rng = random.Random(7)
+    lww_set: PartitionedLWWSet[Any] = PartitionedLWWSet(
+        MockMonotonicClock(0), workers=2, batch_size=16, chunk_size=10
+    )
+    reference: LogLWWSet[Any] = LogLWWSet(MockMonotonicClock(0))
+    try:
+        for workers in (2, 3):
+            ops = random_element_ops(rng, 300, 100)
+            lww_set.apply(ops[:200])
+            for op in ops[200:]:
+                write = lww_set.add if op.op == "add" else lww_set.remove
+                write(op.arg, ts=op.ts)
+            reference.apply(ops)
+            assert sorted(map(str, lww_set.elements)) == sorted(
+                map(str, reference.elements)
+            )
+            candidates = list(range(100)) + [str(i) for i in range(100)]
+            assert lww_set.contains_many(candidates) == [
+                item in reference for item in candidates
+            ]
+            total = sum(lww_set.shard_sizes())
+            lww_set.add_worker()
+            assert lww_set.workers == workers + 1
+            sizes = lww_set.shard_sizes()
+            assert sum(sizes) == total and sizes[-1] > 0
+        # An abandoned listing doesn't desynchronize the pipes
+        abandoned = iter(lww_set.elements)
+        next(abandoned)
+        del abandoned
+        assert (1 in lww_set) == (1 in reference)
+    finally:
+        lww_set.close()
+
+
+def test_partitioned_set__equal_numbers_are_one_element() -> None:
+    """Equal elements of different types, like 1, 1.0 and True, are held by the
+    same shard, so they resolve as one element as in the other sets"""
+    ring = HashRing(range(8))
+    for equal in ([1, 1.0, True], [0, -0.0, False], [(1, 2.0), (True, 2)]):
+        assert len({ring.owner(item) for item in equal}) == 1
+    lww_set: PartitionedLWWSet[Any] = PartitionedLWWSet(
+        MockMonotonicClock(0), workers=8
+    )
+    try:
+        lww_set.add(1, ts=1)
+        lww_set.remove(1.0, ts=2)
+        lww_set.add(True, ts=3)
+        lww_set.remove(1, ts=4)
+        assert not list(lww_set.elements)
+        assert lww_set.contains_many([1, 1.0, True]) == [False] * 3
+    finally:
+        lww_set.close()
@@ -0,0 +1,58 @@
+"""Test the LWW-element-set stored in Redis against the log-based one"""
+# pylint: disable=wrong-import-position
+import random
+from typing import Any, List
+
+import pytest
+
+pytest.importorskip("redis")
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_set.impl.log_lww_set import LogLWWSet
+from crdt.lww_set.impl.redis_lww_set import RedisLWWSet
+from crdt.lww_set.operation import LWWSetOperation, LWWSetOpName
+
+
+def random_set_ops(rng: random.Random, count: int) -> List[LWWSetOperation[Any]]:
+    """Random operations on a few elements, with colliding timestamps"""
+    names: List[LWWSetOpName] = ["add", "add", "del"]
+    return [
+        LWWSetOperation[Any](
+            op=rng.choice(names),
+            arg=rng.choice([1, 2, "a", (1, "b")]),
+            ts=rng.randrange(50),
+        )
+        for _ in range(count)
+    ]
+
+
+def test_redis_set__matches_log(redis_client: Any) -> None:
+    """Batched and single operations resolve like the log-based set"""
+    rng = random.Random(5)
+    for i in range(30):
+        lww_set: RedisLWWSet[Any] = RedisLWWSet(
+            redis_client, f"set-{i}", MockMonotonicClock(0), batch_size=7
+        )
+        reference: LogLWWSet[Any] = LogLWWSet(MockMonotonicClock(0))
+        ops = random_set_ops(rng, 30)
+        lww_set.apply(ops[:20])
+        for op in ops[20:]:
+            if op.op == "add":
+                lww_set.add(op.arg, ts=op.ts)
+            else:
+                lww_set.remove(op.arg, ts=op.ts)
+        reference.apply(ops)
+        assert set(lww_set.elements) == set(reference.elements)
+        for element in [1, 2, "a", (1, "b")]:
+            assert (element in lww_set) == (element in reference)
+
+
+def test_redis_set__shared(redis_client: Any) -> None:
+    """Replicas opened on the same name share their elements"""
+    first: RedisLWWSet[int] = RedisLWWSet(redis_client, "s", MockMonotonicClock(0))
+    second: RedisLWWSet[int] = RedisLWWSet(redis_client, "s", MockMonotonicClock(0))
+    first.add(1, ts=10**18 + 1)
+    second.remove(1, ts=10**18)
+    assert set(second.elements) == {1}
+    second.remove(1, ts=10**18 + 1)
+    assert 1 not in first
@@ -0,0 +1,83 @@
+"""Test the memory-mapped binary operations log"""
+import random
+from pathlib import Path
+
+import pytest
+from pytest import raises
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_set.impl.log_lww_set import LogLWWSet
+from crdt.persistence.binlog import BinaryOpLog
+from crdt.persistence.interface import PersistenceError
+from crdt.persistence.records import GRAPH_OPS, RECORD, RECORD_DTYPE, SET_OPS
+from tests.lww_graph.test_log_lww_graph import random_ops
+
+
+def test_binary_log__sequence(tmp_path: Path) -> None:
+    """Append operations, read them back, and reopen the log after a torn
+    append"""
+    path = str(tmp_path / "ops.bin")
+    log = BinaryOpLog(path, GRAPH_OPS)
+    ops = random_ops(random.Random(1), 50)
+    log.extend(ops[:40])
+    for op in ops[40:]:
+        log.append(op)
+    assert len(log) == 50
+    assert list(log) == ops
+    assert log[3] == ops[3] and log[-1] == ops[-1]
+    assert log[10:20] == ops[10:20] and log[::7] == ops[::7]
+    with raises(IndexError):
+        log[50]  # pylint: disable=pointless-statement
+    with raises(PersistenceError):
+        log.insert(0, ops[0])
+    log.close()
+    with open(path, "ab") as f:
+        f.write(b"torn")
+    log = BinaryOpLog(path, GRAPH_OPS)
+    assert list(log) == ops
+    with raises(PersistenceError):
+        BinaryOpLog(path, SET_OPS)
+    log.close()
+
+
+def test_binary_log__backs_replicas(tmp_path: Path) -> None:
+    """Replicas read, append to and compact their file-backed log"""
+    path = str(tmp_path / "graph.bin")
+    graph: LogLWWGraph[int] = LogLWWGraph(
+        MockMonotonicClock(0), oplog=BinaryOpLog(path, GRAPH_OPS)
+    )
+    graph.apply(random_ops(random.Random(2), 100))
+    graph.add_vertex(7, ts=200)
+    vertices, edges = set(graph.vertices), set(graph.edges)
+    graph.compact()
+    reopened: LogLWWGraph[int] = LogLWWGraph(
+        MockMonotonicClock(0), oplog=BinaryOpLog(path, GRAPH_OPS)
+    )
+    assert len(reopened.operations) < 101
+    assert set(reopened.vertices) == vertices and set(reopened.edges) == edges
+    set_path = str(tmp_path / "set.bin")
+    lww_set: LogLWWSet[str] = LogLWWSet(
+        MockMonotonicClock(0), oplog=BinaryOpLog(set_path, SET_OPS)
+    )
+    lww_set.add("a")
+    lww_set.add("b")
+    lww_set.remove("a")
+    lww_set.compact()
+    assert set(
+        LogLWWSet(MockMonotonicClock(0), BinaryOpLog(set_path, SET_OPS)).elements
+    ) == {"b"}
+
+
+def test_binary_log__numpy_view(tmp_path: Path) -> None:
+    """The records can be viewed as a NumPy array without copying"""
+    numpy = pytest.importorskip("numpy")
+    log = BinaryOpLog(str(tmp_path / "ops.bin"), SET_OPS)
+    log.extend(SET_OPS.build(i % 2, [i // 2], ts=i) for i in range(10))
+    with log.records_view() as view:
+        assert len(view) == 10 * RECORD.size
+        records = numpy.frombuffer(view, dtype=RECORD_DTYPE)
+        assert list(records["ts"]) == list(range(10))
+        assert list(records["op"]) == [0, 1] * 5
+        del records
+    log.close()
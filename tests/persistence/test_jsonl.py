@@ -0,0 +1,44 @@
+"""Test the newline-delimited JSON interchange of operations logs"""
+import random
+from pathlib import Path
+
+import pytest
+from pytest import raises
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.persistence.interface import PersistenceError
+from crdt.persistence.jsonl import dump_ops, load_ops
+from crdt.persistence.records import GRAPH_OPS, SET_OPS
+from tests.lww_graph.test_log_lww_graph import random_ops
+
+
+@pytest.mark.parametrize("file_name", ["ops.jsonl", "ops.jsonl.gz"])
+def test_jsonl__round_trip(tmp_path: Path, file_name: str) -> None:
+    """Dump a graph history, plain and compressed, and replay it in chunks"""
+    ops = random_ops(random.Random(5), 250)
+    ops.append(GRAPH_OPS.build(2, [(1, "b"), "c"], ts=100))
+    path = str(tmp_path / file_name)
+    assert dump_ops(path, GRAPH_OPS, iter(ops), chunk_size=100) == len(ops)
+    chunks = list(load_ops(path, GRAPH_OPS, chunk_size=100))
+    assert [len(chunk) for chunk in chunks] == [100, 100, 51]
+    assert [op for chunk in chunks for op in chunk] == ops
+    graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+    for chunk in load_ops(path, GRAPH_OPS):
+        graph.apply(chunk)
+    assert len(graph.operations) + graph.dropped_ops == len(ops)
+    full: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0), oplog=list(ops))
+    assert set(graph.vertices) == set(full.vertices)
+    assert set(graph.edges) == set(full.edges)
+
+
+def test_jsonl__sets_and_errors(tmp_path: Path) -> None:
+    """Set operations use the same format, and malformed lines are reported"""
+    path = tmp_path / "ops.jsonl"
+    ops = [SET_OPS.build(0, ["a"], ts=1), SET_OPS.build(1, ["a"], ts=2)]
+    dump_ops(str(path), SET_OPS, ops)
+    assert path.read_text().splitlines()[0] == '{"op":"add","arg":"a","ts":1}'
+    assert list(load_ops(str(path), SET_OPS)) == [ops]
+    path.write_text('{"op":"add","arg":"a","ts":1}\n\n{"op":"mul"}\n')
+    with raises(PersistenceError):
+        list(load_ops(str(path), SET_OPS))
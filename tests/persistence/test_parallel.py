@@ -0,0 +1,57 @@
+"""Test the multi-core resolution of operation logs"""
+import random
+from pathlib import Path
+
+import pytest
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.impl.log_lww_graph import LogLWWGraph
+from crdt.lww_set.impl.log_lww_set import LogLWWSet
+from crdt.persistence import parallel
+from crdt.persistence.records import GRAPH_OPS, SET_OPS
+from crdt.persistence.snapshot import write_snapshot
+from tests.lww_graph.test_log_lww_graph import random_ops
+
+
+@pytest.fixture(autouse=True)
+def small_ranges(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Spread even small logs over several worker processes"""
+    monkeypatch.setattr(parallel, "MIN_RECORDS_PER_WORKER", 10)
+
+
+def test_resolve_graph__matches_log_replay(tmp_path: Path) -> None:
+    """Resolving ranges of the log in parallel and merging them must give the
+    same graph as replaying the sorted log"""
+    rng = random.Random(11)
+    ops = random_ops(rng, 400)
+    graph: LogLWWGraph[int] = LogLWWGraph(MockMonotonicClock(0))
+    graph.apply(ops)
+    path = str(tmp_path / "snapshot.bin")
+    write_snapshot(path, GRAPH_OPS, ops)
+    for resolved in (
+        parallel.resolve_graph_operations(ops, workers=3),
+        parallel.resolve_graph_snapshot(path, workers=3),
+    ):
+        assert resolved.vertices == set(graph.vertices)
+        assert resolved.tables.live_vertices() == resolved.vertices
+        assert resolved.edges == set(graph.edges)
+        assert resolved.tables.live_edges() == resolved.edges
+        assert sorted(map(sorted, resolved.components)) == sorted(
+            map(sorted, graph.components)
+        )
+
+
+def test_resolve_set__matches_log(tmp_path: Path) -> None:
+    """Same as above, for sets"""
+    rng = random.Random(12)
+    ops = [
+        SET_OPS.build(rng.randrange(2), [rng.randrange(20)], ts=rng.randrange(50))
+        for _ in range(300)
+    ]
+    lww_set: LogLWWSet[int] = LogLWWSet(MockMonotonicClock(0))
+    lww_set.apply(ops)
+    path = str(tmp_path / "snapshot.bin")
+    write_snapshot(path, SET_OPS, ops)
+    assert parallel.resolve_set_operations(ops, workers=2) == set(lww_set.elements)
+    assert parallel.resolve_set_snapshot(path, workers=2) == set(lww_set.elements)
+    assert parallel.resolve_set_operations([]) == set()
@@ -0,0 +1,38 @@
+"""Test the building blocks of the replicas stored in Redis"""
+# pylint: disable=wrong-import-position
+from typing import Any
+
+import pytest
+
+pytest.importorskip("redis")
+
+from crdt.persistence.interface import PersistenceError
+from crdt.persistence.redis_backend import (
+    LATER_LUA,
+    encode_timestamp,
+    run_batched,
+    scan_atoms,
+)
+
+
+def test_timestamps__compared_exactly(redis_client: Any) -> None:
+    """Timestamps beyond the precision of Lua numbers are compared exactly"""
+    later = redis_client.register_script(
+        LATER_LUA + "return later(ARGV[1], ARGV[2]) and 1 or 0"
+    )
+    ts = 1_700_000_000_000_000_001
+    for a, b, expected in [(ts, ts - 1, 1), (ts - 1, ts, 0), (ts, ts, 0), (ts, 9, 1)]:
+        args = [encode_timestamp(a), encode_timestamp(b)]
+        assert later(keys=[], args=args) == expected
+    with pytest.raises(PersistenceError):
+        encode_timestamp(-1)
+
+
+def test_run_batched(redis_client: Any) -> None:
+    """Arguments are sent in batches, whose results are returned in order"""
+    append = redis_client.register_script(
+        "for i = 1, #ARGV do redis.call('SADD', KEYS[1], ARGV[i]) end return #ARGV"
+    )
+    args = [(f'"{i}"',) for i in range(25)]
+    assert run_batched(redis_client, append, ["atoms"], args, 10) == [10, 10, 5]
+    assert set(scan_atoms(redis_client, "atoms", 7)) == {str(i) for i in range(25)}
@@ -0,0 +1,160 @@
+"""Test the snapshot, write-ahead log and replica store persistence layer"""
+import os
+from pathlib import Path
+
+from pytest import raises
+
+from crdt.clock.impl.mocktime import MockMonotonicClock
+from crdt.lww_graph.edge import BaseEdge, FrozenEdge
+from crdt.lww_graph.impl.durable_lww_graph import DurableLWWGraph
+from crdt.lww_graph.operation import LWWGraphOperation
+from crdt.lww_set.impl.durable_lww_set import DurableLWWSet
+from crdt.lww_set.impl.log_lww_set import LogLWWSet
+from crdt.persistence.interface import PersistenceError
+from crdt.persistence.records import GRAPH_OPS, SET_OPS
+from crdt.persistence.snapshot import (
+    read_snapshot,
+    read_snapshot_frontier,
+    write_snapshot,
+)
+from crdt.persistence.store import WAL_FILE, ReplicaStore
+from crdt.persistence.wal import WriteAheadLog
+
+
+def test_snapshot__round_trip(tmp_path: Path) -> None:
+    """Write graph operations with various atoms and read them back"""
+    ops = [
+        GRAPH_OPS.build(0, ["a"], ts=1),
+        GRAPH_OPS.build(0, [(1, "b")], ts=2),
+        GRAPH_OPS.build(2, ["a", (1, "b")], ts=3),
+        GRAPH_OPS.build(1, ["a"], ts=-4),
+    ]
+    assert ops[2].arg == BaseEdge(a="a", b=(1, "b"))
+    path = str(tmp_path / "snapshot.bin")
+    write_snapshot(path, GRAPH_OPS, ops)
+    assert list(read_snapshot(path, GRAPH_OPS)) == ops
+    assert read_snapshot_frontier(path, GRAPH_OPS) is None
+    write_snapshot(path, GRAPH_OPS, ops, frontier=-5)
+    assert list(read_snapshot(path, GRAPH_OPS)) == ops
+    assert read_snapshot_frontier(path, GRAPH_OPS) == -5
+    with raises(PersistenceError):
+        list(read_snapshot(path, SET_OPS))
+
+
+def test_write_ahead_log__discards_torn_tail(tmp_path: Path) -> None:
+    """Simulate a crash in the middle of an append and reopen the log"""
+    path = str(tmp_path / WAL_FILE)
+    wal = WriteAheadLog(path, SET_OPS, sync_every=2)
+    ops = [SET_OPS.build(i % 2, [f"item {i}"], ts=i) for i in range(5)]
+    for op in ops:
+        wal.append(op)
+    wal.close()
+    with open(path, "ab") as f:
+        f.write(b"\x10\x00\x00\x00garbage")
+    size = os.path.getsize(path)
+    wal = WriteAheadLog(path, SET_OPS)
+    assert os.path.getsize(path) < size
+    assert list(wal) == ops
+    wal.append(ops[0])
+    assert list(wal) == ops + ops[:1]
+    wal.close()
+
+
+def test_replica_store__checkpoint(tmp_path: Path) -> None:
+    """The store recovers the compacted snapshot followed by the log tail"""
+    store = ReplicaStore(str(tmp_path), SET_OPS, checkpoint_every=3)
+    replica: LogLWWSet[int] = LogLWWSet(MockMonotonicClock(0))
+    ops = [SET_OPS.build(i % 2, [i // 2], ts=i) for i in range(5)]
+    for op in ops:
+        replica.apply([op])
+        store.log(op, replica)
+    store.close()
+    assert len(replica.operations) == 4  # 2 compacted, then 2 logged ops
+    store = ReplicaStore(str(tmp_path), SET_OPS)
+    assert sorted(store.recover(), key=lambda o: o.ts) == ops[1:]
+    store.close()
+
+
+def test_durable_lww_graph__recovery(tmp_path: Path) -> None:
+    """Reopen a graph after checkpoints and further operations"""
+    graph: DurableLWWGraph[int] = DurableLWWGraph(
+        str(tmp_path), MockMonotonicClock(0), checkpoint_every=3
+    )
+    for v in range(5):
+        graph.add_vertex(v)
+    graph.add_edge(FrozenEdge(1, 2))
+    graph.add_edge(FrozenEdge(3, 4))
+    graph.remove_vertex(3)
+    graph.add_vertex(3)
+    graph.close()
+    recovered: DurableLWWGraph[int] = DurableLWWGraph(
+        str(tmp_path), MockMonotonicClock(100)
+    )
+    assert set(recovered.vertices) == set(graph.vertices) == set(range(5))
+    assert set(recovered.edges) == set(graph.edges) == {FrozenEdge(1, 2)}
+    recovered.close()
+
+
+def test_durable_lww_graph__frontier_survives_restarts(tmp_path: Path) -> None:
+    """Operations at or before the frontier stay rejected after a restart, as
+    the records that would reject them were collected"""
+    graph: DurableLWWGraph[int] = DurableLWWGraph(str(tmp_path), MockMonotonicClock(0))
+    graph.add_vertex(1, ts=10)
+    graph.add_vertex(2, ts=10)
+    graph.remove_vertex(1, ts=20)
+    graph.collect_garbage(30)
+    graph.close()
+    recovered: DurableLWWGraph[int] = DurableLWWGraph(
+        str(tmp_path), MockMonotonicClock(100)
+    )
+    assert recovered.frontier == 30
+    assert [(op.op, op.arg) for op in recovered.operations] == [("add_v", 2)]
+    recovered.apply([LWWGraphOperation[int](op="add_v", arg=1, ts=15)])
+    assert set(recovered.vertices) == {2}
+    recovered.close()
+
+
+def test_durable_lww_set__recovery(tmp_path: Path) -> None:
+    """Reopen a set after checkpoints and further operations"""
+    lww_set: DurableLWWSet[str] = DurableLWWSet(
+        str(tmp_path), MockMonotonicClock(0), checkpoint_every=2, sync_every=10
+    )
+    lww_set.add("a")
+    lww_set.add("b")
+    lww_set.remove("a")
+    lww_set.add("c")
+    lww_set.remove("b", ts=1)
+    lww_set.close()
+    recovered: DurableLWWSet[str] = DurableLWWSet(
+        str(tmp_path), MockMonotonicClock(100)
+    )
+    assert set(recovered.elements) == {"b", "c"}
+    recovered.close()
+
+
+def test_durable__local_writes_dropped_are_not_logged(tmp_path: Path) -> None:
+    """Local writes that the replica drops are not appended to the log either"""
+    graph: DurableLWWGraph[int] = DurableLWWGraph(
+        str(tmp_path / "graph"), MockMonotonicClock(0)
+    )
+    graph.add_vertex(1, ts=5)
+    graph.add_vertex(1, ts=5)
+    graph.add_edge(FrozenEdge(1, 1), ts=6)
+    graph.remove_edge(FrozenEdge(1, 1), ts=7)
+    graph.remove_edge(FrozenEdge(1, 1), ts=6)
+    assert graph.dropped_ops == 2
+    graph.close()
+    wal = WriteAheadLog(str(tmp_path / "graph" / WAL_FILE), GRAPH_OPS)
+    assert [op.ts for op in wal] == [5, 6, 7]
+    wal.close()
+    lww_set: DurableLWWSet[str] = DurableLWWSet(
+        str(tmp_path / "set"), MockMonotonicClock(0)
+    )
+    lww_set.add("a", ts=5)
+    lww_set.add("a", ts=3)
+    lww_set.remove("a", ts=4)
+    assert lww_set.dropped_ops == 2
+    lww_set.close()
+    set_wal = WriteAheadLog(str(tmp_path / "set" / WAL_FILE), SET_OPS)
+    assert [op.ts for op in set_wal] == [5]
+    set_wal.close()